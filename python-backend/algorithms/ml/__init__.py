@@ -8,11 +8,17 @@ from . import lstm_predictor
 from . import xgboost_predictor
 from . import gradient_boosting
 from . import ensemble_voting
+from . import validation
+from . import tree_engine
+from . import lstm_engine
 
 __all__ = [
     'random_forest',
     'lstm_predictor',
     'xgboost_predictor',
     'gradient_boosting',
-    'ensemble_voting'
+    'ensemble_voting',
+    'validation',
+    'tree_engine',
+    'lstm_engine'
 ]
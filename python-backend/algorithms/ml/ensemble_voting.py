@@ -7,19 +7,86 @@ Combines multiple ML models for improved predictions
 ==============================================
 """
 
+import hashlib
+import os
+
 import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
 from sklearn.ensemble import (
     VotingRegressor,
     RandomForestRegressor,
     GradientBoostingRegressor,
     AdaBoostRegressor
 )
-from sklearn.linear_model import Ridge, ElasticNet
-from sklearn.model_selection import cross_val_score, train_test_split
+from sklearn.linear_model import Ridge, ElasticNet, LinearRegression
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from typing import Dict, Any, Optional, List
+from sklearn.utils import Bunch
+from typing import Dict, Any, Optional, List, Tuple
 import inspect
 
+from . import tree_engine
+from .validation import validation_splits, cv_summary
+from services.state_store import LRUStateStore
+
+COMBINERS = ("voting", "stacking")
+META_LEARNERS = ("nnls", "ridge")
+# Fold layouts that give every row an out-of-fold prediction
+STACKING_VALIDATION = ("kfold", "blocked")
+
+# Member fold predictions and fits per (dataset, member, folds), shared by
+# voting and stacking; entries beyond capacity spill to <MODEL_PATH>/ensemble_oof
+_oof_cache = LRUStateStore("ensemble_oof", capacity=int(os.getenv("ENSEMBLE_OOF_CACHE", 8)))
+
+
+def _regression_metrics(y_true: np.ndarray, y_pred: np.ndarray) -> Dict[str, float]:
+    return {
+        "mae": float(mean_absolute_error(y_true, y_pred)),
+        "rmse": float(np.sqrt(mean_squared_error(y_true, y_pred))),
+        "r2": float(r2_score(y_true, y_pred))
+    }
+
+
+def _meta_estimator(meta_learner: str) -> Any:
+    """Linear model fitted on the member predictions"""
+    if meta_learner == "nnls":
+        # Non-negative least squares: coefficients are the member weights
+        return LinearRegression(positive=True, fit_intercept=False)
+    return Ridge(alpha=1.0)
+
+
+def _data_hash(X: np.ndarray, y: np.ndarray) -> str:
+    """Hash of a training set (features, targets and shape)"""
+    digest = hashlib.sha1(np.ascontiguousarray(X).tobytes())
+    digest.update(np.ascontiguousarray(y).tobytes())
+    digest.update(str(X.shape).encode())
+    return digest.hexdigest()
+
+
+def _oof_key(data_hash: str,
+             name: str,
+             estimator: Any,
+             combiner: str,
+             method: str,
+             n_folds: int,
+             gap: int = 0,
+             window: Optional[int] = None) -> str:
+    """Cache key from dataset hash, member configuration and fold layout"""
+    params = hashlib.sha1(repr(sorted(estimator.get_params().items())).encode()).hexdigest()[:12]
+    key = f"{data_hash}_{name}_{params}_{combiner}_{method}{n_folds}g{gap}"
+    return f"{key}w{window}" if window else key
+
+
+def _fit_member(estimator: Any,
+                X: np.ndarray,
+                y: np.ndarray,
+                train_idx: np.ndarray,
+                test_idx: np.ndarray) -> Tuple[Any, np.ndarray]:
+    """Fit one member on one fold (runs in a joblib worker) and predict its test rows"""
+    model = clone(estimator)
+    model.fit(X[train_idx], y[train_idx])
+    return model, model.predict(X[test_idx]) if len(test_idx) else np.empty(0)
+
 
 class WeatherEnsembleVoting:
     """
@@ -65,20 +132,38 @@ class WeatherEnsembleVoting:
     
     def __init__(self, 
                  models: Optional[List[str]] = None,
-                 weights: Optional[List[float]] = None):
+                 weights: Optional[List[float]] = None,
+                 n_jobs: int = -1,
+                 combiner: str = "voting",
+                 meta_learner: str = "nnls"):
         """
         Initialize Ensemble Voting.
         
         Args:
             models: List of model names to include
-            weights: Optional weights for each model
+            weights: Optional weights for each model ('voting' only;
+                     stacking learns them)
+            n_jobs: joblib workers for fitting members
+            combiner: 'voting' (fixed-weight average) or 'stacking'
+                      (meta-learner on out-of-fold member predictions)
+            meta_learner: 'nnls' (non-negative weights) or 'ridge' ('stacking')
         """
+        if combiner not in COMBINERS:
+            raise ValueError(f"Unknown combiner '{combiner}'. Use one of {COMBINERS}")
+        if meta_learner not in META_LEARNERS:
+            raise ValueError(f"Unknown meta_learner '{meta_learner}'. Use one of {META_LEARNERS}")
+        if combiner == "stacking" and weights is not None:
+            raise ValueError("weights apply to combiner='voting'; stacking fits them with the meta-learner")
         # Default models
         if models is None:
             models = ['random_forest', 'gradient_boosting', 'ridge', 'adaboost']
         
         self.models = models
         self.weights = weights
+        self.n_jobs = n_jobs
+        self.combiner = combiner
+        self.meta_learner = meta_learner
+        self.meta = None
         
         # Build estimators
         estimators = []
@@ -109,101 +194,315 @@ class WeatherEnsembleVoting:
                     ElasticNet(alpha=0.1, l1_ratio=0.5)
                 ))
         
+        if weights is not None and len(weights) != len(estimators):
+            raise ValueError(f"Got {len(weights)} weights for {len(estimators)} models")
+        
         self.ensemble = VotingRegressor(
             estimators=estimators,
-            weights=weights
+            weights=weights,
+            n_jobs=n_jobs
         )
         self.is_trained = False
         
-    def train(self, X: np.ndarray, y: np.ndarray) -> Dict[str, Any]:
+    def _average(self, member_predictions: List[np.ndarray]) -> np.ndarray:
+        """Ensemble prediction from member predictions (VotingRegressor rule)"""
+        return np.average(np.vstack(member_predictions), axis=0, weights=self.weights)
+    
+    def _combine(self, member_predictions: List[np.ndarray]) -> np.ndarray:
+        """Ensemble prediction from member predictions (voting or meta-learner)"""
+        if getattr(self, "meta", None) is None:
+            return self._average(member_predictions)
+        return self.meta.predict(np.column_stack(member_predictions))
+    
+    def _assemble(self, names: List[str], members: List[Any]):
+        """Fitted VotingRegressor from already fitted members"""
+        self.ensemble = clone(self.ensemble)
+        self.ensemble.estimators_ = members
+        self.ensemble.named_estimators_ = Bunch(**dict(zip(names, members)))
+        self._engine = tree_engine.compile_model(self.ensemble)
+        self.is_trained = True
+    
+    def train(self, 
+              X: np.ndarray, 
+              y: np.ndarray,
+              validation: str = "holdout",
+              n_folds: int = 5,
+              gap: int = 0,
+              window: Optional[int] = None) -> Dict[str, Any]:
         """
         Train the ensemble model.
         
+        With combiner='stacking' see train_stacking().
+        
+        Every (member, fold) pair is one joblib job, so members fit in
+        parallel and training takes about as long as the slowest member.
+        Each job also predicts its test rows; the ensemble's fold scores
+        and test metrics are averaged from these member predictions, so
+        the ensemble is never refitted or re-predicted for validation.
+        The members of the kept fold (see validation_splits) are
+        assembled into the fitted VotingRegressor.
+        
+        Fold predictions and kept members are cached like the stacking
+        OOF predictions, so retraining on the same data with other
+        weights only re-averages the cached predictions.
+        
         Args:
             X: Training features
             y: Training targets
+            validation: 'none', 'holdout', 'kfold' or a time-series
+                        split ('blocked', 'expanding', 'rolling')
+            n_folds: Number of folds / origins
+            gap: Rows left out between training and test data
+                 (time-series methods)
+            window: Training window for 'rolling'
             
         Returns:
             Training metrics
         """
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
+        if self.combiner == "stacking":
+            return self.train_stacking(X, y, validation, n_folds, gap)
+        
+        folds, keep = validation_splits(len(y), validation, n_folds, gap, window)
+        names = [name for name, _ in self.ensemble.estimators]
+        
+        data_hash = _data_hash(X, y)
+        keys = {
+            name: _oof_key(data_hash, name, estimator, "voting", validation, n_folds, gap, window)
+            for name, estimator in self.ensemble.estimators
+        }
+        cached = {name: _oof_cache.get(key) for name, key in keys.items() if key in _oof_cache}
+        missing = [(name, est) for name, est in self.ensemble.estimators if name not in cached]
+        
+        # Arrays above max_nbytes are memory-mapped once and shared by the workers
+        fitted = Parallel(n_jobs=self.n_jobs, max_nbytes="1M", mmap_mode="r")(
+            delayed(_fit_member)(estimator, X, y, train_idx, test_idx)
+            for _, estimator in missing
+            for train_idx, test_idx in folds
         )
+        for i, (name, _) in enumerate(missing):
+            runs = fitted[i * len(folds):(i + 1) * len(folds)]
+            cached[name] = {"predictions": [pred for _, pred in runs], "model": runs[keep][0]}
+            _oof_cache.put(keys[name], cached[name])
+        # member name -> test predictions per fold
+        fold_predictions = {name: cached[name]["predictions"] for name in names}
         
-        # Train ensemble
-        self.ensemble.fit(X_train, y_train)
-        self.is_trained = True
+        self._assemble(names, [cached[name]["model"] for name in names])
         
-        # Ensemble predictions
-        y_pred_ensemble = self.ensemble.predict(X_test)
+        scores = None
+        member_cv = {}
+        if validation not in ("none", "holdout"):
+            scores = np.array([
+                mean_absolute_error(y[test_idx], self._average([fold_predictions[name][k] for name in names]))
+                for k, (_, test_idx) in enumerate(folds)
+            ])
+            for name in names:
+                member_cv[name] = float(np.mean([
+                    mean_absolute_error(y[test_idx], fold_predictions[name][k])
+                    for k, (_, test_idx) in enumerate(folds)
+                ]))
         
-        # Individual model predictions and metrics
+        ensemble_metrics = None
         individual_metrics = {}
-        for name, model in self.ensemble.estimators_:
-            y_pred_individual = model.predict(X_test)
-            individual_metrics[name] = {
-                "mae": float(mean_absolute_error(y_test, y_pred_individual)),
-                "rmse": float(np.sqrt(mean_squared_error(y_test, y_pred_individual))),
-                "r2": float(r2_score(y_test, y_pred_individual))
+        improvement = None
+        y_test = y[folds[keep][1]]
+        if len(y_test):
+            # Ensemble predictions
+            member_predictions = {name: fold_predictions[name][keep] for name in names}
+            y_pred_ensemble = self._average(list(member_predictions.values()))
+            ensemble_metrics = {
+                "mae": float(mean_absolute_error(y_test, y_pred_ensemble)),
+                "rmse": float(np.sqrt(mean_squared_error(y_test, y_pred_ensemble))),
+                "r2": float(r2_score(y_test, y_pred_ensemble))
             }
+            
+            # Individual model metrics
+            for name, y_pred_individual in member_predictions.items():
+                individual_metrics[name] = {
+                    "mae": float(mean_absolute_error(y_test, y_pred_individual)),
+                    "rmse": float(np.sqrt(mean_squared_error(y_test, y_pred_individual))),
+                    "r2": float(r2_score(y_test, y_pred_individual))
+                }
+                if name in member_cv:
+                    individual_metrics[name]["cv_mae"] = member_cv[name]
+            improvement = float(
+                min([m["mae"] for m in individual_metrics.values()]) - 
+                ensemble_metrics["mae"]
+            )
         
-        # Cross-validation for ensemble
-        cv_scores = cross_val_score(
-            self.ensemble, X, y,
-            cv=5,
-            scoring='neg_mean_absolute_error'
+        return {
+            "n_samples": len(y),
+            "n_features": X.shape[1],
+            "n_models": len(self.models),
+            "model_names": self.models,
+            "weights": self.weights,
+            "member_cache": {
+                "hits": len(names) - len(missing),
+                "misses": len(missing)
+            },
+            "cross_validation": cv_summary(validation, n_folds, folds, scores, gap),
+            "ensemble_metrics": ensemble_metrics,
+            "individual_metrics": individual_metrics,
+            "improvement_over_best": improvement
+        }
+    
+    def train_stacking(self,
+                       X: np.ndarray,
+                       y: np.ndarray,
+                       validation: str = "kfold",
+                       n_folds: int = 5,
+                       gap: int = 0) -> Dict[str, Any]:
+        """
+        Train a stacked ensemble.
+        
+        1. Out-of-fold (OOF) predictions: every member is fitted on
+           n_folds - 1 folds and predicts the remaining one, so each row
+           gets a prediction from a model that never saw it. Folds are
+           shuffled 'kfold' or 'blocked' (time order)
+        2. Each member is also fitted once on all rows for prediction
+        3. A meta-learner maps member predictions to the target:
+           - nnls:  ŷ = Σ w_m × ŷ_m with w_m ≥ 0
+           - ridge: ŷ = b + Σ w_m × ŷ_m (L2-regularized)
+        
+        OOF predictions and full-data fits are cached per member, keyed by
+        dataset hash, member parameters and fold layout. Retraining on the
+        same data with another meta-learner (or with members added) only
+        fits what is missing; the meta-learner itself is a small linear fit.
+        The reported ensemble metrics come from refitting the meta-learner
+        per fold on the OOF matrix (no member refits).
+        
+        Args:
+            X: Training features
+            y: Training targets
+            validation: 'kfold' or 'blocked' (chronological folds)
+            n_folds: Number of folds
+            gap: Rows left out on each side of a 'blocked' test block
+            
+        Returns:
+            Training metrics
+        """
+        if validation not in STACKING_VALIDATION:
+            raise ValueError(
+                f"Stacking needs out-of-fold predictions for every row; "
+                f"use validation in {STACKING_VALIDATION}, not '{validation}'"
+            )
+        method = validation
+        folds, _ = validation_splits(len(y), method, n_folds, gap)
+        names = [name for name, _ in self.ensemble.estimators]
+        
+        data_hash = _data_hash(X, y)
+        keys = {
+            name: _oof_key(data_hash, name, estimator, "stacking", method, n_folds, gap)
+            for name, estimator in self.ensemble.estimators
+        }
+        cached = {name: _oof_cache.get(key) for name, key in keys.items() if key in _oof_cache}
+        missing = [(name, est) for name, est in self.ensemble.estimators if name not in cached]
+        
+        # n_folds OOF fits plus one full fit per missing member, all in parallel
+        all_rows = (np.arange(len(y)), np.arange(0))
+        fitted = Parallel(n_jobs=self.n_jobs, max_nbytes="1M", mmap_mode="r")(
+            delayed(_fit_member)(estimator, X, y, train_idx, test_idx)
+            for _, estimator in missing
+            for train_idx, test_idx in folds + [all_rows]
         )
+        for i, (name, _) in enumerate(missing):
+            runs = fitted[i * (len(folds) + 1):(i + 1) * (len(folds) + 1)]
+            oof = np.empty(len(y))
+            for (_, test_idx), (_, pred) in zip(folds, runs):
+                oof[test_idx] = pred
+            cached[name] = {"oof": oof, "model": runs[-1][0]}
+            _oof_cache.put(keys[name], cached[name])
+        
+        P = np.column_stack([cached[name]["oof"] for name in names])
+        stacked_oof = np.empty(len(y))
+        for train_idx, test_idx in folds:
+            fold_meta = _meta_estimator(self.meta_learner).fit(P[train_idx], y[train_idx])
+            stacked_oof[test_idx] = fold_meta.predict(P[test_idx])
+        
+        self.meta = _meta_estimator(self.meta_learner).fit(P, y)
+        self._assemble(names, [cached[name]["model"] for name in names])
+        
+        scores = np.array([
+            mean_absolute_error(y[test_idx], stacked_oof[test_idx]) for _, test_idx in folds
+        ])
+        ensemble_metrics = _regression_metrics(y, stacked_oof)
+        individual_metrics = {name: _regression_metrics(y, P[:, j]) for j, name in enumerate(names)}
         
         return {
             "n_samples": len(y),
             "n_features": X.shape[1],
             "n_models": len(self.models),
             "model_names": self.models,
-            "weights": self.weights,
-            "cross_validation": {
-                "cv_scores": (-cv_scores).tolist(),
-                "cv_mean": float(-cv_scores.mean()),
-                "cv_std": float(cv_scores.std())
+            "combiner": "stacking",
+            "meta_learner": {
+                "type": self.meta_learner,
+                "weights": dict(zip(names, self.meta.coef_.tolist())),
+                "intercept": float(self.meta.intercept_)
             },
-            "ensemble_metrics": {
-                "mae": float(mean_absolute_error(y_test, y_pred_ensemble)),
-                "rmse": float(np.sqrt(mean_squared_error(y_test, y_pred_ensemble))),
-                "r2": float(r2_score(y_test, y_pred_ensemble))
+            "oof_cache": {
+                "hits": len(names) - len(missing),
+                "misses": len(missing)
             },
+            "cross_validation": cv_summary(method, n_folds, folds, scores, gap),
+            "ensemble_metrics": ensemble_metrics,
             "individual_metrics": individual_metrics,
             "improvement_over_best": float(
-                min([m["mae"] for m in individual_metrics.values()]) - 
-                mean_absolute_error(y_test, y_pred_ensemble)
+                min(m["mae"] for m in individual_metrics.values()) - ensemble_metrics["mae"]
             )
         }
     
+    @property
+    def engine(self) -> tree_engine.CompiledVoting:
+        """Flat-array inference engine (compiled on first use for stored models)"""
+        if getattr(self, "_engine", None) is None:
+            self._engine = tree_engine.compile_model(self.ensemble)
+        return self._engine
+    
     def predict(self, X: np.ndarray) -> np.ndarray:
         """Make predictions"""
         if not self.is_trained:
             raise ValueError("Model must be trained first")
+        if getattr(self, "meta", None) is not None:
+            return self.predict_all_models(X)["ensemble"]
+        if tree_engine.use_engine(X):
+            return self.engine.predict(X)
         return self.ensemble.predict(X)
     
     def predict_all_models(self, X: np.ndarray) -> Dict[str, np.ndarray]:
         """Get predictions from all individual models"""
         if not self.is_trained:
             raise ValueError("Model must be trained first")
-            
-        predictions = {}
-        for name, model in self.ensemble.estimators_:
-            predictions[name] = model.predict(X)
-        predictions["ensemble"] = self.ensemble.predict(X)
+        if tree_engine.use_engine(X):
+            predictions = self.engine.predict_members(X)
+            if getattr(self, "meta", None) is None:
+                return predictions
+            predictions.pop("ensemble")
+        else:
+            predictions = {}
+            for name, model in self.ensemble.named_estimators_.items():
+                predictions[name] = model.predict(X)
+        # Derived from the member predictions instead of predicting again
+        predictions["ensemble"] = self._combine(list(predictions.values()))
         
         return predictions
 
 
-def train_and_predict(X_train: np.ndarray,
-                      y_train: np.ndarray,
-                      X_predict: Optional[np.ndarray] = None) -> Dict[str, Any]:
+def train_model(X_train: np.ndarray,
+                y_train: np.ndarray,
+                validation: str = "holdout",
+                n_folds: int = 5,
+                combiner: str = "voting",
+                meta_learner: str = "nnls",
+                gap: int = 0,
+                window: Optional[int] = None,
+                weights: Optional[List[float]] = None) -> Tuple[WeatherEnsembleVoting, Dict[str, Any]]:
     """
-    Train Ensemble Voting and optionally make predictions.
+    Train Ensemble Voting.
+    
+    Returns:
+        Fitted ensemble and training results (without predictions)
     """
-    ensemble = WeatherEnsembleVoting()
-    train_metrics = ensemble.train(X_train, y_train)
+    ensemble = WeatherEnsembleVoting(weights=weights, combiner=combiner, meta_learner=meta_learner)
+    train_metrics = ensemble.train(X_train, y_train, validation, n_folds, gap, window)
     
     result = {
         "algorithm": "Ensemble Voting Regressor",
@@ -213,6 +512,7 @@ def train_and_predict(X_train: np.ndarray,
         "mathematical_formulation": {
             "averaging": "ŷ = (1/M) × Σ_{m=1}^{M} ŷ_m",
             "weighted": "ŷ = Σ_{m=1}^{M} w_m × ŷ_m",
+            "stacking": "ŷ = g(ŷ_1, ..., ŷ_M), g fitted on out-of-fold ŷ_m",
             "diversity": "Error_ensemble ≤ (1/M) × Σ Error_m"
         },
         "included_models": {
@@ -224,11 +524,36 @@ def train_and_predict(X_train: np.ndarray,
         "training_metrics": train_metrics
     }
     
+    return ensemble, result
+
+
+def predict_with_model(ensemble: WeatherEnsembleVoting, X_predict: np.ndarray) -> Dict[str, List[float]]:
+    """Member and ensemble predictions from a trained ensemble"""
+    predictions = ensemble.predict_all_models(X_predict)
+    return {
+        name: pred.tolist() for name, pred in predictions.items()
+    }
+
+
+def train_and_predict(X_train: np.ndarray,
+                      y_train: np.ndarray,
+                      X_predict: Optional[np.ndarray] = None,
+                      validation: str = "holdout",
+                      n_folds: int = 5,
+                      combiner: str = "voting",
+                      meta_learner: str = "nnls",
+                      gap: int = 0,
+                      window: Optional[int] = None,
+                      weights: Optional[List[float]] = None) -> Dict[str, Any]:
+    """
+    Train Ensemble Voting and optionally make predictions.
+    """
+    ensemble, result = train_model(
+        X_train, y_train, validation, n_folds, combiner, meta_learner, gap, window, weights
+    )
+    
     if X_predict is not None:
-        predictions = ensemble.predict_all_models(X_predict)
-        result["predictions"] = {
-            name: pred.tolist() for name, pred in predictions.items()
-        }
+        result["predictions"] = predict_with_model(ensemble, X_predict)
     
     return result
 
@@ -10,12 +10,14 @@ Annals of Statistics, 29(5), 1189-1232.
 """
 
 import numpy as np
-from sklearn.ensemble import GradientBoostingRegressor
-from sklearn.model_selection import cross_val_score, train_test_split
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple, List
 import inspect
 
+from . import tree_engine
+from .validation import fit_and_validate
+
 
 class WeatherGradientBoosting:
     """
@@ -52,31 +54,81 @@ class WeatherGradientBoosting:
     - Max depth limits tree complexity
     - Subsample (stochastic gradient boosting)
     - Min samples per leaf
+    - Early stopping on a validation split (n_iter_no_change)
+    
+    Backends:
+    ========
+    - exact: GradientBoostingRegressor, sorts every feature at every split
+             O(n log n · p) per tree
+    - hist:  HistGradientBoostingRegressor (LightGBM-style), features are
+             binned once into ≤ max_bins quantiles and splits are found on
+             gradient histograms, O(n · p) per tree; native NaN support,
+             no row subsampling
     """
     
+    BACKENDS = ("exact", "hist")
+    
     def __init__(self,
                  n_estimators: int = 100,
                  max_depth: int = 5,
                  learning_rate: float = 0.1,
-                 subsample: float = 0.8):
+                 subsample: float = 0.8,
+                 backend: str = "exact",
+                 n_iter_no_change: Optional[int] = None,
+                 validation_fraction: float = 0.1,
+                 max_bins: int = 255):
         """
         Initialize Gradient Boosting model.
         
         Args:
-            n_estimators: Number of boosting stages
+            n_estimators: Number of boosting stages (upper bound with early stopping)
             max_depth: Maximum depth of individual trees
             learning_rate: Shrinkage factor
-            subsample: Fraction of samples for each tree
+            subsample: Fraction of samples for each tree (exact backend)
+            backend: 'exact' or 'hist'
+            n_iter_no_change: Stop when the validation loss has not improved
+                              for this many stages (None = no early stopping)
+            validation_fraction: Share of the training data held out for
+                                 early stopping
+            max_bins: Feature bins for the hist backend (≤ 255)
         """
-        self.model = GradientBoostingRegressor(
-            n_estimators=n_estimators,
-            max_depth=max_depth,
-            learning_rate=learning_rate,
-            subsample=subsample,
-            min_samples_split=5,
-            min_samples_leaf=2,
-            random_state=42
-        )
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}'. Use one of {self.BACKENDS}")
+        
+        self.backend = backend
+        self.config = {
+            "backend": backend,
+            "n_estimators": n_estimators,
+            "max_depth": max_depth,
+            "learning_rate": learning_rate,
+            "n_iter_no_change": n_iter_no_change
+        }
+        
+        if backend == "hist":
+            self.config["max_bins"] = max_bins
+            self.model = HistGradientBoostingRegressor(
+                max_iter=n_estimators,
+                max_depth=max_depth,
+                learning_rate=learning_rate,
+                max_bins=max_bins,
+                early_stopping=n_iter_no_change is not None,
+                n_iter_no_change=n_iter_no_change or 10,
+                validation_fraction=validation_fraction,
+                random_state=42
+            )
+        else:
+            self.config["subsample"] = subsample
+            self.model = GradientBoostingRegressor(
+                n_estimators=n_estimators,
+                max_depth=max_depth,
+                learning_rate=learning_rate,
+                subsample=subsample,
+                min_samples_split=5,
+                min_samples_leaf=2,
+                n_iter_no_change=n_iter_no_change,
+                validation_fraction=validation_fraction,
+                random_state=42
+            )
         self.feature_names = [
             "temperature_lag1", "temperature_lag2",
             "humidity", "pressure", "wind_speed",
@@ -84,82 +136,208 @@ class WeatherGradientBoosting:
         ]
         self.is_trained = False
         
-    def train(self, X: np.ndarray, y: np.ndarray) -> Dict[str, Any]:
+    def train(self, 
+              X: np.ndarray, 
+              y: np.ndarray,
+              validation: str = "holdout",
+              n_folds: int = 5,
+              curve_every: int = 0,
+              gap: int = 0,
+              window: Optional[int] = None) -> Dict[str, Any]:
         """
         Train the Gradient Boosting model.
         
         Args:
             X: Training features
             y: Training targets
+            validation: 'none', 'holdout', 'kfold' or a time-series
+                        split ('blocked', 'expanding', 'rolling')
+            n_folds: Number of folds / origins
+            curve_every: Stages between learning-curve checkpoints
+                         (0 = no staged curve, the default: the curve
+                         costs an extra staged_predict pass; the
+                         per-stage losses are always in learning_curve)
+            gap: Rows left out between training and test data
+                 (time-series methods)
+            window: Training window for 'rolling'
             
         Returns:
             Training metrics
         """
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
-        
-        self.model.fit(X_train, y_train)
+        fit = fit_and_validate(self.model, X, y, validation, n_folds, gap=gap, window=window)
+        self.model = fit["model"]
+        self._engine = tree_engine.compile_model(self.model)
         self.is_trained = True
+        X_train, y_train = fit["X_train"], fit["y_train"]
+        X_test, y_test = fit["X_test"], fit["y_test"]
         
-        # Cross-validation
-        cv_scores = cross_val_score(
-            self.model, X, y,
-            cv=5,
-            scoring='neg_mean_absolute_error'
-        )
+        staged_curve = None
+        if curve_every > 0:
+            staged_curve, y_pred = self.staged_curve(X_train, y_train, X_test, y_test, curve_every)
+        elif X_test is not None:
+            y_pred = self.model.predict(X_test)
         
-        # Test predictions
-        y_pred = self.model.predict(X_test)
-        
-        # Staged predictions for learning curve
-        train_scores = []
-        test_scores = []
-        for i, y_pred_staged in enumerate(self.model.staged_predict(X_test)):
-            if i % 10 == 0:
-                test_scores.append(float(mean_squared_error(y_test, y_pred_staged)))
+        test_metrics = None
+        if X_test is not None:
+            test_metrics = {
+                "mae": float(mean_absolute_error(y_test, y_pred)),
+                "rmse": float(np.sqrt(mean_squared_error(y_test, y_pred))),
+                "r2": float(r2_score(y_test, y_pred))
+            }
         
         # Feature importance
         n_features = min(X.shape[1], len(self.feature_names))
         feature_importance = dict(zip(
             self.feature_names[:n_features],
-            self.model.feature_importances_.tolist()
+            self.feature_importances().tolist()
         ))
         
         return {
             "n_samples": len(y),
             "n_features": X.shape[1],
-            "cross_validation": {
-                "cv_scores": (-cv_scores).tolist(),
-                "cv_mean": float(-cv_scores.mean()),
-                "cv_std": float(cv_scores.std())
-            },
-            "test_metrics": {
-                "mae": float(mean_absolute_error(y_test, y_pred)),
-                "rmse": float(np.sqrt(mean_squared_error(y_test, y_pred))),
-                "r2": float(r2_score(y_test, y_pred))
-            },
+            "cross_validation": fit["cross_validation"],
+            "test_metrics": test_metrics,
             "feature_importance": feature_importance,
-            "staged_test_mse": test_scores,
+            "stopping_iteration": self.n_stages,
+            "early_stopped": self.n_stages < self.config["n_estimators"],
+            "learning_curve": self.learning_curve(),
+            "staged_curve": staged_curve,
+            "staged_test_mse": staged_curve["test_mse"] if staged_curve else None,
             "train_score": float(self.model.score(X_train, y_train)),
             "oob_improvement": self.model.oob_improvement_.tolist()[-5:] if hasattr(self.model, 'oob_improvement_') else None
         }
     
+    @property
+    def n_stages(self) -> int:
+        """Boosting stages actually fitted (< n_estimators after early stopping)"""
+        if self.backend == "hist":
+            return int(self.model.n_iter_)
+        return int(self.model.n_estimators_)
+    
+    def learning_curve(self) -> Dict[str, Optional[List[float]]]:
+        """
+        Per-stage loss recorded during fitting.
+        
+        - exact: in-bag training loss of every stage (train_score_)
+        - hist:  training and early-stopping validation loss, starting
+                 with the baseline (stage 0); only recorded when early
+                 stopping is enabled
+        """
+        if self.backend == "hist":
+            if not len(self.model.validation_score_):
+                return {"train_loss": None, "validation_loss": None}
+            return {
+                "train_loss": (-self.model.train_score_).tolist(),
+                "validation_loss": (-self.model.validation_score_).tolist()
+            }
+        return {"train_loss": self.model.train_score_.tolist(), "validation_loss": None}
+    
+    def staged_curve(self,
+                     X_train: np.ndarray,
+                     y_train: np.ndarray,
+                     X_test: Optional[np.ndarray],
+                     y_test: Optional[np.ndarray],
+                     every: int = 10,
+                     max_train_rows: int = 10000) -> Tuple[Dict[str, Any], Optional[np.ndarray]]:
+        """
+        Train and test MSE at stages 1, 1+every, ..., n_stages.
+        
+        Both staged_predict generators advance together and only add the
+        newest tree to a running prediction, so the whole curve costs one
+        prediction per dataset; MSE is only computed at checkpoints. The
+        training curve uses a fixed random subset of at most
+        max_train_rows rows. The final test prediction is returned as
+        well, so test metrics need no extra predict.
+        
+        Returns:
+            (curve dict, final test predictions or None)
+        """
+        if len(y_train) > max_train_rows:
+            rows = np.random.RandomState(42).choice(len(y_train), max_train_rows, replace=False)
+            X_train, y_train = X_train[rows], y_train[rows]
+        
+        n_stages = self.n_stages
+        checkpoints = set(range(1, n_stages + 1, every)) | {n_stages}
+        staged_train = self.model.staged_predict(X_train)
+        staged_test = self.model.staged_predict(X_test) if X_test is not None else None
+        
+        stages, train_mse, test_mse = [], [], []
+        y_pred = None
+        for stage in range(1, n_stages + 1):
+            pred_train = next(staged_train)
+            pred_test = next(staged_test) if staged_test is not None else None
+            if stage in checkpoints:
+                stages.append(stage)
+                train_mse.append(float(mean_squared_error(y_train, pred_train)))
+                if pred_test is not None:
+                    test_mse.append(float(mean_squared_error(y_test, pred_test)))
+            y_pred = pred_test
+        
+        return {
+            "stages": stages,
+            "train_mse": train_mse,
+            "test_mse": test_mse if X_test is not None else None
+        }, y_pred
+    
+    def feature_importances(self) -> np.ndarray:
+        """
+        Impurity-based importances; for the hist backend, the total split
+        gain per feature over all trees, normalized to sum to 1 (zeros if
+        the private tree attributes are unavailable).
+        """
+        if self.backend != "hist":
+            return self.model.feature_importances_
+        importance = np.zeros(self.model.n_features_in_)
+        try:
+            for stage in self.model._predictors:
+                for predictor in stage:
+                    nodes = predictor.nodes[~predictor.nodes["is_leaf"].astype(bool)]
+                    np.add.at(importance, nodes["feature_idx"], nodes["gain"])
+        except (AttributeError, KeyError, ValueError):
+            return np.zeros(self.model.n_features_in_)
+        total = importance.sum()
+        return importance / total if total > 0 else importance
+    
+    @property
+    def engine(self) -> tree_engine.CompiledTrees:
+        """Flat-array inference engine (compiled on first use for stored models)"""
+        if getattr(self, "_engine", None) is None:
+            self._engine = tree_engine.compile_model(self.model)
+        return self._engine
+    
     def predict(self, X: np.ndarray) -> np.ndarray:
         """Make predictions"""
         if not self.is_trained:
             raise ValueError("Model must be trained first")
+        if tree_engine.use_engine(X):
+            return self.engine.predict(X)
         return self.model.predict(X)
 
 
-def train_and_predict(X_train: np.ndarray,
-                      y_train: np.ndarray,
-                      X_predict: Optional[np.ndarray] = None) -> Dict[str, Any]:
+def train_model(X_train: np.ndarray,
+                y_train: np.ndarray,
+                validation: str = "holdout",
+                n_folds: int = 5,
+                backend: str = "exact",
+                n_iter_no_change: Optional[int] = None,
+                curve_every: int = 0,
+                gap: int = 0,
+                window: Optional[int] = None) -> Tuple[WeatherGradientBoosting, Dict[str, Any]]:
     """
-    Train Gradient Boosting and optionally make predictions.
+    Train Gradient Boosting.
+    
+    Args:
+        backend: 'exact' or 'hist' (histogram-based, for large datasets)
+        n_iter_no_change: Early-stopping patience (None = fixed stages)
+        curve_every: Stages between learning-curve checkpoints (0 = off)
+        gap: Rows left out between training and test data (time-series methods)
+        window: Training window for 'rolling'
+    
+    Returns:
+        Fitted model and training results (without predictions)
     """
-    gb = WeatherGradientBoosting()
-    train_metrics = gb.train(X_train, y_train)
+    gb = WeatherGradientBoosting(backend=backend, n_iter_no_change=n_iter_no_change)
+    train_metrics = gb.train(X_train, y_train, validation, n_folds, curve_every, gap, window)
     
     result = {
         "algorithm": "Gradient Boosting",
@@ -171,18 +349,37 @@ def train_and_predict(X_train: np.ndarray,
             "pseudo_residuals": "r_im = -∂L(y_i, F(x_i))/∂F(x_i)",
             "squared_loss": "L(y, F) = ½(y - F)²"
         },
-        "model_config": {
-            "n_estimators": 100,
-            "max_depth": 5,
-            "learning_rate": 0.1,
-            "subsample": 0.8
-        },
+        "model_config": gb.config,
         "training_metrics": train_metrics
     }
     
+    return gb, result
+
+
+def predict_with_model(gb: WeatherGradientBoosting, X_predict: np.ndarray) -> List[float]:
+    """Predictions from a trained Gradient Boosting model"""
+    return gb.predict(X_predict).tolist()
+
+
+def train_and_predict(X_train: np.ndarray,
+                      y_train: np.ndarray,
+                      X_predict: Optional[np.ndarray] = None,
+                      validation: str = "holdout",
+                      n_folds: int = 5,
+                      backend: str = "exact",
+                      n_iter_no_change: Optional[int] = None,
+                      curve_every: int = 0,
+                      gap: int = 0,
+                      window: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Train Gradient Boosting and optionally make predictions.
+    """
+    gb, result = train_model(
+        X_train, y_train, validation, n_folds, backend, n_iter_no_change, curve_every, gap, window
+    )
+    
     if X_predict is not None:
-        predictions = gb.predict(X_predict)
-        result["predictions"] = predictions.tolist()
+        result["predictions"] = predict_with_model(gb, X_predict)
     
     return result
 
@@ -0,0 +1,192 @@
+"""
+==============================================
+NumPy LSTM Inference Engine
+محرك استدلال LSTM باستخدام NumPy
+
+Exports the weights of a trained Keras LSTM stack (LSTM, BatchNormalization,
+Dropout, Dense, RepeatVector, Flatten) and predicts with a vectorized
+float32 NumPy forward pass, so stored models can be served without
+importing TensorFlow.
+==============================================
+"""
+
+import json
+import numpy as np
+from typing import Any, Dict, List
+
+# Layers without inference-time effect
+_SKIPPED_LAYERS = ("Dropout", "InputLayer")
+
+_ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "tanh": np.tanh,
+    "sigmoid": lambda x: _sigmoid(x),
+}
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    # tanh form: stable for large |x| and one transcendental call
+    return 0.5 * (np.tanh(0.5 * x) + 1)
+
+
+def export_keras(model: Any, path: str):
+    """
+    Dump the inference weights of a Keras Sequential model to an .npz file.
+
+    Duck-typed on layer class names and get_weights()/get_config(), so
+    this module never imports TensorFlow.
+
+    Args:
+        model: Trained Keras model
+        path: Output file (.npz)
+    """
+    layers = []
+    arrays = {}
+    for layer in model.layers:
+        kind = type(layer).__name__
+        if kind in _SKIPPED_LAYERS:
+            continue
+        config = layer.get_config()
+        weights = layer.get_weights()
+        prefix = f"{len(layers)}_"
+        if kind == "LSTM":
+            for key, w in zip(("kernel", "recurrent_kernel", "bias"), weights):
+                arrays[prefix + key] = w
+            spec = {
+                "return_sequences": config["return_sequences"],
+                "activation": config["activation"],
+                "recurrent_activation": config["recurrent_activation"],
+            }
+        elif kind == "BatchNormalization":
+            for key, w in zip(("gamma", "beta", "moving_mean", "moving_variance"), weights):
+                arrays[prefix + key] = w
+            spec = {"epsilon": config["epsilon"]}
+        elif kind == "Dense":
+            arrays[prefix + "kernel"], arrays[prefix + "bias"] = weights
+            spec = {"activation": config["activation"]}
+        elif kind == "RepeatVector":
+            spec = {"n": config["n"]}
+        elif kind == "Flatten":
+            spec = {}
+        else:
+            raise ValueError(f"Layer type '{kind}' is not supported by the NumPy engine")
+        spec["type"] = kind
+        layers.append(spec)
+
+    input_shape = model.inputs[0].shape
+    np.savez(
+        path,
+        spec=np.array(json.dumps({"layers": layers, "input_shape": list(input_shape[1:])})),
+        **arrays
+    )
+
+
+class NumpyLSTM:
+    """
+    Float32 NumPy forward pass of an exported LSTM stack.
+
+    - LSTM: the input projection x_t · W for all timesteps is one matmul
+      ((N·T, F) × (F, 4U)); the time loop only does h_{t-1} · U and the
+      gate nonlinearities on (N, 4U) blocks (Keras gate order i, f, c, o)
+    - BatchNormalization: folded into the next LSTM/Dense weights
+      (W' = diag(s)·W, b' = b + t·W with s = γ/√(σ²+ε), t = β − s·μ), so it
+      costs nothing at inference
+    - Dropout: identity at inference
+    - RepeatVector / Flatten: seq2seq decoder input and output reshapes
+      (Dense on a sequence applies per step)
+    """
+
+    def __init__(self, layers: List[Dict[str, Any]], sequence_length: int, n_features: int):
+        self.layers = layers
+        self.sequence_length = sequence_length
+        self.n_features = n_features
+
+    @classmethod
+    def load(cls, path: str) -> "NumpyLSTM":
+        """Load an export_keras() file and fold BatchNormalization layers"""
+        with np.load(path, allow_pickle=False) as data:
+            spec = json.loads(str(data["spec"]))
+            arrays = {key: data[key].astype(np.float32) for key in data.files if key != "spec"}
+
+        layers = []
+        scale = shift = None  # pending BatchNormalization affine
+        for i, layer in enumerate(spec["layers"]):
+            w = {key[len(f"{i}_"):]: value for key, value in arrays.items() if key.startswith(f"{i}_")}
+            if layer["type"] == "BatchNormalization":
+                s = w["gamma"] / np.sqrt(w["moving_variance"] + np.float32(layer["epsilon"]))
+                t = w["beta"] - s * w["moving_mean"]
+                scale, shift = (s, t) if scale is None else (scale * s, shift * s + t)
+                continue
+            if layer["type"] == "RepeatVector":
+                # Commutes with the per-feature affine, which stays pending
+                layers.append(layer)
+                continue
+            if layer["type"] == "Flatten":
+                if scale is not None:
+                    layers.append({"type": "Affine", "scale": scale, "shift": shift})
+                    scale = shift = None
+                layers.append(layer)
+                continue
+
+            if scale is not None:
+                w["bias"] = w["bias"] + shift @ w["kernel"]
+                w["kernel"] = scale[:, None] * w["kernel"]
+                scale = shift = None
+            layers.append({**layer, **w})
+
+        if scale is not None:
+            layers.append({"type": "Affine", "scale": scale, "shift": shift})
+        sequence_length, n_features = spec["input_shape"]
+        return cls(layers, sequence_length, n_features)
+
+    @staticmethod
+    def _lstm(x: np.ndarray, layer: Dict[str, Any]) -> np.ndarray:
+        n, steps, _ = x.shape
+        units = layer["recurrent_kernel"].shape[0]
+        activation = _ACTIVATIONS[layer["activation"]]
+        recurrent_activation = _ACTIVATIONS[layer["recurrent_activation"]]
+
+        projected = (x.reshape(n * steps, -1) @ layer["kernel"] + layer["bias"]).reshape(n, steps, 4 * units)
+        h = np.zeros((n, units), dtype=np.float32)
+        c = np.zeros((n, units), dtype=np.float32)
+        outputs = np.empty((n, steps, units), dtype=np.float32) if layer["return_sequences"] else None
+        for t in range(steps):
+            z = projected[:, t] + h @ layer["recurrent_kernel"]
+            i = recurrent_activation(z[:, :units])
+            f = recurrent_activation(z[:, units:2 * units])
+            g = activation(z[:, 2 * units:3 * units])
+            o = recurrent_activation(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * activation(c)
+            if outputs is not None:
+                outputs[:, t] = h
+        return outputs if outputs is not None else h
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            X: Input sequences (n_samples, sequence_length, n_features)
+
+        Returns:
+            Predicted values (n_samples,) or (n_samples, n_outputs)
+        """
+        x = np.asarray(X, dtype=np.float32)
+        for layer in self.layers:
+            if layer["type"] == "LSTM":
+                x = self._lstm(x, layer)
+            elif layer["type"] == "Dense":
+                x = _ACTIVATIONS[layer["activation"]](x @ layer["kernel"] + layer["bias"])
+            elif layer["type"] == "RepeatVector":
+                x = np.repeat(x[:, None, :], layer["n"], axis=1)
+            elif layer["type"] == "Flatten":
+                x = x.reshape(len(x), -1)
+            else:
+                x = x * layer["scale"] + layer["shift"]
+        return x[:, 0] if x.ndim == 2 and x.shape[1] == 1 else x
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(
+            value.nbytes for layer in self.layers for value in layer.values() if isinstance(value, np.ndarray)
+        ))
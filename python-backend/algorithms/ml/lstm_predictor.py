@@ -8,21 +8,47 @@ Long Short-Term Memory. Neural Computation, 9(8), 1735-1780.
 ==============================================
 """
 
+import json
+import os
+import re
+import time
+
 import numpy as np
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import inspect
 
-# TensorFlow imports with error handling
+from services.model_registry import registry
+from services.state_store import MODEL_PATH
+from .lstm_engine import NumpyLSTM, export_keras
+
+# TensorFlow imports with error handling; LSTM_USE_TF=0 skips the import
+# so inference-only workers serve stored models with the NumPy engine
 try:
+    if os.getenv("LSTM_USE_TF", "1") == "0":
+        raise ImportError("TensorFlow disabled by LSTM_USE_TF=0")
     import tensorflow as tf
     from tensorflow.keras.models import Sequential
-    from tensorflow.keras.layers import LSTM, Dense, Dropout, BatchNormalization, Input
+    from tensorflow.keras.layers import (
+        LSTM, Dense, Dropout, BatchNormalization, Input, RepeatVector, Flatten
+    )
     from tensorflow.keras.callbacks import EarlyStopping
     from tensorflow.keras.optimizers import Adam
     HAS_TF = True
 except ImportError:
     HAS_TF = False
 
+# Stored models are model registry versions (directory format):
+# <MODEL_PATH>/registry/lstm/<model_id>/v<version>/{model.keras, weights.npz, config.json}
+REGISTRY_NAME = "lstm"
+
+# Output heads: one Dense over the whole horizon, or an LSTM decoder
+HEADS = ("direct", "seq2seq")
+
+# Rows per call of the inference function
+PREDICT_BATCH = 4096
+
+_ID_PATTERN = re.compile(r"^[A-Za-z0-9_\-]+$")
+
 
 class WeatherLSTM:
     """
@@ -65,30 +91,50 @@ class WeatherLSTM:
     - Handles variable-length sequences
     - Learns seasonal and cyclical patterns
     - Stacked architecture for hierarchical features
+    
+    Multi-Horizon Forecasting:
+    =========================
+    With horizon H > 1 one forward pass predicts ŷ_{t+1}, ..., ŷ_{t+H}
+    (output shape (samples, H)) instead of H recursive one-step calls:
+    - direct:  the encoder summary h_T feeds Dense(16) → Dense(H)
+    - seq2seq: h_T is repeated H times and decoded by an LSTM, with a
+               per-step Dense(16) → Dense(1) head, so each lead time has
+               its own recurrent state
     """
     
     def __init__(self, 
                  sequence_length: int = 24, 
                  n_features: int = 4,
-                 hidden_units: List[int] = [64, 32]):
+                 hidden_units: Optional[List[int]] = None,
+                 horizon: int = 1,
+                 head: str = "direct"):
         """
         Initialize LSTM model.
         
         Args:
             sequence_length: Length of input sequences (e.g., 24 hours)
             n_features: Number of input features
-            hidden_units: List of hidden units per LSTM layer
+            hidden_units: List of hidden units per LSTM layer (default [64, 32])
+            horizon: Steps predicted per sequence (e.g., 168 for 7 days hourly)
+            head: 'direct' or 'seq2seq'
         """
+        if head not in HEADS:
+            raise ValueError(f"Unknown head '{head}'. Use one of {HEADS}")
         self.sequence_length = sequence_length
         self.n_features = n_features
-        self.hidden_units = hidden_units
+        self.hidden_units = list(hidden_units) if hidden_units is not None else [64, 32]
+        self.horizon = horizon
+        self.head = head
+        self.is_trained = False
+        self._predict_fn = None
+        self.engine = None
         
         if HAS_TF:
             self.model = self._build_model()
         else:
             self.model = None
         
-    def _build_model(self) -> Sequential:
+    def _build_model(self) -> "Sequential":
         """
         Build LSTM architecture.
         
@@ -98,9 +144,29 @@ class WeatherLSTM:
         - BatchNormalization + Dropout(0.2)
         - LSTM(32)
         - BatchNormalization + Dropout(0.2)
-        - Dense(16, relu)
-        - Dense(1)
+        - direct:  Dense(16, relu) → Dense(horizon)
+        - seq2seq: RepeatVector(horizon) → LSTM(32, return_sequences=True)
+                   → Dense(16, relu) → Dense(1) per step → Flatten
         """
+        if self.head == "seq2seq":
+            head = [
+                RepeatVector(self.horizon),
+                LSTM(
+                    units=self.hidden_units[1],
+                    return_sequences=True,
+                    activation='tanh',
+                    recurrent_activation='sigmoid'
+                ),
+                Dense(16, activation='relu'),
+                Dense(1),
+                Flatten()
+            ]
+        else:
+            head = [
+                Dense(16, activation='relu'),
+                Dense(self.horizon)
+            ]
+        
         model = Sequential([
             Input(shape=(self.sequence_length, self.n_features)),
             
@@ -124,9 +190,8 @@ class WeatherLSTM:
             BatchNormalization(),
             Dropout(0.2),
             
-            # Dense layers for final prediction
-            Dense(16, activation='relu'),
-            Dense(1)
+            # Output head for final prediction
+            *head
         ])
         
         model.compile(
@@ -147,7 +212,7 @@ class WeatherLSTM:
         
         Args:
             X: Training sequences (n_samples, sequence_length, n_features)
-            y: Target values (n_samples,)
+            y: Target values (n_samples,) or (n_samples, horizon)
             epochs: Maximum training epochs
             batch_size: Training batch size
             
@@ -157,6 +222,132 @@ class WeatherLSTM:
         if not HAS_TF:
             return self._simulate_training(X, y, epochs)
         
+        metrics = self._fit(epochs, x=X, y=y, batch_size=batch_size, validation_split=0.2)
+        self.is_trained = True
+        return metrics
+    
+    def train_from_series(self,
+                          series: np.ndarray,
+                          epochs: int = 50,
+                          batch_size: int = 32,
+                          target_column: int = 0,
+                          validation_fraction: float = 0.2,
+                          cache_file: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Train on a flat series, windowing it lazily with tf.data.
+        
+        Window i is series[i:i+sequence_length] and its targets are the
+        next horizon values of target_column. Input and target windows are
+        gathered per batch by timeseries_dataset_from_array (prefetched,
+        identically shuffled), so only the flat series is held in memory
+        instead of the (n, sequence_length, n_features) window tensor -
+        about sequence_length times less. A read-only np.memmap works as
+        input.
+        
+        The last validation_fraction of the windows is the validation set,
+        as with validation_split in train().
+        
+        Args:
+            series: (n,) or (n, n_features) array in time order
+            epochs: Maximum training epochs
+            batch_size: Training batch size
+            target_column: Feature predicted one step ahead
+            validation_fraction: Share of (latest) windows for validation
+            cache_file: Optional file to cache the windowed batches on disk
+                        after the first epoch (an in-memory cache would
+                        materialize the windows again)
+            
+        Returns:
+            Training metrics
+        """
+        if not HAS_TF:
+            raise ValueError("Series training requires TensorFlow")
+        series = np.asarray(series, dtype=np.float32)
+        if series.ndim == 1:
+            series = series.reshape(-1, 1)
+        if series.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {series.shape[1]}")
+        
+        n_windows = len(series) - self.sequence_length - self.horizon + 1
+        n_train = int(n_windows * (1 - validation_fraction))
+        if n_train < 1 or n_train >= n_windows:
+            raise ValueError(
+                f"Series of length {len(series)} is too short for sequence_length "
+                f"{self.sequence_length} and horizon {self.horizon}"
+            )
+        
+        # Target window i = targets[i:i+horizon] belongs to the input window
+        # starting at i; slices are views
+        inputs = series[:len(series) - self.horizon]
+        targets = series[self.sequence_length:, target_column]
+        
+        def windows(start: int, end: int, shuffle: bool):
+            """Windows starting at positions start..end-1"""
+            x = tf.keras.utils.timeseries_dataset_from_array(
+                inputs[start:end + self.sequence_length - 1], None, self.sequence_length,
+                batch_size=batch_size, shuffle=shuffle, seed=42
+            )
+            y = tf.keras.utils.timeseries_dataset_from_array(
+                targets[start:end + self.horizon - 1], None, self.horizon,
+                batch_size=batch_size, shuffle=shuffle, seed=42
+            )
+            return tf.data.Dataset.zip((x, y))
+        
+        train_ds = windows(0, n_train, True)
+        if cache_file:
+            train_ds = train_ds.cache(cache_file)
+        train_ds = train_ds.prefetch(tf.data.AUTOTUNE)
+        val_ds = windows(n_train, n_windows, False)
+        
+        metrics = self._fit(epochs, x=train_ds, validation_data=val_ds)
+        metrics["pipeline"] = {
+            "windows": n_windows,
+            "train_windows": n_train,
+            "series_bytes": int(series.nbytes),
+            "materialized_window_bytes": int(n_windows * self.sequence_length * self.n_features * 4)
+        }
+        self.is_trained = True
+        return metrics
+    
+    def fine_tune(self,
+                  X: np.ndarray,
+                  y: np.ndarray,
+                  epochs: int = 10,
+                  batch_size: int = 32,
+                  learning_rate: float = 1e-4) -> Dict[str, Any]:
+        """
+        Warm start: continue training the current weights on new sequences.
+        
+        The optimizer state is kept and the learning rate lowered, so new
+        data adjusts the model instead of retraining it from scratch.
+        
+        Args:
+            X: New sequences (n_samples, sequence_length, n_features)
+            y: New targets (n_samples,)
+            epochs: Maximum fine-tuning epochs
+            batch_size: Training batch size
+            learning_rate: Fine-tuning learning rate
+            
+        Returns:
+            Training metrics
+        """
+        if not HAS_TF or self.model is None:
+            raise ValueError("Fine-tuning requires TensorFlow")
+        if X.shape[1:] != (self.sequence_length, self.n_features):
+            raise ValueError(
+                f"Expected sequences of shape {(self.sequence_length, self.n_features)}, got {X.shape[1:]}"
+            )
+        if (y.shape[1] if y.ndim == 2 else 1) != self.horizon:
+            raise ValueError(f"Expected targets for a horizon of {self.horizon}")
+        
+        self.model.optimizer.learning_rate.assign(learning_rate)
+        metrics = self._fit(epochs, x=X, y=y, batch_size=batch_size, validation_split=0.2)
+        metrics.update({"warm_start": True, "learning_rate": learning_rate})
+        self.is_trained = True
+        return metrics
+    
+    def _fit(self, epochs: int, **data) -> Dict[str, Any]:
+        """Keras fit with early stopping on the validation loss (data: fit kwargs)"""
         # Early stopping to prevent overfitting
         early_stop = EarlyStopping(
             monitor='val_loss',
@@ -167,12 +358,10 @@ class WeatherLSTM:
         
         # Train model
         history = self.model.fit(
-            X, y,
             epochs=epochs,
-            batch_size=batch_size,
-            validation_split=0.2,
             callbacks=[early_stop],
-            verbose=0
+            verbose=0,
+            **data
         )
         
         return {
@@ -216,18 +405,109 @@ class WeatherLSTM:
             X: Input sequences (n_samples, sequence_length, n_features)
             
         Returns:
-            Predicted values
+            Predicted values (n_samples,), or (n_samples, horizon) for
+            multi-horizon models
         """
         if not HAS_TF or self.model is None:
+            if getattr(self, "engine", None) is not None:
+                return self.engine.predict(X)
             # Return simulated predictions
             return np.mean(X[:, -1, :], axis=1)
         
-        return self.model.predict(X, verbose=0).flatten()
+        X = np.asarray(X, dtype=np.float32)
+        if len(X) == 0:
+            return np.empty((0,) if self.horizon == 1 else (0, self.horizon), dtype=np.float32)
+        outputs = np.concatenate([
+            self.inference_fn(X[start:start + PREDICT_BATCH]).numpy()
+            for start in range(0, len(X), PREDICT_BATCH)
+        ])
+        # (samples,) for one-step models, (samples, horizon) otherwise
+        return outputs[:, 0] if self.horizon == 1 else outputs
+    
+    @property
+    def inference_fn(self):
+        """
+        Forward pass as a tf.function with a fixed input signature.
+        
+        Traced once (batch dimension left open) and reused by every
+        predict call, avoiding model.predict's per-call setup of a data
+        adapter and predict loop.
+        """
+        if getattr(self, "_predict_fn", None) is None:
+            model = self.model
+            self._predict_fn = tf.function(
+                lambda x: model(x, training=False),
+                input_signature=[
+                    tf.TensorSpec([None, self.sequence_length, self.n_features], tf.float32)
+                ]
+            )
+        return self._predict_fn
+    
+    def export_weights(self, path: str):
+        """Dump the inference weights for the NumPy engine (lstm_engine)"""
+        if not HAS_TF or self.model is None:
+            raise ValueError("Exporting requires a trained TensorFlow model")
+        export_keras(self.model, path)
+    
+    def save(self, path: str):
+        """
+        Save the Keras model (with optimizer state), its NumPy engine
+        weights and the configuration to a directory.
+        """
+        if not HAS_TF or self.model is None:
+            raise ValueError("Saving requires TensorFlow")
+        os.makedirs(path, exist_ok=True)
+        self.model.save(os.path.join(path, "model.keras"))
+        self.export_weights(os.path.join(path, "weights.npz"))
+        with open(os.path.join(path, "config.json"), "w") as f:
+            json.dump({
+                "sequence_length": self.sequence_length,
+                "n_features": self.n_features,
+                "hidden_units": list(self.hidden_units),
+                "horizon": self.horizon,
+                "head": self.head
+            }, f)
+    
+    @classmethod
+    def load(cls, path: str) -> "WeatherLSTM":
+        """
+        Load a model saved with save().
+        
+        Without TensorFlow only the NumPy engine is loaded (prediction
+        only; fine-tuning needs TensorFlow).
+        """
+        with open(os.path.join(path, "config.json")) as f:
+            config = json.load(f)
+        lstm = cls(
+            config["sequence_length"], config["n_features"], config["hidden_units"],
+            config.get("horizon", 1), config.get("head", "direct")
+        )
+        if HAS_TF:
+            lstm.model = tf.keras.models.load_model(os.path.join(path, "model.keras"))
+        else:
+            lstm.engine = NumpyLSTM.load(os.path.join(path, "weights.npz"))
+        lstm.is_trained = True
+        return lstm
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_predict_fn"] = None
+        return state
     
     def get_architecture(self) -> Dict[str, Any]:
         """Get model architecture details"""
+        if self.head == "seq2seq":
+            head = [
+                f"RepeatVector({self.horizon})",
+                f"LSTM({self.hidden_units[1]}, return_sequences=True)",
+                "Dense(16, relu)",
+                "Dense(1)",
+                "Flatten()"
+            ]
+        else:
+            head = ["Dense(16, relu)", f"Dense({self.horizon})"]
         return {
-            "type": "Stacked LSTM",
+            "type": "Stacked LSTM" if self.head == "direct" else "Seq2Seq LSTM",
             "layers": [
                 f"LSTM({self.hidden_units[0]}, return_sequences=True)",
                 "BatchNormalization()",
@@ -235,16 +515,135 @@ class WeatherLSTM:
                 f"LSTM({self.hidden_units[1]})",
                 "BatchNormalization()",
                 "Dropout(0.2)",
-                "Dense(16, relu)",
-                "Dense(1)"
+                *head
             ],
             "input_shape": (self.sequence_length, self.n_features),
+            "output_shape": (self.horizon,),
+            "head": self.head,
             "total_params": self.model.count_params() if HAS_TF and self.model else "N/A",
+            "inference": "tf.function" if HAS_TF and self.model else (
+                "numpy" if getattr(self, "engine", None) is not None else "simulated"
+            ),
             "optimizer": "Adam(lr=0.001)",
             "loss": "MSE"
         }
 
 
+def _as_sequences(X: np.ndarray) -> np.ndarray:
+    """Ensure proper shape for LSTM [samples, timesteps, features]"""
+    if len(X.shape) == 2:
+        return X.reshape((X.shape[0], X.shape[1], 1))
+    return X
+
+
+def _warm_up(lstm: WeatherLSTM):
+    """Trace the inference function now rather than on the first request"""
+    lstm.predict(np.zeros((1, lstm.sequence_length, lstm.n_features), dtype=np.float32))
+
+
+def _load_version(path: str) -> WeatherLSTM:
+    lstm = WeatherLSTM.load(path)
+    _warm_up(lstm)
+    return lstm
+
+
+registry.add_format(REGISTRY_NAME, WeatherLSTM.save, _load_version)
+
+
+def save_model(lstm: WeatherLSTM,
+               model_id: Optional[str] = None,
+               metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Store a trained model in the model registry.
+    
+    Reusing a model_id adds a version instead of overwriting; the stored
+    instance stays in the registry's in-memory LRU for serving.
+    
+    Returns:
+        Registry record (model_id, version and metadata)
+    """
+    record = registry.register(REGISTRY_NAME, lstm, {
+        "sequence_length": lstm.sequence_length,
+        "n_features": lstm.n_features,
+        "horizon": lstm.horizon,
+        "head": lstm.head,
+        **(metadata or {})
+    }, model_id)
+    _warm_up(lstm)
+    return record
+
+
+def load_model(model_id: str,
+               version: Optional[int] = None,
+               cached: bool = True) -> Tuple[WeatherLSTM, int]:
+    """
+    Load a stored model version (latest when version is None).
+    
+    With cached=True the in-memory instance is shared (serving);
+    cached=False returns a private copy from disk (fine-tuning).
+    
+    Raises:
+        KeyError: unknown model or version
+        ValueError: malformed model id
+    """
+    return registry.load(REGISTRY_NAME, model_id, version, cached)
+
+
+def _save_trained(lstm: WeatherLSTM,
+                  request: dict,
+                  n_samples: int,
+                  train_metrics: Dict[str, Any],
+                  base: Optional[Tuple[str, int]] = None) -> Dict[str, Any]:
+    """
+    Register a trained or fine-tuned model with its lineage.
+    
+    A fine-tuned model defaults to a new version of its base model; the
+    lineage lists the earlier versions of the same model id it descends from.
+    """
+    model_id = request.get("model_id") or (base[0] if base else None)
+    metadata = {"n_samples": n_samples, "operation": "train", "lineage": []}
+    if base:
+        parent = registry.metadata(REGISTRY_NAME, base[0], base[1])
+        metadata.update({
+            "operation": "fine-tune",
+            "parent_model_id": base[0],
+            "parent_version": base[1],
+            "lineage": parent.get("lineage", []) + [base[1]] if model_id == base[0] else []
+        })
+    metadata["training_metrics"] = train_metrics
+    return save_model(lstm, model_id, metadata)
+
+
+def predict_stored(model_id: str,
+                   X_predict: np.ndarray,
+                   version: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Predict with a stored model (loaded once, then served from memory).
+    
+    Args:
+        X_predict: (n, sequence_length, n_features) sequences, or
+                   (n, sequence_length) for single-feature models
+    
+    Raises:
+        ValueError: sequences that do not match the stored model
+    """
+    lstm, version = load_model(model_id, version)
+    X_predict = _as_sequences(np.asarray(X_predict, dtype=np.float32))
+    expected = (lstm.sequence_length, lstm.n_features)
+    if X_predict.ndim != 3 or X_predict.shape[1:] != expected:
+        raise ValueError(
+            f"Model '{model_id}' expects sequences of shape {expected}, got {X_predict.shape[1:]}"
+        )
+    start = time.perf_counter()
+    predictions = lstm.predict(X_predict)
+    return {
+        "model_id": model_id,
+        "model_version": version,
+        "predictions": predictions.tolist(),
+        "inference_ms": round((time.perf_counter() - start) * 1000, 3)
+    }
+
+
 def train_and_predict(request: dict) -> Dict[str, Any]:
     """
     Train LSTM and make predictions.
@@ -252,9 +651,17 @@ def train_and_predict(request: dict) -> Dict[str, Any]:
     Args:
         request: Dictionary containing:
             - X_train: Training sequences
-            - y_train: Training targets
+            - y_train: Training targets, (n,) or (n, horizon) for a
+              multi-horizon forecast
             - X_predict: Optional prediction sequences
             - epochs: Training epochs (default 50)
+            - head: Multi-horizon head, 'direct' or 'seq2seq'
+            - base_model_id / base_version: Optional stored model
+              (latest version by default) to fine-tune instead of
+              training from scratch
+            - save_model: Store the trained model (default False)
+            - model_id: Id to store it under (default: base_model_id
+              when fine-tuning, else a new id)
             
     Returns:
         Complete training and prediction results
@@ -268,18 +675,24 @@ def train_and_predict(request: dict) -> Dict[str, Any]:
     y_train = np.array(request.get("y_train", []))
     epochs = request.get("epochs", 50)
     
-    # Ensure proper shape for LSTM [samples, timesteps, features]
-    if len(X_train.shape) == 2:
-        X_train = X_train.reshape((X_train.shape[0], X_train.shape[1], 1))
+    X_train = _as_sequences(X_train)
     
-    # Initialize model
-    lstm = WeatherLSTM(
-        sequence_length=X_train.shape[1],
-        n_features=X_train.shape[2]
-    )
-    
-    # Train
-    train_metrics = lstm.train(X_train, y_train, epochs)
+    base_model_id = request.get("base_model_id")
+    if base_model_id:
+        # Private copy, so the served instance is not modified while tuning
+        lstm, base_version = load_model(base_model_id, request.get("base_version"), cached=False)
+        train_metrics = lstm.fine_tune(X_train, y_train, epochs)
+    else:
+        # Initialize model
+        lstm = WeatherLSTM(
+            sequence_length=X_train.shape[1],
+            n_features=X_train.shape[2],
+            horizon=y_train.shape[1] if y_train.ndim == 2 else 1,
+            head=request.get("head") or "direct"
+        )
+        
+        # Train
+        train_metrics = lstm.train(X_train, y_train, epochs)
     
     # Build result
     result = {
@@ -304,18 +717,105 @@ def train_and_predict(request: dict) -> Dict[str, Any]:
         }
     }
     
+    if base_model_id:
+        result["base_model_id"] = base_model_id
+        result["base_version"] = base_version
+    if request.get("save_model"):
+        record = _save_trained(
+            lstm, request, int(X_train.shape[0]), train_metrics,
+            (base_model_id, base_version) if base_model_id else None
+        )
+        result["model_id"] = record["model_id"]
+        result["model_version"] = record["version"]
+    
     # Make predictions if requested
-    if "X_predict" in request:
-        X_predict = np.array(request["X_predict"])
-        if len(X_predict.shape) == 2:
-            X_predict = X_predict.reshape((X_predict.shape[0], X_predict.shape[1], 1))
-        
+    if request.get("X_predict") is not None:
+        X_predict = _as_sequences(np.array(request["X_predict"]))
         predictions = lstm.predict(X_predict)
         result["predictions"] = predictions.tolist()
     
     return result
 
 
+def series_path(name: str) -> str:
+    """Path of a stored series; ValueError for a malformed name"""
+    if not _ID_PATTERN.match(name):
+        raise ValueError(f"Invalid series name '{name}' (letters, digits, '_' and '-' only)")
+    return os.path.join(MODEL_PATH, "series", f"{name}.npy")
+
+
+def load_series(name: str) -> np.ndarray:
+    """
+    Memory-map a stored series (<MODEL_PATH>/series/<name>.npy) read-only.
+    
+    Raises:
+        ValueError: malformed name
+        KeyError: no such series
+    """
+    path = series_path(name)
+    if not os.path.exists(path):
+        raise KeyError(name)
+    return np.load(path, mmap_mode="r")
+
+
+def train_from_series(request: dict) -> Dict[str, Any]:
+    """
+    Train LSTM on a flat series with lazily built windows.
+    
+    Args:
+        request: Dictionary containing:
+            - series: (n,) or (n, n_features) series in time order, or
+            - series_name: stored .npy series, memory-mapped
+            - sequence_length: Window length (default 24)
+            - target_column: Feature to predict (default 0)
+            - horizon, head: Steps predicted per window (default 1) and
+              multi-horizon head ('direct' or 'seq2seq')
+            - epochs, batch_size: Training settings
+            - save_model / model_id: Store the trained model
+            
+    Returns:
+        Training results
+    """
+    if request.get("series_name"):
+        series = load_series(request["series_name"])
+    else:
+        series = np.asarray(request.get("series", []), dtype=np.float32)
+    n_features = 1 if series.ndim == 1 else series.shape[1]
+    
+    lstm = WeatherLSTM(
+        sequence_length=request.get("sequence_length", 24),
+        n_features=n_features,
+        horizon=request.get("horizon", 1),
+        head=request.get("head") or "direct"
+    )
+    train_metrics = lstm.train_from_series(
+        series,
+        epochs=request.get("epochs", 50),
+        batch_size=request.get("batch_size", 32),
+        target_column=request.get("target_column", 0)
+    )
+    
+    result = {
+        "algorithm": "LSTM Neural Network",
+        "library": "TensorFlow/Keras (tf.data)",
+        "reference": "Hochreiter & Schmidhuber (1997). Long Short-Term Memory",
+        "architecture": lstm.get_architecture(),
+        "training_metrics": train_metrics,
+        "input_shape": {
+            "series_length": len(series),
+            "sequence_length": lstm.sequence_length,
+            "features": n_features,
+            "horizon": lstm.horizon
+        }
+    }
+    if request.get("save_model"):
+        n_windows = train_metrics.get("pipeline", {}).get("windows", len(series))
+        record = _save_trained(lstm, request, int(n_windows), train_metrics)
+        result["model_id"] = record["model_id"]
+        result["model_version"] = record["version"]
+    return result
+
+
 def get_source_code() -> str:
     """Return the source code of the WeatherLSTM class"""
     return inspect.getsource(WeatherLSTM)
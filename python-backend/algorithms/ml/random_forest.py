@@ -9,12 +9,16 @@ Machine Learning, 45(1), 5-32.
 """
 
 import numpy as np
+from scipy import sparse
+from scipy.stats import norm
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import cross_val_score, train_test_split
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import inspect
 
+from . import tree_engine
+from .validation import fit_and_validate
+
 
 class WeatherRandomForest:
     """
@@ -86,40 +90,47 @@ class WeatherRandomForest:
         ]
         self.is_trained = False
         
-    def train(self, X: np.ndarray, y: np.ndarray) -> Dict[str, Any]:
+    def train(self, 
+              X: np.ndarray, 
+              y: np.ndarray,
+              validation: str = "holdout",
+              n_folds: int = 5,
+              gap: int = 0,
+              window: Optional[int] = None) -> Dict[str, Any]:
         """
         Train the Random Forest model.
         
         Args:
             X: Training features (n_samples, n_features)
             y: Training targets (n_samples,)
+            validation: 'none', 'holdout', 'kfold' or a time-series
+                        split ('blocked', 'expanding', 'rolling')
+            n_folds: Number of folds / origins
+            gap: Rows left out between training and test data
+                 (time-series methods)
+            window: Training window for 'rolling'
             
         Returns:
             Dictionary with training metrics
         """
-        # Split data for evaluation
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
-        
-        # Train model
-        self.model.fit(X_train, y_train)
+        # Fit with the requested validation (kfold reuses fold 0 as holdout)
+        fit = fit_and_validate(self.model, X, y, validation, n_folds, gap=gap, window=window)
+        self.model = fit["model"]
+        self._engine = tree_engine.compile_model(self.model)
         self.is_trained = True
+        self._build_leaf_index(fit["X_train"], fit["y_train"])
+        X_test, y_test = fit["X_test"], fit["y_test"]
         
-        # Cross-validation scores
-        cv_scores = cross_val_score(
-            self.model, X, y, 
-            cv=5, 
-            scoring='neg_mean_absolute_error'
-        )
-        
-        # Predictions on test set
-        y_pred = self.model.predict(X_test)
-        
-        # Calculate metrics
-        mae = mean_absolute_error(y_test, y_pred)
-        rmse = np.sqrt(mean_squared_error(y_test, y_pred))
-        r2 = r2_score(y_test, y_pred)
+        # Metrics on held-out data
+        test_metrics = None
+        if X_test is not None:
+            y_pred = self.model.predict(X_test)
+            test_metrics = {
+                "mae": float(mean_absolute_error(y_test, y_pred)),
+                "rmse": float(np.sqrt(mean_squared_error(y_test, y_pred))),
+                "r2": float(r2_score(y_test, y_pred)),
+                "mape": float(np.mean(np.abs((y_test - y_pred) / y_test)) * 100) if np.all(y_test != 0) else None
+            }
         
         # Feature importance
         n_features = min(X.shape[1], len(self.feature_names))
@@ -131,17 +142,8 @@ class WeatherRandomForest:
         return {
             "n_samples": len(y),
             "n_features": X.shape[1],
-            "cross_validation": {
-                "cv_scores": (-cv_scores).tolist(),
-                "cv_mean": float(-cv_scores.mean()),
-                "cv_std": float(cv_scores.std())
-            },
-            "test_metrics": {
-                "mae": float(mae),
-                "rmse": float(rmse),
-                "r2": float(r2),
-                "mape": float(np.mean(np.abs((y_test - y_pred) / y_test)) * 100) if np.all(y_test != 0) else None
-            },
+            "cross_validation": fit["cross_validation"],
+            "test_metrics": test_metrics,
             "oob_score": float(self.model.oob_score_),
             "feature_importance": feature_importance,
             "model_params": {
@@ -163,57 +165,169 @@ class WeatherRandomForest:
         """
         if not self.is_trained:
             raise ValueError("Model must be trained first")
+        if tree_engine.use_engine(X):
+            return self.engine.predict(X)
         return self.model.predict(X)
     
-    def predict_with_uncertainty(self, X: np.ndarray) -> Dict[str, np.ndarray]:
+    @property
+    def engine(self) -> tree_engine.CompiledTrees:
+        """Flat-array inference engine (compiled on first use for stored models)"""
+        if getattr(self, "_engine", None) is None:
+            self._engine = tree_engine.compile_model(self.model)
+        return self._engine
+    
+    def _leaves(self, X: np.ndarray) -> np.ndarray:
+        """Global leaf ids (n_samples, n_trees) in the engine's node numbering"""
+        if tree_engine.use_engine(X):
+            return self.engine.apply(X)
+        return self.model.apply(X) + self.engine.roots
+    
+    def _build_leaf_index(self, X_train: np.ndarray, y_train: np.ndarray, n_bins: int = 256):
+        """
+        Index the training targets by leaf for quantile intervals.
+        
+        Node ids are those of the compiled engine (tree t's node k lives
+        at engine.roots[t] + k, leaf outputs in engine.value).
+        
+        - _leaf_bins: sparse (total_nodes, n_bins) histogram of the training
+          targets in each leaf, each leaf summing to 1, over quantile bins
+          of y_train (_bin_edges); with n_train ≤ n_bins every sample
+          gets its own bin
+        """
+        total_nodes = self.engine.n_nodes
+        n_trees = self.engine.n_trees
+        
+        y_train = np.asarray(y_train, dtype=float)
+        n_bins = min(n_bins, len(y_train))
+        self._bin_edges = np.quantile(y_train, np.linspace(0, 1, n_bins + 1))
+        bins = np.clip(np.searchsorted(self._bin_edges, y_train, side="right") - 1, 0, n_bins - 1)
+        
+        leaves = self._leaves(X_train).ravel()
+        leaf_size = np.bincount(leaves, minlength=total_nodes)
+        self._leaf_bins = sparse.csr_matrix(
+            (1.0 / leaf_size[leaves], (leaves, np.repeat(bins, n_trees))),
+            shape=(total_nodes, n_bins)
+        )
+    
+    def _weighted_quantiles(self, leaves: np.ndarray, quantiles: Tuple[float, ...]) -> np.ndarray:
+        """
+        Quantile Regression Forest (Meinshausen, 2006).
+        
+        w_i(x) = (1/T) Σ_t 1[leaf_t(x_i) = leaf_t(x)] / |leaf_t(x)|
+        F(y|x) = Σ_i w_i(x) 1[y_i ≤ y]
+        
+        Leaf co-occupancy is one sparse product with the leaf histograms,
+        giving F over the target bins for every row at once; quantiles
+        are interpolated linearly inside the bin where F crosses q.
+        """
+        n_rows, n_trees = leaves.shape
+        occupancy = sparse.csr_matrix(
+            (np.full(leaves.size, 1.0 / n_trees), (np.repeat(np.arange(n_rows), n_trees), leaves.ravel())),
+            shape=(n_rows, self._leaf_bins.shape[0])
+        )
+        mass = (occupancy @ self._leaf_bins).toarray()
+        cdf = np.cumsum(mass, axis=1)
+        rows = np.arange(n_rows)
+        
+        result = np.empty((len(quantiles), n_rows))
+        for i, q in enumerate(quantiles):
+            target = q * cdf[:, -1]
+            b = np.minimum((cdf < target[:, None] - 1e-12).sum(axis=1), mass.shape[1] - 1)
+            below = cdf[rows, b] - mass[rows, b]
+            frac = np.clip((target - below) / np.maximum(mass[rows, b], 1e-300), 0.0, 1.0)
+            result[i] = self._bin_edges[b] + frac * (self._bin_edges[b + 1] - self._bin_edges[b])
+        return result
+    
+    def predict_with_uncertainty(self, 
+                                 X: np.ndarray,
+                                 interval: str = "quantile",
+                                 alpha: float = 0.05,
+                                 chunk_size: int = 10000) -> Dict[str, np.ndarray]:
         """
         Make predictions with uncertainty estimates.
         
-        Uses predictions from individual trees to estimate uncertainty.
+        All trees are evaluated in one pass: the compiled engine (or
+        apply() for large grids) returns the leaf of every (sample, tree)
+        pair and the per-tree predictions are a single gather from the
+        flattened leaf values. Rows are processed in chunks to bound
+        memory on large grids.
+        
+        Intervals:
+        - quantile: [α/2, 1-α/2] quantiles of the Quantile Regression
+          Forest distribution (leaf co-occupancy weights over training
+          targets); asymmetric and not tied to a normal assumption.
+          Chunks of 10^4 rows keep the dense bin CDF around 20 MB
+        - normal:   mean ± z·std of the per-tree predictions
         
         Args:
             X: Features for prediction
+            interval: 'quantile' or 'normal'
+            alpha: Miscoverage level (0.05 → 95% interval)
+            chunk_size: Rows per vectorized chunk
             
         Returns:
             Dictionary with predictions and uncertainty
         """
         if not self.is_trained:
             raise ValueError("Model must be trained first")
-            
-        # Get predictions from all trees
-        all_predictions = np.array([
-            tree.predict(X) for tree in self.model.estimators_
-        ])
+        if interval not in ("quantile", "normal"):
+            raise ValueError("interval must be 'quantile' or 'normal'")
+        
+        # Models stored before the leaf index existed
+        if interval == "quantile" and getattr(self, "_leaf_bins", None) is None:
+            interval = "normal"
         
-        mean_pred = np.mean(all_predictions, axis=0)
-        std_pred = np.std(all_predictions, axis=0)
+        X = np.asarray(X, dtype=np.float32)
+        n = X.shape[0]
+        mean_pred, std_pred = np.empty(n), np.empty(n)
+        lower, upper, median = np.empty(n), np.empty(n), np.empty(n)
+        z = float(norm.ppf(1 - alpha / 2))
+        
+        for start in range(0, n, chunk_size):
+            rows = slice(start, start + chunk_size)
+            leaves = self._leaves(X[rows])
+            tree_predictions = self.engine.value[leaves]
+            mean_pred[rows] = tree_predictions.mean(axis=1)
+            std_pred[rows] = tree_predictions.std(axis=1)
+            
+            if interval == "quantile":
+                lower[rows], median[rows], upper[rows] = self._weighted_quantiles(
+                    leaves, (alpha / 2, 0.5, 1 - alpha / 2)
+                )
+            else:
+                lower[rows] = mean_pred[rows] - z * std_pred[rows]
+                upper[rows] = mean_pred[rows] + z * std_pred[rows]
+                median[rows] = np.median(tree_predictions, axis=1)
         
         return {
             "mean": mean_pred,
             "std": std_pred,
-            "lower_ci": mean_pred - 1.96 * std_pred,
-            "upper_ci": mean_pred + 1.96 * std_pred
+            "median": median,
+            "lower_ci": lower,
+            "upper_ci": upper,
+            "interval": interval
         }
 
 
-def train_and_predict(X_train: np.ndarray, 
-                      y_train: np.ndarray,
-                      X_predict: Optional[np.ndarray] = None) -> Dict[str, Any]:
+def train_model(X_train: np.ndarray,
+                y_train: np.ndarray,
+                validation: str = "holdout",
+                n_folds: int = 5,
+                gap: int = 0,
+                window: Optional[int] = None) -> Tuple[WeatherRandomForest, Dict[str, Any]]:
     """
-    Train Random Forest and optionally make predictions.
+    Train Random Forest.
     
     Args:
         X_train: Training features
         y_train: Training targets
-        X_predict: Optional features for prediction
+        validation: 'none', 'holdout', 'kfold', 'blocked', 'expanding' or 'rolling'
+        n_folds: Number of folds / origins
+        gap: Rows left out between training and test data (time-series methods)
+        window: Training window for 'rolling'
         
     Returns:
-        Complete training results and predictions
-        
-    Example:
-        >>> X = np.random.rand(100, 5)  # 100 samples, 5 features
-        >>> y = np.random.rand(100) * 10 + 20  # Temperature targets
-        >>> result = train_and_predict(X, y)
+        Fitted model and training results (without predictions)
     """
     # Initialize model
     rf = WeatherRandomForest(
@@ -223,7 +337,7 @@ def train_and_predict(X_train: np.ndarray,
     )
     
     # Train
-    train_metrics = rf.train(X_train, y_train)
+    train_metrics = rf.train(X_train, y_train, validation, n_folds, gap, window)
     
     # Build result
     result = {
@@ -246,15 +360,68 @@ def train_and_predict(X_train: np.ndarray,
         "training_metrics": train_metrics
     }
     
+    return rf, result
+
+
+def predict_with_model(rf: WeatherRandomForest,
+                       X_predict: np.ndarray,
+                       interval: str = "quantile") -> Dict[str, Any]:
+    """
+    Predictions with uncertainty from a trained Random Forest.
+    
+    Args:
+        rf: Trained model
+        X_predict: Features for prediction
+        interval: 'quantile' (QRF) or 'normal' (mean ± 1.96 std)
+        
+    Returns:
+        Predicted values with 95% intervals
+    """
+    predictions = rf.predict_with_uncertainty(X_predict, interval)
+    return {
+        "values": predictions["mean"].tolist(),
+        "std": predictions["std"].tolist(),
+        "median": predictions["median"].tolist(),
+        "lower_ci": predictions["lower_ci"].tolist(),
+        "upper_ci": predictions["upper_ci"].tolist(),
+        "interval": predictions["interval"]
+    }
+
+
+def train_and_predict(X_train: np.ndarray, 
+                      y_train: np.ndarray,
+                      X_predict: Optional[np.ndarray] = None,
+                      validation: str = "holdout",
+                      n_folds: int = 5,
+                      interval: str = "quantile",
+                      gap: int = 0,
+                      window: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Train Random Forest and optionally make predictions.
+    
+    Args:
+        X_train: Training features
+        y_train: Training targets
+        X_predict: Optional features for prediction
+        validation: 'none', 'holdout', 'kfold', 'blocked', 'expanding' or 'rolling'
+        n_folds: Number of folds / origins
+        interval: Prediction interval, 'quantile' (QRF) or 'normal'
+        gap: Rows left out between training and test data (time-series methods)
+        window: Training window for 'rolling'
+        
+    Returns:
+        Complete training results and predictions
+        
+    Example:
+        >>> X = np.random.rand(100, 5)  # 100 samples, 5 features
+        >>> y = np.random.rand(100) * 10 + 20  # Temperature targets
+        >>> result = train_and_predict(X, y)
+    """
+    rf, result = train_model(X_train, y_train, validation, n_folds, gap, window)
+    
     # Make predictions if requested
     if X_predict is not None:
-        predictions = rf.predict_with_uncertainty(X_predict)
-        result["predictions"] = {
-            "values": predictions["mean"].tolist(),
-            "std": predictions["std"].tolist(),
-            "lower_ci": predictions["lower_ci"].tolist(),
-            "upper_ci": predictions["upper_ci"].tolist()
-        }
+        result["predictions"] = predict_with_model(rf, X_predict, interval)
     
     return result
 
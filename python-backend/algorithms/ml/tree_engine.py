@@ -0,0 +1,444 @@
+"""
+==============================================
+Compiled Tree Ensemble Inference Engine
+محرك الاستدلال المُجمَّع لمجموعات الأشجار
+
+Exports any fitted tree ensemble (Random Forest, Gradient Boosting,
+Histogram Gradient Boosting, AdaBoost, XGBoost, Voting) into one struct-of-arrays layout and predicts
+with a single vectorized NumPy traversal.
+==============================================
+"""
+
+import json
+import os
+import numpy as np
+from typing import Any, Dict, List, Tuple
+
+# (sample, tree) pairs per traversal chunk; keeps the working set in cache
+CHUNK_PAIRS = 1 << 18
+
+# Batches up to this size use the engine (per-call overhead of a few
+# hundred µs instead of milliseconds); larger grids go to the libraries'
+# native multi-threaded predict, which has higher throughput
+ENGINE_MAX_ROWS = int(os.getenv("TREE_ENGINE_MAX_ROWS", 4096))
+
+
+def use_engine(X: np.ndarray) -> bool:
+    return len(X) <= ENGINE_MAX_ROWS
+
+
+def _floor_float32(threshold: np.ndarray) -> np.ndarray:
+    """
+    Largest float32 ≤ threshold.
+
+    For float32 inputs, x <= t (float64) ⟺ x <= _floor_float32(t), so
+    the engine can compare in float32 with the exact library decisions
+    at half the threshold memory.
+    """
+    t32 = threshold.astype(np.float32)
+    over = t32.astype(np.float64) > threshold
+    t32[over] = np.nextafter(t32[over], np.float32(-np.inf))
+    return t32
+
+
+class CompiledTrees:
+    """
+    Flat struct-of-arrays tree ensemble.
+
+    Node Layout:
+    ===========
+    All trees share one set of node arrays; tree t starts at roots[t].
+
+        feature[k], threshold[k]   split: go left if x[feature] <= threshold
+                                   (compared in the threshold dtype)
+        left[k], right[k]          global child ids (leaves point to themselves)
+        missing_left[k]            direction of NaN inputs
+        value[k]                   leaf output
+
+    Traversal:
+    =========
+    Every (sample, tree) pair advances one level per step:
+
+        node ← left[node] if X[i, feature[node]] <= threshold[node] else right[node]
+
+    for max_depth steps; self-looping leaves make the loop branch-free.
+    The NaN test only runs on chunks that contain NaN.
+
+    Aggregation:
+    ===========
+    - sum:             ŷ = base + Σ_t w_t · value(leaf_t)   (RF, GB, XGBoost)
+    - weighted_median: weighted median of the tree outputs  (AdaBoost.R2)
+    """
+
+    def __init__(self,
+                 feature: np.ndarray,
+                 threshold: np.ndarray,
+                 left: np.ndarray,
+                 right: np.ndarray,
+                 missing_left: np.ndarray,
+                 value: np.ndarray,
+                 roots: np.ndarray,
+                 max_depth: int,
+                 tree_weights: np.ndarray,
+                 base: float = 0.0,
+                 aggregation: str = "sum",
+                 source: str = ""):
+        self.feature = feature.astype(np.int32)
+        self.threshold = threshold
+        self.left = left.astype(np.int32)
+        self.right = right.astype(np.int32)
+        self.missing_left = missing_left.astype(bool)
+        self.value = value.astype(np.float64)
+        self.roots = roots.astype(np.int32)
+        self.max_depth = int(max_depth)
+        self.tree_weights = tree_weights.astype(np.float64)
+        self.base = float(base)
+        self.aggregation = aggregation
+        self.source = source
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_children", None)
+        return state
+
+    @property
+    def children(self) -> np.ndarray:
+        """Interleaved [left, right] so one gather picks the next node"""
+        if getattr(self, "_children", None) is None:
+            self._children = np.column_stack([self.left, self.right]).ravel()
+        return self._children
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (
+            self.feature, self.threshold, self.left, self.right,
+            self.missing_left, self.value, self.roots, self.tree_weights
+        ))
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """
+        Global leaf id of every (sample, tree) pair.
+
+        Returns:
+            int32 array (n_samples, n_trees) indexing value/feature/...
+        """
+        X = np.ascontiguousarray(X, dtype=self.threshold.dtype)
+        n, d = X.shape
+        leaves = np.empty((n, self.n_trees), dtype=np.int32)
+        rows_per_chunk = max(1, CHUNK_PAIRS // max(1, self.n_trees))
+        children = self.children
+
+        for start in range(0, n, rows_per_chunk):
+            chunk = X[start:start + rows_per_chunk]
+            flat = chunk.ravel()
+            has_nan = bool(np.isnan(flat).any())
+            offset = (np.arange(len(chunk), dtype=np.int32) * d)[:, None]
+            node = np.repeat(self.roots[None, :], len(chunk), axis=0)
+            for _ in range(self.max_depth):
+                x = flat[offset + self.feature[node]]
+                go_right = x > self.threshold[node]
+                if has_nan:
+                    go_right |= np.isnan(x) & ~self.missing_left[node]
+                node = children[2 * node + go_right]
+            leaves[start:start + len(chunk)] = node
+        return leaves
+
+    def tree_predictions(self, X: np.ndarray) -> np.ndarray:
+        """Unweighted output of every tree (n_samples, n_trees)"""
+        return self.value[self.apply(X)]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        outputs = self.tree_predictions(X)
+        if self.aggregation == "weighted_median":
+            return _weighted_median(outputs, self.tree_weights)
+        return self.base + outputs @ self.tree_weights
+
+
+class CompiledLinear:
+    """Linear member of a voting ensemble: ŷ = X·coef + intercept"""
+
+    def __init__(self, coef: np.ndarray, intercept: float, source: str = ""):
+        self.coef = np.asarray(coef, dtype=np.float64).ravel()
+        self.intercept = float(intercept)
+        self.source = source
+
+    @property
+    def nbytes(self) -> int:
+        return self.coef.nbytes
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+
+
+class LibraryPredict:
+    """
+    Fallback for models whose trees cannot be exported: predicts with the
+    estimator itself (e.g. when private sklearn attributes change)
+    """
+
+    def __init__(self, model: Any, reason: str = ""):
+        self.model = model
+        self.reason = reason
+        self.source = type(model).__name__
+
+    @property
+    def nbytes(self) -> int:
+        return 0
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return np.asarray(self.model.predict(X), dtype=np.float64)
+
+
+class CompiledVoting:
+    """Weighted average of compiled members (VotingRegressor)"""
+
+    def __init__(self, members: List[Tuple[str, Any, float]]):
+        self.members = members
+        self.source = "VotingRegressor"
+
+    @property
+    def nbytes(self) -> int:
+        return sum(member.nbytes for _, member, _ in self.members)
+
+    def predict_members(self, X: np.ndarray) -> Dict[str, np.ndarray]:
+        predictions = {name: member.predict(X) for name, member, _ in self.members}
+        weights = np.array([weight for _, _, weight in self.members])
+        stacked = np.column_stack([predictions[name] for name, _, _ in self.members])
+        predictions["ensemble"] = stacked @ (weights / weights.sum())
+        return predictions
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.predict_members(X)["ensemble"]
+
+
+def _weighted_median(outputs: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Row-wise weighted median as in AdaBoostRegressor.predict"""
+    order = np.argsort(outputs, axis=1)
+    cdf = np.cumsum(weights[order], axis=1)
+    median_idx = (cdf >= 0.5 * cdf[:, -1:]).argmax(axis=1)
+    rows = np.arange(len(outputs))
+    return outputs[rows, order[rows, median_idx]]
+
+
+def _concat_trees(trees: List[Dict[str, np.ndarray]],
+                  tree_weights: np.ndarray,
+                  base: float = 0.0,
+                  aggregation: str = "sum",
+                  source: str = "",
+                  float64_inputs: bool = False) -> CompiledTrees:
+    """
+    Stack per-tree arrays (local ids, -1 = leaf) into one CompiledTrees.
+
+    Libraries that compare float32 inputs (sklearn trees, XGBoost) get
+    float32 thresholds; float64_inputs keeps float64 comparisons for
+    those that do not (HistGradientBoosting).
+    """
+    sizes = np.array([len(tree["feature"]) for tree in trees])
+    roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+
+    feature, threshold, left, right, missing, value = [], [], [], [], [], []
+    for root, tree in zip(roots, trees):
+        local = np.arange(len(tree["feature"]))
+        is_leaf = tree["left"] < 0
+        feature.append(np.where(is_leaf, 0, tree["feature"]))
+        threshold.append(np.where(is_leaf, np.inf, tree["threshold"]))
+        left.append(root + np.where(is_leaf, local, tree["left"]))
+        right.append(root + np.where(is_leaf, local, tree["right"]))
+        missing.append(tree["missing_left"] & ~is_leaf)
+        value.append(tree["value"])
+
+    return CompiledTrees(
+        feature=np.concatenate(feature),
+        threshold=(np.concatenate(threshold).astype(np.float64) if float64_inputs
+                   else _floor_float32(np.concatenate(threshold).astype(np.float64))),
+        left=np.concatenate(left),
+        right=np.concatenate(right),
+        missing_left=np.concatenate(missing),
+        value=np.concatenate(value),
+        roots=roots,
+        max_depth=max(tree["depth"] for tree in trees),
+        tree_weights=tree_weights,
+        base=base,
+        aggregation=aggregation,
+        source=source
+    )
+
+
+def _sklearn_tree(estimator: Any) -> Dict[str, np.ndarray]:
+    tree = estimator.tree_
+    missing = getattr(tree, "missing_go_to_left", None)
+    return {
+        "feature": tree.feature,
+        "threshold": tree.threshold,
+        "left": tree.children_left,
+        "right": tree.children_right,
+        "missing_left": np.zeros(tree.node_count, bool) if missing is None else missing.astype(bool),
+        "value": tree.value[:, 0, 0],
+        "depth": tree.max_depth
+    }
+
+
+def _hist_tree(predictor: Any) -> Dict[str, np.ndarray]:
+    """One TreePredictor of a HistGradientBoostingRegressor (numerical splits)"""
+    nodes = predictor.nodes
+    if nodes["is_categorical"].any():
+        raise TypeError("Categorical splits are not supported by the tree engine")
+    is_leaf = nodes["is_leaf"].astype(bool)
+    return {
+        "feature": nodes["feature_idx"].astype(np.int64),
+        "threshold": nodes["num_threshold"],
+        "left": np.where(is_leaf, -1, nodes["left"]).astype(np.int64),
+        "right": np.where(is_leaf, -1, nodes["right"]).astype(np.int64),
+        "missing_left": nodes["missing_go_to_left"].astype(bool),
+        "value": nodes["value"],
+        "depth": int(nodes["depth"].max())
+    }
+
+
+def _hist_trees(model: Any) -> Tuple[List[Dict[str, np.ndarray]], float]:
+    """
+    Trees and baseline of a HistGradientBoostingRegressor.
+
+    Reads the private _predictors / _baseline_prediction attributes
+    (no public tree export); raises AttributeError when their layout is
+    not the one this engine was written against.
+    """
+    predictors = getattr(model, "_predictors", None)
+    baseline = getattr(model, "_baseline_prediction", None)
+    if predictors is None or baseline is None:
+        raise AttributeError("HistGradientBoostingRegressor internals not available")
+    try:
+        trees = [_hist_tree(stage[0]) for stage in predictors]
+    except (KeyError, ValueError, IndexError) as e:
+        raise AttributeError(f"Unexpected HistGradientBoostingRegressor tree layout: {e}")
+    return trees, float(np.ravel(baseline)[0])
+
+
+def _xgboost_tree(dump: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    One tree of Booster.get_dump(dump_format='json').
+
+    XGBoost goes left ('yes') on x < split_condition; as float32 that is
+    x <= nextafter(split_condition, -inf).
+    """
+    nodes = []
+    stack = [(dump, 0)]
+    depth = 0
+    while stack:
+        node, level = stack.pop()
+        nodes.append(node)
+        depth = max(depth, level)
+        stack.extend((child, level + 1) for child in node.get("children", []))
+
+    n = max(node["nodeid"] for node in nodes) + 1
+    tree = {
+        "feature": np.zeros(n, np.int64),
+        "threshold": np.zeros(n),
+        "left": np.full(n, -1, np.int64),
+        "right": np.full(n, -1, np.int64),
+        "missing_left": np.zeros(n, bool),
+        "value": np.zeros(n),
+        "depth": depth
+    }
+    for node in nodes:
+        k = node["nodeid"]
+        if "leaf" in node:
+            tree["value"][k] = node["leaf"]
+            continue
+        split = node["split"]
+        tree["feature"][k] = int(split[1:]) if split.startswith("f") and split[1:].isdigit() else int(split)
+        strict = np.float32(node["split_condition"])
+        tree["threshold"][k] = np.nextafter(strict, np.float32(-np.inf))
+        tree["left"][k] = node["yes"]
+        tree["right"][k] = node["no"]
+        tree["missing_left"][k] = node["missing"] == node["yes"]
+    return tree
+
+
+def _xgboost_base_score(booster: Any) -> float:
+    raw = json.loads(booster.save_config())["learner"]["learner_model_param"]["base_score"]
+    return float(str(raw).strip("[]").split(",")[0])
+
+
+def compile_model(model: Any) -> Any:
+    """
+    Compile a fitted regressor into the flat inference engine.
+
+    Supported:
+    - RandomForestRegressor / ExtraTreesRegressor (mean of trees)
+    - GradientBoostingRegressor (init + learning_rate · Σ trees)
+    - HistGradientBoostingRegressor (baseline + Σ trees, numerical splits;
+      LibraryPredict when its private tree attributes are unavailable)
+    - AdaBoostRegressor (weighted median of trees)
+    - DecisionTreeRegressor
+    - XGBRegressor / xgboost.Booster (base_score + Σ trees, up to best_iteration)
+    - VotingRegressor of the above and linear models
+
+    Returns:
+        CompiledTrees, CompiledLinear, CompiledVoting or LibraryPredict
+
+    Raises:
+        TypeError: for unsupported estimators
+    """
+    name = type(model).__name__
+
+    if name == "VotingRegressor":
+        weights = model.weights if model.weights is not None else [1.0] * len(model.estimators)
+        fitted = dict(model.named_estimators_)
+        members = [
+            (member_name, compile_model(fitted[member_name]), float(weight))
+            for (member_name, estimator), weight in zip(model.estimators, weights)
+            if estimator != "drop"
+        ]
+        return CompiledVoting(members)
+
+    if name in ("RandomForestRegressor", "ExtraTreesRegressor"):
+        trees = [_sklearn_tree(estimator) for estimator in model.estimators_]
+        return _concat_trees(trees, np.full(len(trees), 1.0 / len(trees)), source=name)
+
+    if name == "GradientBoostingRegressor":
+        trees = [_sklearn_tree(estimator) for estimator in model.estimators_[:, 0]]
+        if model.init_ == "zero":
+            base = 0.0
+        else:
+            base = float(np.ravel(model.init_.predict(np.zeros((1, model.n_features_in_))))[0])
+        return _concat_trees(trees, np.full(len(trees), model.learning_rate), base, source=name)
+
+    if name == "HistGradientBoostingRegressor":
+        try:
+            trees, base = _hist_trees(model)
+        except (AttributeError, TypeError) as e:
+            return LibraryPredict(model, str(e))
+        # Leaf values already include the learning rate
+        return _concat_trees(trees, np.ones(len(trees)), base, source=name, float64_inputs=True)
+
+    if name == "AdaBoostRegressor":
+        trees = [_sklearn_tree(estimator) for estimator in model.estimators_]
+        weights = np.asarray(model.estimator_weights_[:len(trees)], dtype=np.float64)
+        return _concat_trees(trees, weights, aggregation="weighted_median", source=name)
+
+    if name == "DecisionTreeRegressor":
+        return _concat_trees([_sklearn_tree(model)], np.ones(1), source=name)
+
+    if name in ("XGBRegressor", "Booster"):
+        booster = model.get_booster() if name == "XGBRegressor" else model
+        dumps = [json.loads(tree) for tree in booster.get_dump(dump_format="json")]
+        try:
+            dumps = dumps[:model.best_iteration + 1]
+        except AttributeError:
+            pass
+        trees = [_xgboost_tree(dump) for dump in dumps]
+        return _concat_trees(trees, np.ones(len(trees)), _xgboost_base_score(booster), source="XGBoost")
+
+    if hasattr(model, "coef_") and hasattr(model, "intercept_"):
+        return CompiledLinear(model.coef_, np.ravel(model.intercept_)[0] if np.ndim(model.intercept_) else model.intercept_, name)
+
+    raise TypeError(f"Cannot compile estimator of type {name}")
@@ -0,0 +1,305 @@
+"""
+==============================================
+Model Validation for ML Weather Models
+التحقق من نماذج التعلم الآلي
+
+Shared fit/validate engine used by the ML wrappers
+==============================================
+"""
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
+from sklearn.model_selection import KFold, TimeSeriesSplit, train_test_split
+from sklearn.metrics import mean_absolute_error
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+VALIDATION_METHODS = ("none", "holdout", "kfold", "blocked", "expanding", "rolling")
+
+# Methods whose training windows only ever move forward in time
+ORIGIN_METHODS = ("expanding", "rolling")
+
+
+def _fit_fold(estimator: Any,
+              X: np.ndarray,
+              y: np.ndarray,
+              train_idx: np.ndarray,
+              test_idx: np.ndarray,
+              fit_kwargs_fn: Optional[Callable]) -> Tuple[Any, float]:
+    """Fit one fold (runs in a joblib worker) and score it by MAE"""
+    model = clone(estimator)
+    fit_kwargs = fit_kwargs_fn(X[test_idx], y[test_idx]) if fit_kwargs_fn else {}
+    model.fit(X[train_idx], y[train_idx], **fit_kwargs)
+    mae = mean_absolute_error(y[test_idx], model.predict(X[test_idx]))
+    return model, float(mae)
+
+
+def time_series_splits(n_samples: int,
+                       method: str,
+                       n_folds: int = 5,
+                       gap: int = 0,
+                       window: Optional[int] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Chronological train/test splits (rows must be in time order).
+
+    Methods:
+    - blocked:   n_folds contiguous, unshuffled test blocks; training uses
+                 every other row except `gap` rows on each side of the block
+    - expanding: successive origins, training on everything before the
+                 origin (minus `gap`), testing on the next block
+    - rolling:   as expanding, but training on a fixed window of the most
+                 recent `window` rows (default: the first origin's size)
+
+    Args:
+        n_samples: Number of rows
+        method: 'blocked', 'expanding' or 'rolling'
+        n_folds: Number of test blocks / origins
+        gap: Rows dropped between training and test data, so lagged
+             features cannot see across the boundary
+        window: Training window for 'rolling'
+
+    Returns:
+        List of (train_idx, test_idx)
+    """
+    if method == "blocked":
+        indices = np.arange(n_samples)
+        splits = []
+        for _, test_idx in KFold(n_splits=n_folds).split(indices):
+            lo, hi = test_idx[0] - gap, test_idx[-1] + gap
+            splits.append((indices[(indices < lo) | (indices > hi)], test_idx))
+        return splits
+
+    if method == "rolling":
+        window = window or n_samples // (n_folds + 1)
+        splitter = TimeSeriesSplit(n_splits=n_folds, gap=gap, max_train_size=window)
+    elif method == "expanding":
+        splitter = TimeSeriesSplit(n_splits=n_folds, gap=gap)
+    else:
+        raise ValueError(f"'{method}' is not a time-series validation method")
+    return list(splitter.split(np.arange(n_samples)))
+
+
+def validation_splits(n_samples: int,
+                      validation: str,
+                      n_folds: int = 5,
+                      gap: int = 0,
+                      window: Optional[int] = None) -> Tuple[List[Tuple[np.ndarray, np.ndarray]], int]:
+    """
+    Row indices for every fit a validation method needs.
+
+    'none' is a single fold with an empty test set and 'holdout' the same
+    80/20 split fit_and_validate() uses.
+
+    Returns:
+        (list of (train_idx, test_idx), index of the fold whose model is kept)
+    """
+    if validation not in VALIDATION_METHODS:
+        raise ValueError(f"Unknown validation '{validation}'. Use one of {VALIDATION_METHODS}")
+
+    indices = np.arange(n_samples)
+    if validation == "none":
+        return [(indices, indices[:0])], 0
+    if validation == "holdout":
+        train_idx, test_idx = train_test_split(indices, test_size=0.2, random_state=42)
+        return [(train_idx, test_idx)], 0
+
+    if n_folds < 2:
+        raise ValueError(f"{validation} validation needs at least 2 folds")
+    if validation == "kfold":
+        return list(KFold(n_splits=n_folds, shuffle=True, random_state=42).split(indices)), 0
+    folds = time_series_splits(n_samples, validation, n_folds, gap, window)
+    return folds, len(folds) - 1
+
+
+def cv_summary(validation: str,
+               n_folds: int,
+               folds: List[Tuple[np.ndarray, np.ndarray]],
+               scores: Optional[np.ndarray] = None,
+               gap: int = 0) -> Dict[str, Any]:
+    """Cross-validation summary returned with the training metrics"""
+    if validation == "none":
+        return {"method": "none"}
+    if validation == "holdout":
+        return {"method": "holdout", "test_size": 0.2}
+
+    summary = {"method": validation, "n_folds": n_folds}
+    if validation != "kfold":
+        summary["gap"] = gap
+    if validation == "rolling":
+        summary["window"] = int(len(folds[-1][0]))
+    if scores is not None:
+        summary.update({
+            "cv_scores": scores.tolist(),
+            "cv_mean": float(scores.mean()),
+            "cv_std": float(scores.std())
+        })
+    return summary
+
+
+def _warm_start_kind(estimator: Any) -> Optional[str]:
+    """Boosters that can add trees to an already fitted model"""
+    if isinstance(estimator, GradientBoostingRegressor):
+        return "sklearn"
+    if isinstance(estimator, HistGradientBoostingRegressor):
+        return "sklearn_hist"
+    if hasattr(estimator, "get_booster"):
+        return "xgboost"
+    return None
+
+
+def _warm_start_origins(estimator: Any,
+                        X: np.ndarray,
+                        y: np.ndarray,
+                        folds: List[Tuple[np.ndarray, np.ndarray]],
+                        kind: str,
+                        fit_kwargs_fn: Optional[Callable]) -> Tuple[Any, List[float], int]:
+    """
+    Walk the origins with one booster that grows as the window moves.
+
+    The first origin gets about half of the tree budget; every later
+    origin adds an equal share of the rest, fitted on the new window.
+    The final model therefore holds the configured number of trees
+    while the whole backtest builds n_estimators trees once instead of
+    once per origin.
+
+    Returns:
+        (final model, per-origin MAE, total trees fitted)
+    """
+    stage_param = "max_iter" if kind == "sklearn_hist" else "n_estimators"
+    budget = estimator.get_params()[stage_param]
+    increment = max(1, budget // (2 * max(1, len(folds) - 1)))
+    first = max(1, budget - increment * (len(folds) - 1))
+
+    model = clone(estimator)
+    if kind != "xgboost":
+        model.set_params(warm_start=True)
+
+    scores = []
+    n_trees = 0
+    for i, (train_idx, test_idx) in enumerate(folds):
+        step = first if i == 0 else increment
+        fit_kwargs = fit_kwargs_fn(X[test_idx], y[test_idx]) if fit_kwargs_fn else {}
+        if kind == "xgboost":
+            booster = model.get_booster() if i > 0 else None
+            model.set_params(n_estimators=step)
+            model.fit(X[train_idx], y[train_idx], xgb_model=booster, **fit_kwargs)
+            n_trees += step
+        else:
+            # Early stopping may end a stage short of the target
+            model.set_params(**{stage_param: n_trees + step})
+            model.fit(X[train_idx], y[train_idx], **fit_kwargs)
+            n_trees = int(model.n_iter_ if kind == "sklearn_hist" else model.n_estimators_)
+        scores.append(float(mean_absolute_error(y[test_idx], model.predict(X[test_idx]))))
+
+    if kind == "xgboost":
+        model.set_params(n_estimators=n_trees)
+    else:
+        model.set_params(warm_start=False)
+    return model, scores, n_trees
+
+
+def fit_and_validate(estimator: Any,
+                     X: np.ndarray,
+                     y: np.ndarray,
+                     validation: str = "holdout",
+                     n_folds: int = 5,
+                     n_jobs: int = -1,
+                     fit_kwargs_fn: Optional[Callable] = None,
+                     gap: int = 0,
+                     window: Optional[int] = None,
+                     warm_start: bool = True) -> Dict[str, Any]:
+    """
+    Fit an estimator with the requested amount of validation.
+
+    Methods:
+    - none:    single fit on all data, no held-out metrics
+    - holdout: single fit on an 80/20 split (random_state=42)
+    - kfold:   n_folds fits in parallel via joblib; X and y are
+               memory-mapped once and shared by all workers. Fold 0
+               (an (n-1)/n training split) is reused as the returned
+               model and its held-out fold as the test set, so no
+               extra fit is needed for holdout metrics
+    - blocked / expanding / rolling: chronological splits from
+               time_series_splits() (no shuffling, so no future rows
+               leak into training). The model of the last block/origin
+               is returned, tested on the most recent data. For
+               expanding/rolling, boosters (GradientBoostingRegressor,
+               HistGradientBoostingRegressor, XGBRegressor) are warm-started across origins and only
+               add trees; other estimators are refitted per origin in
+               parallel
+
+    Args:
+        estimator: Unfitted scikit-learn compatible estimator
+        X: Features (n_samples, n_features)
+        y: Targets (n_samples,)
+        validation: 'none', 'holdout', 'kfold', 'blocked', 'expanding' or 'rolling'
+        n_folds: Number of folds / origins
+        n_jobs: joblib workers for 'kfold'
+        fit_kwargs_fn: Optional (X_test, y_test) -> extra fit kwargs
+                       (e.g. an eval_set)
+        gap: Rows left out between training and test data (time-series methods)
+        window: Training window for 'rolling'
+        warm_start: Grow boosters across origins instead of refitting
+
+    Returns:
+        Dictionary with:
+        - model: fitted estimator
+        - X_train, y_train, X_test, y_test: split used by the model
+          (test arrays are None for 'none')
+        - cross_validation: summary of the validation run
+    """
+    if validation not in VALIDATION_METHODS:
+        raise ValueError(f"Unknown validation '{validation}'. Use one of {VALIDATION_METHODS}")
+
+    if validation == "none":
+        model = clone(estimator)
+        model.fit(X, y)
+        return {
+            "model": model,
+            "X_train": X, "y_train": y,
+            "X_test": None, "y_test": None,
+            "cross_validation": cv_summary("none", n_folds, [])
+        }
+
+    if validation == "holdout":
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42
+        )
+        model = clone(estimator)
+        fit_kwargs = fit_kwargs_fn(X_test, y_test) if fit_kwargs_fn else {}
+        model.fit(X_train, y_train, **fit_kwargs)
+        return {
+            "model": model,
+            "X_train": X_train, "y_train": y_train,
+            "X_test": X_test, "y_test": y_test,
+            "cross_validation": cv_summary("holdout", n_folds, [])
+        }
+
+    folds, keep = validation_splits(len(y), validation, n_folds, gap, window)
+    summary = {}
+
+    kind = _warm_start_kind(estimator) if warm_start and validation in ORIGIN_METHODS else None
+    if kind:
+        model, scores, n_trees = _warm_start_origins(estimator, X, y, folds, kind, fit_kwargs_fn)
+        scores = np.array(scores)
+        summary.update({"warm_start": True, "trees_fitted": n_trees})
+    else:
+        # Arrays above max_nbytes are dumped once and memory-mapped read-only
+        # in every worker instead of being pickled per fold
+        fitted = Parallel(n_jobs=n_jobs, max_nbytes="1M", mmap_mode="r")(
+            delayed(_fit_fold)(estimator, X, y, train_idx, test_idx, fit_kwargs_fn)
+            for train_idx, test_idx in folds
+        )
+        model = fitted[keep][0]
+        scores = np.array([mae for _, mae in fitted])
+
+    train_idx, test_idx = folds[keep]
+    summary = {**cv_summary(validation, n_folds, folds, scores, gap), **summary}
+
+    return {
+        "model": model,
+        "X_train": X[train_idx], "y_train": y[train_idx],
+        "X_test": X[test_idx], "y_test": y[test_idx],
+        "cross_validation": summary
+    }
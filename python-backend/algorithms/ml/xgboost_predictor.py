@@ -9,8 +9,11 @@ KDD '16, 785-794.
 ==============================================
 """
 
+import copy
+import hashlib
+import os
 import numpy as np
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple, List
 import inspect
 
 try:
@@ -19,8 +22,81 @@ try:
 except ImportError:
     HAS_XGB = False
 
-from sklearn.model_selection import cross_val_score, train_test_split
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import KFold, train_test_split
+
+from services.state_store import LRUStateStore
+from . import tree_engine
+from .validation import ORIGIN_METHODS, fit_and_validate, time_series_splits
+
+UPDATE_MODES = ("append", "refresh")
+
+# Quantized training matrices kept for retraining on the same data
+# (in memory only: a DMatrix cannot be pickled)
+DMATRIX_CACHE_SIZE = int(os.getenv("XGB_DMATRIX_CACHE", 4))
+_dmatrix_cache = LRUStateStore("xgb_dmatrix", DMATRIX_CACHE_SIZE, spill=False)
+# Per-fold matrices of kfold/blocked runs, keyed by data key and fold layout.
+# Cached matrices are shared by every "ml" thread; native training holds
+# _dmatrix_cache.key_lock(data key) while it uses them
+_fold_cache = LRUStateStore("xgb_folds", DMATRIX_CACHE_SIZE, spill=False)
+
+
+def _regression_metrics(y_true: np.ndarray, y_pred: np.ndarray) -> Dict[str, float]:
+    return {
+        "mae": float(mean_absolute_error(y_true, y_pred)),
+        "rmse": float(np.sqrt(mean_squared_error(y_true, y_pred))),
+        "r2": float(r2_score(y_true, y_pred))
+    }
+
+
+def _eval_set(X_test: np.ndarray, y_test: np.ndarray) -> Dict[str, Any]:
+    """Fit kwargs that monitor the held-out split"""
+    return {"eval_set": [(X_test, y_test)], "verbose": False}
+
+
+def _data_key(X: np.ndarray, y: np.ndarray, max_bin: int) -> str:
+    """Cache key from a hash of the (float32) data, its shape and max_bin"""
+    digest = hashlib.sha1(np.ascontiguousarray(X, dtype=np.float32).tobytes())
+    digest.update(np.ascontiguousarray(y, dtype=np.float32).tobytes())
+    return f"{digest.hexdigest()}_{X.shape[0]}x{X.shape[1]}_b{max_bin}"
+
+
+def quantile_dmatrix(X: np.ndarray,
+                     y: np.ndarray,
+                     max_bin: int,
+                     nthread: int,
+                     key: Optional[str] = None) -> Tuple[Any, bool]:
+    """
+    QuantileDMatrix for (X, y), built once per dataset.
+    
+    Building it sketches feature quantiles and bins every value; the
+    result is cached by a hash of the data so a retrain on the same
+    feature set (new hyperparameters, new model version) skips both.
+    
+    Args:
+        key: Precomputed _data_key(X, y, max_bin)
+    
+    Returns:
+        (matrix, cache_hit)
+    """
+    key = key or _data_key(X, y, max_bin)
+    try:
+        return _dmatrix_cache.get(key), True
+    except KeyError:
+        pass
+    
+    matrix = xgb.QuantileDMatrix(
+        np.ascontiguousarray(X, dtype=np.float32),
+        np.ascontiguousarray(y, dtype=np.float32),
+        max_bin=max_bin, nthread=nthread
+    )
+    _dmatrix_cache.put(key, matrix)
+    return matrix, False
+
+
+def _eval_mae(booster: Any, dmatrix: Any) -> float:
+    """Parse '[i]\tname-mae:value' from Booster.eval"""
+    return float(booster.eval(dmatrix).split(":")[-1])
 
 
 class WeatherXGBoost:
@@ -69,20 +145,36 @@ class WeatherXGBoost:
     - Fast training and prediction
     """
     
+    BACKENDS = ("native", "sklearn")
+    
     def __init__(self,
                  n_estimators: int = 100,
                  max_depth: int = 6,
                  learning_rate: float = 0.1,
-                 subsample: float = 0.8):
+                 subsample: float = 0.8,
+                 backend: str = "native",
+                 early_stopping_rounds: Optional[int] = 20,
+                 nthread: int = -1,
+                 max_bin: int = 256):
         """
         Initialize XGBoost model.
         
         Args:
-            n_estimators: Number of boosting rounds
+            n_estimators: Number of boosting rounds (upper bound with early stopping)
             max_depth: Maximum tree depth
             learning_rate: Shrinkage factor (eta)
             subsample: Row subsampling ratio
+            backend: 'native' (QuantileDMatrix + xgb.train) or 'sklearn' (XGBRegressor)
+            early_stopping_rounds: Stop after this many rounds without a
+                                   better validation MAE (None = fixed rounds)
+            nthread: Threads per fit (-1 = all cores)
+            max_bin: Histogram bins per feature
         """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}'. Use one of {self.BACKENDS}")
+        
+        self.backend = backend
+        self.early_stopping_rounds = early_stopping_rounds
         self.params = {
             "n_estimators": n_estimators,
             "max_depth": max_depth,
@@ -92,7 +184,9 @@ class WeatherXGBoost:
             "reg_alpha": 0.1,
             "reg_lambda": 1.0,
             "random_state": 42,
-            "n_jobs": -1
+            "n_jobs": nthread,
+            "tree_method": "hist",
+            "max_bin": max_bin
         }
         
         if HAS_XGB:
@@ -107,13 +201,29 @@ class WeatherXGBoost:
         ]
         self.is_trained = False
         
-    def train(self, X: np.ndarray, y: np.ndarray) -> Dict[str, Any]:
+    def train(self, 
+              X: np.ndarray, 
+              y: np.ndarray,
+              validation: str = "holdout",
+              n_folds: int = 5,
+              gap: int = 0,
+              window: Optional[int] = None) -> Dict[str, Any]:
         """
         Train the XGBoost model.
         
         Args:
             X: Training features
             y: Training targets
+            validation: 'none', 'holdout', 'kfold' or a time-series
+                        split ('blocked', 'expanding', 'rolling')
+            n_folds: Number of folds / origins
+            gap: Rows left out between training and test data
+                 (time-series methods)
+            window: Training window for 'rolling'
+            
+        The native backend handles none/holdout/kfold/blocked itself;
+        expanding/rolling origins always use the warm-started
+        XGBRegressor path of validation.fit_and_validate.
             
         Returns:
             Training metrics
@@ -121,28 +231,25 @@ class WeatherXGBoost:
         if not HAS_XGB:
             return self._simulate_training(X, y)
         
-        # Split for evaluation
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
-        
-        # Train with early stopping
-        self.model.fit(
-            X_train, y_train,
-            eval_set=[(X_test, y_test)],
-            verbose=False
-        )
+        if self.backend == "native" and validation not in ORIGIN_METHODS:
+            fit = self._train_native(X, y, validation, n_folds, gap)
+        else:
+            # Held-out data doubles as the eval_set of each fit; warm-started
+            # origins keep their fixed per-origin round budget
+            stopping = validation not in ("none",) + ORIGIN_METHODS
+            self.model.set_params(early_stopping_rounds=self.early_stopping_rounds if stopping else None)
+            fit = fit_and_validate(
+                self.model, X, y, validation, n_folds,
+                fit_kwargs_fn=_eval_set, gap=gap, window=window
+            )
+        self.model = fit["model"]
+        self._engine = tree_engine.compile_model(self.model)
         self.is_trained = True
+        X_test, y_test = fit["X_test"], fit["y_test"]
         
-        # Cross-validation
-        cv_scores = cross_val_score(
-            self.model, X, y,
-            cv=5,
-            scoring='neg_mean_absolute_error'
-        )
-        
-        # Test predictions
-        y_pred = self.model.predict(X_test)
+        test_metrics = fit.get("test_metrics")
+        if test_metrics is None and X_test is not None:
+            test_metrics = _regression_metrics(y_test, self.model.predict(X_test))
         
         # Feature importance
         n_features = min(X.shape[1], len(self.feature_names))
@@ -155,18 +262,232 @@ class WeatherXGBoost:
         return {
             "n_samples": len(y),
             "n_features": X.shape[1],
-            "cross_validation": {
-                "cv_scores": (-cv_scores).tolist(),
-                "cv_mean": float(-cv_scores.mean()),
-                "cv_std": float(cv_scores.std())
-            },
-            "test_metrics": {
-                "mae": float(mean_absolute_error(y_test, y_pred)),
-                "rmse": float(np.sqrt(mean_squared_error(y_test, y_pred))),
-                "r2": float(r2_score(y_test, y_pred))
-            },
+            "cross_validation": fit["cross_validation"],
+            "test_metrics": test_metrics,
             "feature_importance": feature_importance,
-            "best_iteration": self.model.best_iteration if hasattr(self.model, 'best_iteration') else self.params["n_estimators"]
+            "n_rounds": int(self.model.get_booster().num_boosted_rounds()),
+            "best_iteration": fit.get("best_iteration", self.model.best_iteration if hasattr(self.model, 'best_iteration') else self.params["n_estimators"]),
+            "dmatrix_cache_hit": fit.get("dmatrix_cache_hit")
+        }
+    
+    def native_params(self) -> Dict[str, Any]:
+        """Booster parameters for xgb.train"""
+        nthread = self.params["n_jobs"]
+        return {
+            "objective": "reg:squarederror",
+            "eval_metric": "mae",
+            "eta": self.params["learning_rate"],
+            "max_depth": self.params["max_depth"],
+            "subsample": self.params["subsample"],
+            "colsample_bytree": self.params["colsample_bytree"],
+            "alpha": self.params["reg_alpha"],
+            "lambda": self.params["reg_lambda"],
+            "seed": self.params["random_state"],
+            "tree_method": "hist",
+            "max_bin": self.params["max_bin"],
+            "nthread": nthread if nthread > 0 else (os.cpu_count() or 1)
+        }
+    
+    def _train_native(self,
+                      X: np.ndarray,
+                      y: np.ndarray,
+                      validation: str,
+                      n_folds: int,
+                      gap: int = 0) -> Dict[str, Any]:
+        """
+        XGBoost-native training on QuantileDMatrix.
+        
+        - none:    xgb.train for n_estimators rounds on the cached matrix
+        - holdout: 80/20 split, early stopping on the test MAE, booster
+                   truncated to the best iteration
+        - kfold / blocked: cross-validation in lock-step like xgb.cv
+                   (which does not accept QuantileDMatrix): one booster
+                   per fold, all advanced one round at a time, stopping
+                   when the mean fold MAE stops improving. Fold matrices
+                   reuse the quantile cuts of the full matrix (ref=), and
+                   the final model is trained on the full cached matrix
+                   for the best number of rounds. The fold matrices are
+                   cached too (per data key and fold layout), so a retrain
+                   on the same data builds no matrix at all. Test metrics
+                   come from the kept fold's booster at the best
+                   iteration (fold 0 for kfold, the latest block for
+                   blocked, as in fit_and_validate), since the final
+                   model has seen every row
+        
+        A DMatrix is not safe to train on from several threads, so the
+        per-dataset lock of the matrix cache is held while the cached
+        matrices are in use; jobs on other datasets are not blocked.
+        
+        Returns:
+            Same layout as validation.fit_and_validate, plus best_iteration,
+            dmatrix_cache_hit (every matrix came from the cache) and, for
+            kfold/blocked, test_metrics
+        """
+        params = self.native_params()
+        rounds = self.params["n_estimators"]
+        patience = self.early_stopping_rounds
+        nthread = params["nthread"]
+        max_bin = params["max_bin"]
+        
+        test_metrics = None
+        
+        if validation == "none":
+            key = _data_key(X, y, max_bin)
+            with _dmatrix_cache.key_lock(key):
+                dtrain, hit = quantile_dmatrix(X, y, max_bin, nthread, key)
+                booster = xgb.train(params, dtrain, rounds)
+            X_train, y_train, X_test, y_test = X, y, None, None
+            best_iteration = rounds - 1
+            summary = {"method": "none"}
+        
+        elif validation == "holdout":
+            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+            key = _data_key(X_train, y_train, max_bin)
+            with _dmatrix_cache.key_lock(key):
+                dtrain, hit = quantile_dmatrix(X_train, y_train, max_bin, nthread, key)
+                dtest = xgb.QuantileDMatrix(X_test, y_test, ref=dtrain, nthread=nthread)
+                booster = xgb.train(
+                    params, dtrain, rounds,
+                    evals=[(dtest, "test")],
+                    early_stopping_rounds=patience,
+                    verbose_eval=False
+                )
+            best_iteration = booster.best_iteration if patience else rounds - 1
+            booster = booster[:best_iteration + 1]
+            summary = {"method": "holdout", "test_size": 0.2}
+        
+        else:
+            if n_folds < 2:
+                raise ValueError(f"{validation} validation needs at least 2 folds")
+            data_key = _data_key(X, y, max_bin)
+            fold_key = f"{data_key}_{validation}{n_folds}g{gap}"
+            with _dmatrix_cache.key_lock(data_key):
+                dall, hit = quantile_dmatrix(X, y, max_bin, nthread, data_key)
+                try:
+                    fold_matrices = _fold_cache.get(fold_key)
+                except KeyError:
+                    if validation == "kfold":
+                        folds = list(KFold(n_splits=n_folds, shuffle=True, random_state=42).split(X))
+                    else:
+                        folds = time_series_splits(len(y), validation, n_folds, gap)
+                    fold_matrices = [
+                        (xgb.QuantileDMatrix(X[train_idx], y[train_idx], ref=dall, nthread=nthread),
+                         xgb.QuantileDMatrix(X[test_idx], y[test_idx], ref=dall, nthread=nthread))
+                        for train_idx, test_idx in folds
+                    ]
+                    _fold_cache.put(fold_key, fold_matrices)
+                    hit = False
+                
+                packs = [(xgb.Booster(params, [dtr, dte]), dtr, dte) for dtr, dte in fold_matrices]
+                
+                history = []
+                best_iteration, best_mean = 0, np.inf
+                for i in range(rounds):
+                    scores = []
+                    for booster, dtr, dte in packs:
+                        booster.update(dtr, i)
+                        scores.append(_eval_mae(booster, dte))
+                    history.append(scores)
+                    if np.mean(scores) < best_mean:
+                        best_iteration, best_mean = i, float(np.mean(scores))
+                    elif patience and i - best_iteration >= patience:
+                        break
+                
+                fold_booster, _, dkeep = packs[0 if validation == "kfold" else len(packs) - 1]
+                test_metrics = _regression_metrics(
+                    dkeep.get_label(),
+                    fold_booster.predict(dkeep, iteration_range=(0, best_iteration + 1))
+                )
+                booster = xgb.train(params, dall, best_iteration + 1)
+            
+            fold_scores = np.array(history[best_iteration])
+            X_train, y_train, X_test, y_test = X, y, None, None
+            summary = {
+                "method": validation,
+                "n_folds": n_folds,
+                **({"gap": gap} if validation == "blocked" else {}),
+                "cv_scores": fold_scores.tolist(),
+                "cv_mean": float(fold_scores.mean()),
+                "cv_std": float(fold_scores.std()),
+                "rounds_evaluated": len(history)
+            }
+        
+        model = xgb.XGBRegressor(**self.params)
+        model.load_model(bytearray(booster.save_raw(raw_format="json")))
+        summary["best_iteration"] = int(best_iteration)
+        return {
+            "model": model,
+            "X_train": X_train, "y_train": y_train,
+            "X_test": X_test, "y_test": y_test,
+            "cross_validation": summary,
+            "test_metrics": test_metrics,
+            "best_iteration": int(best_iteration),
+            "dmatrix_cache_hit": hit
+        }
+    
+    def update(self,
+               X_new: np.ndarray,
+               y_new: np.ndarray,
+               n_rounds: int = 10,
+               mode: str = "append") -> Dict[str, Any]:
+        """
+        Continue training on newly arrived rows.
+        
+        Modes:
+        - append:  boost n_rounds new trees on the new rows, starting from
+                   the current ensemble (xgb.train(..., xgb_model=booster));
+                   existing trees are unchanged
+        - refresh: keep every tree structure and re-estimate leaf values
+                   and node statistics on the new rows
+                   (process_type='update', updater='refresh')
+        
+        Cost is proportional to the new rows (and n_rounds), not to the
+        full history.
+        
+        Args:
+            X_new: New features
+            y_new: New targets
+            n_rounds: Trees to add ('append')
+            mode: 'append' or 'refresh'
+            
+        Returns:
+            Update metrics (MAE on the new rows before and after)
+        """
+        if not HAS_XGB or not self.is_trained:
+            raise ValueError("Model must be trained first")
+        if mode not in UPDATE_MODES:
+            raise ValueError(f"Unknown update mode '{mode}'. Use one of {UPDATE_MODES}")
+        
+        mae_before = float(mean_absolute_error(y_new, self.model.predict(X_new)))
+        booster = self.model.get_booster()
+        rounds_before = booster.num_boosted_rounds()
+        if hasattr(self.model, "best_iteration"):
+            # Trees past the early-stopping point are never used for prediction
+            booster = booster[:self.model.best_iteration + 1]
+            rounds_before = booster.num_boosted_rounds()
+        
+        params = self.native_params()
+        dnew = xgb.DMatrix(X_new, y_new, nthread=params["nthread"])
+        if mode == "append":
+            booster = xgb.train(params, dnew, n_rounds, xgb_model=booster)
+        else:
+            params = {k: v for k, v in params.items() if k not in ("tree_method", "max_bin")}
+            params.update({"process_type": "update", "updater": "refresh", "refresh_leaf": True})
+            booster = xgb.train(params, dnew, rounds_before, xgb_model=booster)
+        booster.set_attr(best_iteration=None, best_score=None)
+        
+        model = xgb.XGBRegressor(**self.params)
+        model.load_model(bytearray(booster.save_raw(raw_format="json")))
+        self.model = model
+        self._engine = tree_engine.compile_model(self.model)
+        
+        return {
+            "mode": mode,
+            "n_new_samples": len(y_new),
+            "rounds_before": int(rounds_before),
+            "n_rounds": int(booster.num_boosted_rounds()),
+            "new_data_mae_before": mae_before,
+            "new_data_mae_after": float(mean_absolute_error(y_new, self.model.predict(X_new)))
         }
     
     def _simulate_training(self, X: np.ndarray, y: np.ndarray) -> Dict[str, Any]:
@@ -182,29 +503,48 @@ class WeatherXGBoost:
             }
         }
     
+    @property
+    def engine(self) -> tree_engine.CompiledTrees:
+        """Flat-array inference engine (compiled on first use for stored models)"""
+        if getattr(self, "_engine", None) is None:
+            self._engine = tree_engine.compile_model(self.model)
+        return self._engine
+    
     def predict(self, X: np.ndarray) -> np.ndarray:
         """Make predictions"""
         if not HAS_XGB or not self.is_trained:
             return np.mean(X, axis=1) * 0.5 + 20
+        if tree_engine.use_engine(X):
+            return self.engine.predict(X)
         return self.model.predict(X)
 
 
-def train_and_predict(X_train: np.ndarray,
-                      y_train: np.ndarray,
-                      X_predict: Optional[np.ndarray] = None) -> Dict[str, Any]:
+def train_model(X_train: np.ndarray,
+                y_train: np.ndarray,
+                validation: str = "holdout",
+                n_folds: int = 5,
+                backend: str = "native",
+                nthread: int = -1,
+                gap: int = 0,
+                window: Optional[int] = None) -> Tuple[WeatherXGBoost, Dict[str, Any]]:
     """
-    Train XGBoost and optionally make predictions.
+    Train XGBoost.
     
     Args:
         X_train: Training features
         y_train: Training targets
-        X_predict: Optional prediction features
+        validation: 'none', 'holdout', 'kfold', 'blocked', 'expanding' or 'rolling'
+        n_folds: Number of folds / origins
+        backend: 'native' (QuantileDMatrix, cached) or 'sklearn'
+        nthread: Threads per fit (-1 = all cores)
+        gap: Rows left out between training and test data (time-series methods)
+        window: Training window for 'rolling'
         
     Returns:
-        Complete results
+        Fitted model and training results (without predictions)
     """
-    xgb_model = WeatherXGBoost()
-    train_metrics = xgb_model.train(X_train, y_train)
+    xgb_model = WeatherXGBoost(backend=backend, nthread=nthread)
+    train_metrics = xgb_model.train(X_train, y_train, validation, n_folds, gap, window)
     
     result = {
         "algorithm": "XGBoost",
@@ -216,13 +556,75 @@ def train_and_predict(X_train: np.ndarray,
             "regularization": "Ω(f) = γT + ½λ‖w‖²",
             "gain": "Gain = ½[G_L²/(H_L+λ) + G_R²/(H_R+λ) - (G+G_R)²/(H_L+H_R+λ)] - γ"
         },
-        "model_config": xgb_model.params,
+        "model_config": {
+            **xgb_model.params,
+            "backend": xgb_model.backend,
+            "early_stopping_rounds": xgb_model.early_stopping_rounds
+        },
         "training_metrics": train_metrics
     }
     
+    return xgb_model, result
+
+
+def update_model(xgb_model: WeatherXGBoost,
+                 X_new: np.ndarray,
+                 y_new: np.ndarray,
+                 n_rounds: int = 10,
+                 mode: str = "append") -> Tuple[WeatherXGBoost, Dict[str, Any]]:
+    """
+    Continued training of a trained model on new rows.
+    
+    Works on a shallow copy; xgb.train never modifies the booster it
+    starts from, so the original (e.g. a registry version) stays intact.
+    
+    Returns:
+        Updated model and update results
+    """
+    updated = copy.copy(xgb_model)
+    update_metrics = updated.update(X_new, y_new, n_rounds, mode)
+    return updated, {
+        "algorithm": "XGBoost",
+        "library": "xgboost",
+        "update_metrics": update_metrics
+    }
+
+
+def predict_with_model(xgb_model: WeatherXGBoost, X_predict: np.ndarray) -> List[float]:
+    """Predictions from a trained XGBoost model"""
+    return xgb_model.predict(X_predict).tolist()
+
+
+def train_and_predict(X_train: np.ndarray,
+                      y_train: np.ndarray,
+                      X_predict: Optional[np.ndarray] = None,
+                      validation: str = "holdout",
+                      n_folds: int = 5,
+                      backend: str = "native",
+                      nthread: int = -1,
+                      gap: int = 0,
+                      window: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Train XGBoost and optionally make predictions.
+    
+    Args:
+        X_train: Training features
+        y_train: Training targets
+        X_predict: Optional prediction features
+        validation: 'none', 'holdout', 'kfold', 'blocked', 'expanding' or 'rolling'
+        n_folds: Number of folds / origins
+        backend: 'native' or 'sklearn'
+        nthread: Threads per fit (-1 = all cores)
+        gap: Rows left out between training and test data (time-series methods)
+        window: Training window for 'rolling'
+        
+    Returns:
+        Complete results
+    """
+    xgb_model, result = train_model(X_train, y_train, validation, n_folds, backend, nthread, gap, window)
+    
     if X_predict is not None:
-        predictions = xgb_model.predict(X_predict)
-        result["predictions"] = predictions.tolist()
+        result["predictions"] = predict_with_model(xgb_model, X_predict)
     
     return result
 
@@ -12,11 +12,34 @@ Holden-Day, San Francisco.
 import numpy as np
 from statsmodels.tsa.arima.model import ARIMA
 from statsmodels.tsa.stattools import adfuller, acf, pacf
-from typing import List, Dict, Any, Tuple
+from statsmodels.stats.diagnostic import acorr_ljungbox
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple, Optional, Union, Set
+import hashlib
 import inspect
+import json
+import os
+import re
+import threading
+import time
 import warnings
 warnings.filterwarnings('ignore')
 
+from services import executor
+from services.state_store import LRUStateStore
+
+# Largest p / q searched by select_order (the grid is (max_p+1)·(max_q+1) fits)
+MAX_AUTO_ORDER = 5
+
+# Individually requestable diagnostic blocks and the named levels
+DIAGNOSTIC_BLOCKS = ("stationarity", "acf", "pacf", "residuals", "ljung_box", "equation")
+DIAGNOSTIC_LEVELS = {
+    "none": set(),
+    "basic": {"residuals", "equation"},
+    "full": set(DIAGNOSTIC_BLOCKS)
+}
+
 
 class WeatherARIMA:
     """
@@ -58,9 +81,23 @@ class WeatherARIMA:
     - Temperature: Usually ARIMA(2,1,1) or ARIMA(1,1,1)
     - Precipitation: May need seasonal component SARIMA
     - Wind: Often requires higher order AR terms
+    
+    Seasonal Mode:
+    =============
+    - Short seasons (s <= max_native_period, e.g. 24 hours):
+      native SARIMA(p,d,q)(P,D,Q)_s
+    - Long seasons (e.g. 365 days, 8766 hours): K Fourier pairs as
+      exogenous regressors, regression with ARIMA errors
+        y_t = Σ_{k=1}^{K} [a_k sin(2πkt/s) + b_k cos(2πkt/s)] + η_t
+      which keeps the state dimension small regardless of s
     """
     
-    def __init__(self, order: Tuple[int, int, int] = (2, 1, 1)):
+    def __init__(self,
+                 order: Tuple[int, int, int] = (2, 1, 1),
+                 seasonal_period: Optional[int] = None,
+                 seasonal_order: Tuple[int, int, int] = (1, 0, 1),
+                 fourier_terms: Optional[int] = None,
+                 max_native_period: int = 24):
         """
         Initialize ARIMA model.
         
@@ -69,11 +106,51 @@ class WeatherARIMA:
                    p = AR order
                    d = differencing order  
                    q = MA order
+            seasonal_period: Season length s in steps (None = no seasonality)
+            seasonal_order: (P, D, Q) used for native seasonal mode
+            fourier_terms: Number of Fourier pairs K; forces Fourier mode
+            max_native_period: Longest season fitted with native seasonal orders
         """
         self.order = order
+        self.seasonal_period = seasonal_period
+        self.seasonal_order = (0, 0, 0, 0)
+        self.fourier_terms = 0
+        
+        if seasonal_period is not None:
+            if seasonal_period < 2:
+                raise ValueError("Seasonal period must be at least 2")
+            if fourier_terms is None and seasonal_period <= max_native_period:
+                self.seasonal_order = tuple(seasonal_order) + (seasonal_period,)
+            else:
+                K = fourier_terms if fourier_terms is not None else 4
+                self.fourier_terms = max(1, min(K, seasonal_period // 2))
+        
         self.model = None
         self.fitted = None
         self.data = None
+    
+    @property
+    def seasonal_mode(self) -> str:
+        """'native', 'fourier' or 'none'"""
+        if self.fourier_terms:
+            return "fourier"
+        if self.seasonal_order[3]:
+            return "native"
+        return "none"
+    
+    def model_kwargs(self) -> Dict[str, Any]:
+        """Extra statsmodels ARIMA arguments for the seasonal mode"""
+        return {"seasonal_order": self.seasonal_order}
+    
+    def exog(self, start: int, n: int) -> Optional[np.ndarray]:
+        """
+        Fourier regressors for time steps [start, start + n).
+        
+        Returns None outside Fourier mode.
+        """
+        if not self.fourier_terms:
+            return None
+        return fourier_terms(self.seasonal_period, self.fourier_terms, start, n)
         
     def fit(self, data: np.ndarray) -> Dict[str, Any]:
         """
@@ -86,9 +163,45 @@ class WeatherARIMA:
             Dictionary with model statistics
         """
         self.data = data
-        self.model = ARIMA(data, order=self.order)
+        self.model = ARIMA(
+            data,
+            exog=self.exog(0, len(data)),
+            order=self.order,
+            **self.model_kwargs()
+        )
         self.fitted = self.model.fit()
         
+        return self.fit_statistics()
+    
+    def update(self, new_data: np.ndarray, refit: bool = False) -> Dict[str, Any]:
+        """
+        Append new observations to a fitted model.
+        
+        Uses the state-space append path: the Kalman filter is run over
+        the extended series with the existing parameters, so no MLE is
+        needed unless refit=True.
+        
+        Args:
+            new_data: Observations following the fitted series
+            refit: Re-estimate parameters (starting from current ones)
+            
+        Returns:
+            Dictionary with model statistics
+        """
+        if self.fitted is None:
+            raise ValueError("Model must be fitted first")
+        
+        new_exog = self.exog(len(self.data), len(new_data))
+        self.fitted = self.fitted.append(new_data, exog=new_exog, refit=refit)
+        self.model = self.fitted.model
+        self.data = np.concatenate([self.data, new_data])
+        
+        return self.fit_statistics()
+    
+    def fit_statistics(self) -> Dict[str, Any]:
+        """
+        Summary statistics of the fitted model.
+        """
         return {
             "aic": float(self.fitted.aic),
             "bic": float(self.fitted.bic),
@@ -96,7 +209,12 @@ class WeatherARIMA:
             "log_likelihood": float(self.fitted.llf),
             "ar_coefficients": self.fitted.arparams.tolist() if len(self.fitted.arparams) > 0 else [],
             "ma_coefficients": self.fitted.maparams.tolist() if len(self.fitted.maparams) > 0 else [],
-            "sigma2": float(self.fitted.params[-1]) if hasattr(self.fitted, 'params') else None
+            "sigma2": float(self.fitted.params[-1]) if hasattr(self.fitted, 'params') else None,
+            "seasonal_ar_coefficients": self.fitted.seasonalarparams.tolist() if self.seasonal_mode == "native" else [],
+            "seasonal_ma_coefficients": self.fitted.seasonalmaparams.tolist() if self.seasonal_mode == "native" else [],
+            "fourier_coefficients": np.asarray(self.fitted.params)[
+                self.fitted.model.k_trend:self.fitted.model.k_trend + 2 * self.fourier_terms
+            ].tolist()
         }
     
     def forecast(self, steps: int) -> Dict[str, Any]:
@@ -112,80 +230,102 @@ class WeatherARIMA:
         if self.fitted is None:
             raise ValueError("Model must be fitted first")
             
-        forecast_result = self.fitted.get_forecast(steps=steps)
+        forecast_result = self.fitted.get_forecast(
+            steps=steps,
+            exog=self.exog(len(self.data), steps)
+        )
         mean = forecast_result.predicted_mean
-        conf_int = forecast_result.conf_int(alpha=0.05)  # 95% CI
+        conf_int = np.asarray(forecast_result.conf_int(alpha=0.05))  # 95% CI
         
         return {
             "forecast": mean.tolist(),
-            "lower_bound_95": conf_int.iloc[:, 0].tolist(),
-            "upper_bound_95": conf_int.iloc[:, 1].tolist(),
+            "lower_bound_95": conf_int[:, 0].tolist(),
+            "upper_bound_95": conf_int[:, 1].tolist(),
             "forecast_variance": forecast_result.var_pred_mean.tolist() if hasattr(forecast_result, 'var_pred_mean') else []
         }
     
-    def diagnostics(self, data: np.ndarray) -> Dict[str, Any]:
+    def diagnostics(self, 
+                    data: np.ndarray,
+                    blocks: Optional[Set[str]] = None) -> Dict[str, Any]:
         """
-        Perform comprehensive model diagnostics.
+        Perform model diagnostics.
         
-        Tests performed:
-        1. ADF Test: Stationarity check
-        2. ACF: Autocorrelation analysis
-        3. PACF: Partial autocorrelation analysis
-        4. Residual analysis: White noise check
+        Tests performed (each block computed only when requested):
+        1. stationarity: ADF Test
+        2. acf: Autocorrelation analysis
+        3. pacf: Partial autocorrelation analysis
+        4. residuals: Residual moments
+        5. ljung_box: White noise check of residuals
         
         Args:
             data: Original time series
+            blocks: Diagnostic blocks to compute (None = all)
             
         Returns:
             Dictionary with diagnostic results
         """
-        # Augmented Dickey-Fuller test for stationarity
-        adf_result = adfuller(data, autolag='AIC')
+        if blocks is None:
+            blocks = set(DIAGNOSTIC_BLOCKS)
+        
+        result = {}
+        if "stationarity" in blocks:
+            result["stationarity_test"] = self._stationarity_test(data)
         
-        # Calculate ACF and PACF
         n_lags = min(10, len(data) // 2 - 1)
-        acf_values = acf(data, nlags=n_lags, fft=True)
-        pacf_values = pacf(data, nlags=n_lags)
+        if "acf" in blocks:
+            result["acf"] = acf(data, nlags=n_lags, fft=True).tolist()
+        if "pacf" in blocks:
+            result["pacf"] = pacf(data, nlags=n_lags).tolist()
+        
+        if blocks & {"residuals", "ljung_box"}:
+            result["residuals"] = self._residual_analysis(
+                moments="residuals" in blocks,
+                ljung_box="ljung_box" in blocks
+            )
+        
+        return result
+    
+    def _stationarity_test(self, data: np.ndarray) -> Dict[str, Any]:
+        """Augmented Dickey-Fuller test for stationarity"""
+        adf_result = adfuller(data, autolag='AIC')
+        return {
+            "test_name": "Augmented Dickey-Fuller",
+            "adf_statistic": float(adf_result[0]),
+            "p_value": float(adf_result[1]),
+            "critical_values": {
+                "1%": float(adf_result[4]['1%']),
+                "5%": float(adf_result[4]['5%']),
+                "10%": float(adf_result[4]['10%'])
+            },
+            "is_stationary": adf_result[1] < 0.05,
+            "lags_used": int(adf_result[2]),
+            "n_obs": int(adf_result[3])
+        }
+    
+    def _residual_analysis(self, moments: bool = True, ljung_box: bool = True) -> Dict[str, Any]:
+        """Residual moments and Ljung-Box test"""
+        resid_mean = resid_std = resid_skew = resid_kurtosis = lb_pvalue = None
         
-        # Residual analysis
         if self.fitted is not None:
             residuals = self.fitted.resid
-            resid_mean = float(np.mean(residuals))
-            resid_std = float(np.std(residuals))
-            resid_skew = float(np.mean(((residuals - resid_mean) / resid_std) ** 3))
-            resid_kurtosis = float(np.mean(((residuals - resid_mean) / resid_std) ** 4) - 3)
+            if moments:
+                resid_mean = float(np.mean(residuals))
+                resid_std = float(np.std(residuals))
+                resid_skew = float(np.mean(((residuals - resid_mean) / resid_std) ** 3))
+                resid_kurtosis = float(np.mean(((residuals - resid_mean) / resid_std) ** 4) - 3)
             
-            # Ljung-Box test for autocorrelation in residuals
-            from statsmodels.stats.diagnostic import acorr_ljungbox
-            lb_test = acorr_ljungbox(residuals, lags=[10], return_df=True)
-            lb_pvalue = float(lb_test['lb_pvalue'].values[0])
-        else:
-            resid_mean = resid_std = resid_skew = resid_kurtosis = lb_pvalue = None
+            if ljung_box:
+                # Ljung-Box test for autocorrelation in residuals
+                lb_test = acorr_ljungbox(residuals, lags=[10], return_df=True)
+                lb_pvalue = float(lb_test['lb_pvalue'].values[0])
         
         return {
-            "stationarity_test": {
-                "test_name": "Augmented Dickey-Fuller",
-                "adf_statistic": float(adf_result[0]),
-                "p_value": float(adf_result[1]),
-                "critical_values": {
-                    "1%": float(adf_result[4]['1%']),
-                    "5%": float(adf_result[4]['5%']),
-                    "10%": float(adf_result[4]['10%'])
-                },
-                "is_stationary": adf_result[1] < 0.05,
-                "lags_used": int(adf_result[2]),
-                "n_obs": int(adf_result[3])
-            },
-            "acf": acf_values.tolist(),
-            "pacf": pacf_values.tolist(),
-            "residuals": {
-                "mean": resid_mean,
-                "std": resid_std,
-                "skewness": resid_skew,
-                "kurtosis": resid_kurtosis,
-                "ljung_box_pvalue": lb_pvalue,
-                "is_white_noise": lb_pvalue > 0.05 if lb_pvalue else None
-            }
+            "mean": resid_mean,
+            "std": resid_std,
+            "skewness": resid_skew,
+            "kurtosis": resid_kurtosis,
+            "ljung_box_pvalue": lb_pvalue,
+            "is_white_noise": lb_pvalue > 0.05 if lb_pvalue else None
         }
     
     def get_equation(self) -> str:
@@ -199,7 +339,13 @@ class WeatherARIMA:
         ar_params = self.fitted.arparams if len(self.fitted.arparams) > 0 else []
         ma_params = self.fitted.maparams if len(self.fitted.maparams) > 0 else []
         
-        equation = f"ARIMA({p},{d},{q}): "
+        equation = f"ARIMA({p},{d},{q})"
+        if self.seasonal_mode == "native":
+            P, D, Q, period = self.seasonal_order
+            equation += f"({P},{D},{Q})_{period}"
+        elif self.seasonal_mode == "fourier":
+            equation += f" + Fourier(s={self.seasonal_period}, K={self.fourier_terms})"
+        equation += ": "
         
         # AR part
         if len(ar_params) > 0:
@@ -218,9 +364,387 @@ class WeatherARIMA:
         return equation
 
 
+def resolve_diagnostics(diagnostics: Union[str, List[str]]) -> Set[str]:
+    """
+    Turn a diagnostics level ('none', 'basic', 'full') or a list of
+    block names into the set of blocks to compute.
+    """
+    if isinstance(diagnostics, str):
+        if diagnostics not in DIAGNOSTIC_LEVELS:
+            raise ValueError(f"Unknown diagnostics level '{diagnostics}'. Use none, basic or full")
+        return set(DIAGNOSTIC_LEVELS[diagnostics])
+    
+    unknown = set(diagnostics) - set(DIAGNOSTIC_BLOCKS)
+    if unknown:
+        raise ValueError(f"Unknown diagnostic blocks {sorted(unknown)}. Available: {list(DIAGNOSTIC_BLOCKS)}")
+    return set(diagnostics)
+
+
+@lru_cache(maxsize=32)
+def _fourier_cycle(period: int, K: int) -> np.ndarray:
+    """
+    Fourier basis over one full season, computed once per (period, K).
+    
+    Columns: [sin(2π·1·t/s), cos(2π·1·t/s), ..., sin(2π·K·t/s), cos(2π·K·t/s)]
+    """
+    t = np.arange(period)[:, None]
+    k = np.arange(1, K + 1)[None, :]
+    angle = 2 * np.pi * k * t / period
+    basis = np.empty((period, 2 * K))
+    basis[:, 0::2] = np.sin(angle)
+    basis[:, 1::2] = np.cos(angle)
+    basis.setflags(write=False)
+    return basis
+
+
+def fourier_terms(period: int, K: int, start: int, n: int) -> np.ndarray:
+    """
+    Fourier regressors for time steps [start, start + n).
+    
+    The basis is periodic, so rows are gathered from the cached
+    one-season table instead of evaluating sin/cos per step.
+    """
+    return _fourier_cycle(period, K)[(start + np.arange(n)) % period]
+
+
+def choose_differencing(data: np.ndarray, max_d: int = 2, alpha: float = 0.05) -> Dict[str, Any]:
+    """
+    Choose d with repeated ADF tests (same test as WeatherARIMA.diagnostics).
+    
+    The series is differenced until the ADF test rejects a unit root
+    at level alpha, or max_d is reached.
+    
+    Returns:
+        Chosen d and the ADF p-value at each differencing level
+    """
+    series = np.asarray(data, dtype=float)
+    p_values = []
+    for d in range(max_d + 1):
+        p_value = float(adfuller(series, autolag='AIC')[1])
+        p_values.append(p_value)
+        if p_value < alpha or d == max_d:
+            return {"d": d, "adf_p_values": p_values}
+        series = np.diff(series)
+
+
+def _fit_candidate(data: np.ndarray,
+                   order: Tuple[int, int, int],
+                   maxiter: Optional[int] = None,
+                   model_kwargs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Fit one ARIMA candidate (runs in a worker process).
+    
+    maxiter limits the MLE iterations for a cheap partial fit;
+    model_kwargs carries seasonal_order / exog of the seasonal mode.
+    """
+    warnings.filterwarnings('ignore')
+    start = time.perf_counter()
+    try:
+        method_kwargs = {"maxiter": maxiter} if maxiter else {}
+        fitted = ARIMA(data, order=order, **(model_kwargs or {})).fit(method_kwargs=method_kwargs)
+        return {
+            "order": list(order),
+            "aic": float(fitted.aic),
+            "bic": float(fitted.bic),
+            "log_likelihood": float(fitted.llf),
+            "converged": bool(fitted.mle_retvals.get("converged", True)) if fitted.mle_retvals else True,
+            "seconds": time.perf_counter() - start
+        }
+    except Exception as e:
+        return {
+            "order": list(order),
+            "error": str(e),
+            "seconds": time.perf_counter() - start
+        }
+
+
+_worker_pools = []
+_pools_lock = threading.Lock()
+
+
+def worker_count() -> int:
+    """Worker processes, from ARIMA_WORKERS (default: all cores)"""
+    return int(os.getenv("ARIMA_WORKERS", 0)) or os.cpu_count() or 1
+
+
+def _new_pool() -> ProcessPoolExecutor:
+    # Not forked from the server process (see executor.process_context)
+    return ProcessPoolExecutor(max_workers=1, mp_context=executor.process_context())
+
+
+def get_worker_pools() -> List[ProcessPoolExecutor]:
+    """
+    Lazily created worker processes shared by order searches and batch fits.
+    
+    One single-process pool per worker (instead of one N-process pool), so
+    a series can be pinned to a worker: fit_cached's cache lives inside
+    each process, and only a fixed worker sees a series' earlier fits.
+    Callers bound their own concurrency instead of resizing the pools.
+    """
+    with _pools_lock:
+        if not _worker_pools:
+            _worker_pools.extend(_new_pool() for _ in range(worker_count()))
+        return list(_worker_pools)
+
+
+def pool_for_series(series_id: str) -> ProcessPoolExecutor:
+    """Worker a series is pinned to (stable hash of its id)"""
+    pools = get_worker_pools()
+    return pools[int(hashlib.sha1(series_id.encode()).hexdigest()[:8], 16) % len(pools)]
+
+
+def replace_pool(pool: ProcessPoolExecutor):
+    """Swap a broken worker (e.g. killed by the OOM killer) for a fresh one"""
+    with _pools_lock:
+        if pool in _worker_pools:
+            _worker_pools[_worker_pools.index(pool)] = _new_pool()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pools():
+    """Stop all worker processes (app shutdown)"""
+    with _pools_lock:
+        for pool in _worker_pools:
+            pool.shutdown(wait=False, cancel_futures=True)
+        _worker_pools.clear()
+
+
+def _fit_candidates(data: np.ndarray,
+                    orders: List[Tuple[int, int, int]],
+                    maxiter: Optional[int],
+                    n_jobs: Optional[int],
+                    model_kwargs: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Fit candidates in parallel (or serially when n_jobs == 1)"""
+    if n_jobs == 1 or len(orders) == 1:
+        return [_fit_candidate(data, order, maxiter, model_kwargs) for order in orders]
+    
+    # Keep at most n_jobs candidates in flight, each on the least busy worker
+    pools = get_worker_pools()
+    in_flight = [0] * len(pools)
+    limit = n_jobs or len(orders)
+    results = [None] * len(orders)
+    pending = {}
+    queue = list(enumerate(orders))
+    while queue or pending:
+        while queue and len(pending) < limit:
+            i, order = queue.pop(0)
+            worker = in_flight.index(min(in_flight))
+            in_flight[worker] += 1
+            pending[pools[worker].submit(_fit_candidate, data, order, maxiter, model_kwargs)] = (i, worker)
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            i, worker = pending.pop(future)
+            in_flight[worker] -= 1
+            results[i] = future.result()
+    return results
+
+
+def select_order(data: np.ndarray,
+                 max_p: int = 3,
+                 max_q: int = 3,
+                 max_d: int = 2,
+                 criterion: str = "aic",
+                 top_k: int = 3,
+                 prune_iterations: int = 10,
+                 prune_margin: float = 10.0,
+                 n_jobs: Optional[int] = None,
+                 model_kwargs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Automatic ARIMA order selection.
+    
+    Procedure:
+    1. d from repeated ADF tests
+    2. Partial fit (prune_iterations MLE steps) of every (p, q) in the grid
+    3. Prune candidates whose partial criterion is worse than the best
+       partial value by more than prune_margin (already dominated)
+    4. Full fit of the survivors, ranked by AIC or BIC
+    
+    Fits run across a process pool.
+    
+    Args:
+        data: Time series observations
+        max_p: Largest AR order in the grid (clamped to MAX_AUTO_ORDER)
+        max_q: Largest MA order in the grid (clamped to MAX_AUTO_ORDER)
+        max_d: Largest differencing order
+        criterion: Ranking criterion ('aic' or 'bic')
+        top_k: Number of ranked models returned
+        prune_iterations: MLE iterations of the screening fit (0 disables pruning)
+        prune_margin: Criterion gap beyond which a candidate is pruned
+        n_jobs: Worker processes (None = all cores, 1 = serial; at most the core count)
+        model_kwargs: Seasonal terms (seasonal_order / exog) shared by all candidates
+        
+    Returns:
+        Best order, top-k models and per-candidate timings
+    """
+    if criterion not in ("aic", "bic"):
+        raise ValueError("criterion must be 'aic' or 'bic'")
+    
+    max_p = min(max(max_p, 0), MAX_AUTO_ORDER)
+    max_q = min(max(max_q, 0), MAX_AUTO_ORDER)
+    if n_jobs is not None:
+        n_jobs = min(max(n_jobs, 1), os.cpu_count() or 1)
+    
+    start = time.perf_counter()
+    differencing = choose_differencing(data, max_d)
+    d = differencing["d"]
+    
+    orders = [(p, d, q) for p in range(max_p + 1) for q in range(max_q + 1)]
+    
+    # Screening: cheap partial fits, prune dominated candidates
+    pruned = []
+    screening = {}
+    if prune_iterations > 0 and len(orders) > top_k:
+        partial = _fit_candidates(data, orders, prune_iterations, n_jobs, model_kwargs)
+        screening = {tuple(c["order"]): c for c in partial}
+        valid = [c for c in partial if "error" not in c]
+        if valid:
+            best_partial = min(c[criterion] for c in valid)
+            ranked = sorted(valid, key=lambda c: c[criterion])
+            # Always keep at least top_k candidates for the final ranking
+            keep = {tuple(c["order"]) for c in ranked[:top_k]}
+            keep |= {tuple(c["order"]) for c in valid if c[criterion] - best_partial <= prune_margin}
+            pruned = [list(o) for o in orders if o not in keep]
+            orders = [o for o in orders if o in keep]
+    
+    # Full fits of the surviving candidates
+    full = _fit_candidates(data, orders, None, n_jobs, model_kwargs)
+    fitted = sorted([c for c in full if "error" not in c], key=lambda c: c[criterion])
+    if not fitted:
+        raise ValueError("No ARIMA candidate could be fitted")
+    
+    timings = []
+    for c in full:
+        partial_seconds = screening.get(tuple(c["order"]), {}).get("seconds", 0.0)
+        timings.append({
+            "order": c["order"],
+            "seconds": round(partial_seconds + c["seconds"], 4),
+            "error": c.get("error")
+        })
+    for order in pruned:
+        timings.append({
+            "order": order,
+            "seconds": round(screening[tuple(order)]["seconds"], 4),
+            "pruned": True
+        })
+    
+    return {
+        "best_order": tuple(fitted[0]["order"]),
+        "criterion": criterion,
+        "differencing": differencing,
+        "top_models": fitted[:top_k],
+        "candidates_total": (max_p + 1) * (max_q + 1),
+        "candidates_pruned": len(pruned),
+        "candidate_timings": timings,
+        "search_seconds": round(time.perf_counter() - start, 4)
+    }
+
+
+# Fitted models reused across requests, keyed by series identity and order
+_fit_cache = LRUStateStore("arima_fits", capacity=64)
+
+
+def _cache_key(data: np.ndarray,
+               arima: WeatherARIMA,
+               series_id: Optional[str]) -> str:
+    """Cache key from series identity (or data hash), order and seasonal mode"""
+    if series_id is None:
+        identity = hashlib.sha1(data.tobytes()).hexdigest()
+    else:
+        # Readable id plus a hash of the raw id, so "jenin/1" and "jenin:1"
+        # do not share a key after sanitizing
+        identity = re.sub(r"[^A-Za-z0-9_\-]", "_", series_id)
+        identity += "_" + hashlib.sha1(series_id.encode()).hexdigest()[:10]
+    p, d, q = arima.order
+    key = f"{identity}_{p}_{d}_{q}"
+    if arima.seasonal_mode == "native":
+        key += "_s{}_{}_{}_{}".format(*arima.seasonal_order)
+    elif arima.seasonal_mode == "fourier":
+        key += f"_f{arima.seasonal_period}_{arima.fourier_terms}"
+    return key
+
+
+def fit_cached(data: np.ndarray,
+               arima: WeatherARIMA,
+               series_id: Optional[str] = None,
+               refit_every: int = 10) -> Tuple[WeatherARIMA, Dict[str, Any], Dict[str, Any]]:
+    """
+    Fit ARIMA, reusing a cached fit of the same series when possible.
+    
+    - identical data: cached results are reused as-is
+    - cached data is a prefix of the new data: the new tail is appended
+      through the state-space path (parameters re-estimated every
+      refit_every appends, 0 disables periodic refits)
+    - anything else: full MLE fit
+    
+    Args:
+        data: Full series
+        arima: Unfitted model carrying order and seasonal configuration
+        series_id: Stable series name (e.g. governorate + variable);
+                   without it only exact repeats hit the cache
+        refit_every: Appends between parameter re-estimations
+        
+    Returns:
+        Fitted WeatherARIMA, fit statistics, cache info
+    """
+    key = _cache_key(data, arima, series_id)
+    cached = _fit_cache.get(key) if key in _fit_cache else None
+    
+    status = "miss"
+    appended = 0
+    n_appends = 0
+    if cached is not None:
+        old = cached["data"]
+        if len(data) >= len(old) and np.array_equal(data[:len(old)], old):
+            arima.fitted = cached["fitted"]
+            arima.model = arima.fitted.model
+            arima.data = old
+            appended = len(data) - len(old)
+            
+            if appended == 0:
+                status = "hit"
+                n_appends = cached["n_appends"]
+            else:
+                n_appends = cached["n_appends"] + 1
+                refit = refit_every > 0 and n_appends >= refit_every
+                arima.update(data[len(old):], refit=refit)
+                status = "refit" if refit else "append"
+                if refit:
+                    n_appends = 0
+    
+    if status == "miss":
+        arima.fit(data)
+    
+    # Store a fresh entry rather than mutating the shared one
+    _fit_cache.put(key, {
+        "data": arima.data,
+        "fitted": arima.fitted,
+        "n_appends": n_appends
+    })
+    
+    cache_info = {
+        "status": status,
+        "key": key,
+        "appended_points": appended,
+        "appends_since_refit": n_appends,
+        "refit_every": refit_every
+    }
+    return arima, arima.fit_statistics(), cache_info
+
+
 def run_forecast(data: List[float], 
-                 order: Tuple[int, int, int] = (2, 1, 1),
-                 forecast_steps: int = 7) -> Dict[str, Any]:
+                 order: Union[Tuple[int, int, int], str] = (2, 1, 1),
+                 forecast_steps: int = 7,
+                 series_id: Optional[str] = None,
+                 refit_every: int = 10,
+                 max_p: int = 3,
+                 max_q: int = 3,
+                 criterion: str = "aic",
+                 top_k: int = 3,
+                 n_jobs: Optional[int] = None,
+                 seasonal_period: Optional[int] = None,
+                 seasonal_order: Tuple[int, int, int] = (1, 0, 1),
+                 fourier_terms: Optional[int] = None,
+                 diagnostics: Union[str, List[str]] = "full") -> Dict[str, Any]:
     """
     Run ARIMA forecast on weather data.
     
@@ -228,8 +752,19 @@ def run_forecast(data: List[float],
     
     Args:
         data: Historical weather observations
-        order: ARIMA(p, d, q) order tuple
+        order: ARIMA(p, d, q) order tuple, or "auto" for order search
         forecast_steps: Number of future steps to forecast
+        series_id: Stable series name used to reuse cached fits
+        refit_every: Cached appends between parameter re-estimations
+        max_p, max_q: Grid bounds for order="auto"
+        criterion: Ranking criterion for order="auto" ('aic' or 'bic')
+        top_k: Ranked models returned by order="auto"
+        n_jobs: Worker processes for order="auto"
+        seasonal_period: Season length in steps (24 hourly, 365 daily)
+        seasonal_order: (P, D, Q) for short, natively modelled seasons
+        fourier_terms: Fourier pairs K for long seasons (forces Fourier mode)
+        diagnostics: Level ('none', 'basic', 'full') or list of blocks
+                     from DIAGNOSTIC_BLOCKS; skipped blocks are not computed
         
     Returns:
         Complete forecast results with diagnostics
@@ -243,16 +778,38 @@ def run_forecast(data: List[float],
         raise ValueError("At least 10 data points required for ARIMA")
     
     data_array = np.array(data)
+    diagnostic_blocks = resolve_diagnostics(diagnostics)
+    
+    def build_model(model_order):
+        return WeatherARIMA(
+            order=model_order,
+            seasonal_period=seasonal_period,
+            seasonal_order=seasonal_order,
+            fourier_terms=fourier_terms
+        )
     
-    # Initialize and fit model
-    arima = WeatherARIMA(order=order)
-    fit_stats = arima.fit(data_array)
+    # Automatic order selection
+    order_selection = None
+    if isinstance(order, str):
+        if order != "auto":
+            raise ValueError(f"Unknown order '{order}'. Use a (p, d, q) tuple or 'auto'")
+        template = build_model((0, 0, 0))
+        model_kwargs = dict(template.model_kwargs(), exog=template.exog(0, len(data_array)))
+        order_selection = select_order(
+            data_array, max_p=max_p, max_q=max_q,
+            criterion=criterion, top_k=top_k, n_jobs=n_jobs,
+            model_kwargs=model_kwargs
+        )
+        order = order_selection["best_order"]
+    
+    # Fit model (or reuse / extend a cached fit)
+    arima, fit_stats, cache_info = fit_cached(data_array, build_model(order), series_id, refit_every)
     
     # Generate forecast
     forecast = arima.forecast(forecast_steps)
     
-    # Run diagnostics
-    diagnostics = arima.diagnostics(data_array)
+    # Run requested diagnostics only
+    diagnostics_result = arima.diagnostics(data_array, diagnostic_blocks)
     
     # Determine trend
     diff = np.diff(data_array)
@@ -263,7 +820,7 @@ def run_forecast(data: List[float],
     residuals = arima.fitted.resid
     mae = float(np.mean(np.abs(residuals)))
     rmse = float(np.sqrt(np.mean(residuals**2)))
-    mape = float(np.mean(np.abs(residuals / data_array[1:])) * 100) if np.all(data_array[1:] != 0) else None
+    mape = float(np.mean(np.abs(residuals[1:] / data_array[1:])) * 100) if np.all(data_array[1:] != 0) else None
     
     return {
         "algorithm": "ARIMA",
@@ -271,11 +828,17 @@ def run_forecast(data: List[float],
         "version": "0.14.1",
         "reference": "Box, G.E.P., Jenkins, G.M. (1970). Time Series Analysis: Forecasting and Control",
         "mathematical_formulation": {
-            "full_equation": arima.get_equation(),
+            "full_equation": arima.get_equation() if "equation" in diagnostic_blocks else None,
             "ar_component": f"φ(L) = 1 - Σ_{{i=1}}^{{{order[0]}}} φ_i * L^i",
             "ma_component": f"θ(L) = 1 + Σ_{{j=1}}^{{{order[2]}}} θ_j * L^j",
             "differencing": f"(1-L)^{order[1]} * y_t"
         },
+        "seasonality": {
+            "mode": arima.seasonal_mode,
+            "period": arima.seasonal_period,
+            "seasonal_order": list(arima.seasonal_order[:3]) if arima.seasonal_mode == "native" else None,
+            "fourier_terms": arima.fourier_terms or None
+        },
         "parameters": {
             "p": order[0],
             "d": order[1], 
@@ -287,8 +850,11 @@ def run_forecast(data: List[float],
             }
         },
         "fit_statistics": fit_stats,
+        "fit_cache": cache_info,
+        "order_selection": order_selection,
         "forecast": forecast,
-        "diagnostics": diagnostics,
+        "diagnostics": diagnostics_result,
+        "diagnostics_computed": sorted(diagnostic_blocks),
         "in_sample_metrics": {
             "mae": mae,
             "rmse": rmse,
@@ -305,6 +871,40 @@ def run_forecast(data: List[float],
     }
 
 
+def _json_default(obj):
+    """JSON fallback for NumPy scalars and arrays"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def forecast_series(name: str, params: Dict[str, Any]) -> str:
+    """
+    Forecast one named series of a batch (runs in a worker process).
+    
+    Order searches inside a worker run serially so batch concurrency
+    is controlled by the batch alone. The result is serialized to a
+    JSON line here, off the API event loop.
+    
+    Args:
+        name: Series name (e.g. "gaza_temperature")
+        params: Keyword arguments for run_forecast
+        
+    Returns:
+        One NDJSON line with status, timing and result or error
+    """
+    start = time.perf_counter()
+    try:
+        result = run_forecast(**dict(params, n_jobs=1))
+        item = {"series": name, "status": "ok", "result": result}
+    except Exception as e:
+        item = {"series": name, "status": "error", "error": str(e)}
+    item["seconds"] = round(time.perf_counter() - start, 4)
+    return json.dumps(item, default=_json_default) + "\n"
+
+
 def get_source_code() -> str:
     """Return the source code of the WeatherARIMA class"""
     return inspect.getsource(WeatherARIMA)
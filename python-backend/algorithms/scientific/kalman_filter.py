@@ -11,9 +11,15 @@ Journal of Basic Engineering, 82(1), 35-45.
 
 import numpy as np
 from filterpy.kalman import KalmanFilter as KF
-from typing import List, Dict, Any
+from scipy.linalg import solve_discrete_are
+from scipy.signal import lfilter, ss2tf
+from typing import List, Dict, Any, Optional
+from collections import deque
+from datetime import datetime
 import inspect
 
+from services.state_store import LRUStateStore
+
 
 class WeatherKalmanFilter:
     """
@@ -80,6 +86,9 @@ class WeatherKalmanFilter:
         # Initial state estimate
         self.kf.x = np.array([[0.], [0.]])
         
+        # Stored predicted/filtered moments of the last run (for smoothing)
+        self.history = None
+        
     def configure(self, process_noise: float, measurement_noise: float):
         """
         Configure noise parameters.
@@ -118,6 +127,7 @@ class WeatherKalmanFilter:
         gains = []
         uncertainties = []
         innovations = []
+        self._init_history(len(observations))
         
         # Initialize state with first observation
         self.kf.x = np.array([[observations[0]], [0.]])
@@ -127,6 +137,8 @@ class WeatherKalmanFilter:
             # x̂_k|k-1 = F @ x̂_{k-1|k-1}
             # P_k|k-1 = F @ P_{k-1|k-1} @ F^T + Q
             self.kf.predict()
+            self.history["x_pred"][i] = self.kf.x[:, 0]
+            self.history["P_pred"][i] = self.kf.P
             
             # Calculate innovation (measurement residual)
             # y_k = z_k - H @ x̂_k|k-1
@@ -144,6 +156,8 @@ class WeatherKalmanFilter:
             velocities.append(float(self.kf.x[1, 0]))
             gains.append(float(self.kf.K[0, 0]))
             uncertainties.append(float(self.kf.P[0, 0]))
+            self.history["x_filt"][i] = self.kf.x[:, 0]
+            self.history["P_filt"][i] = self.kf.P
             
         return {
             "filtered": filtered,
@@ -158,6 +172,201 @@ class WeatherKalmanFilter:
             "final_covariance": self.kf.P.tolist()
         }
     
+    def steady_state_gain(self) -> Dict[str, np.ndarray]:
+        """
+        Solve the discrete algebraic Riccati equation for the limit gain.
+        
+        With fixed F, H, Q, R the predicted covariance converges to the
+        DARE solution:
+            P = F P F^T - F P H^T (H P H^T + R)^{-1} H P F^T + Q
+            K_ss = P H^T (H P H^T + R)^{-1}
+            
+        Returns:
+            Dictionary with steady-state gain, predicted and filtered covariances
+        """
+        F, H, Q, R = self.kf.F, self.kf.H, self.kf.Q, self.kf.R
+        P_pred = solve_discrete_are(F.T, H.T, Q, R)
+        S = H @ P_pred @ H.T + R
+        K = P_pred @ H.T @ np.linalg.inv(S)
+        P_filt = (np.eye(F.shape[0]) - K @ H) @ P_pred
+        return {"gain": K, "P_pred": P_pred, "P_filt": P_filt}
+    
+    def filter_data_steady_state(self, 
+                                 observations: List[float],
+                                 tolerance: float = 1e-8) -> Dict[str, Any]:
+        """
+        Apply Kalman filter, switching to a constant-gain recursion once
+        the gain has converged to its steady-state value.
+        
+        Constant-gain recursion (after the switch step):
+            x̂_k = (I - K H) F x̂_{k-1} + K z_k
+            
+        This is a linear time-invariant system, so it is evaluated as
+        an IIR filter with scipy.signal.lfilter instead of a Python loop.
+        
+        Args:
+            observations: List of noisy measurements
+            tolerance: Max absolute gain difference to accept convergence
+            
+        Returns:
+            Same fields as filter_data, plus the step that switched
+            to the fast path (None if the gain never converged)
+        """
+        try:
+            steady = self.steady_state_gain()
+        except (np.linalg.LinAlgError, ValueError):
+            # Degenerate noise setup: no stable DARE solution
+            result = self.filter_data(observations)
+            result["switch_step"] = None
+            result["steady_state_gain"] = None
+            return result
+        K_ss = steady["gain"]
+        
+        z_all = np.asarray(observations, dtype=float)
+        n = len(z_all)
+        filtered = np.empty(n)
+        velocities = np.empty(n)
+        gains = np.empty(n)
+        uncertainties = np.empty(n)
+        innovations = np.empty(n)
+        self._init_history(n)
+        
+        # Initialize state with first observation
+        self.kf.x = np.array([[z_all[0]], [0.]])
+        
+        # === TRANSIENT PHASE: full recursion until K converges ===
+        switch_step = None
+        for i in range(n):
+            self.kf.predict()
+            self.history["x_pred"][i] = self.kf.x[:, 0]
+            self.history["P_pred"][i] = self.kf.P
+            innovations[i] = z_all[i] - (self.kf.H @ self.kf.x).item()
+            self.kf.update(np.array([[z_all[i]]]))
+            self.history["x_filt"][i] = self.kf.x[:, 0]
+            self.history["P_filt"][i] = self.kf.P
+            
+            filtered[i] = self.kf.x[0, 0]
+            velocities[i] = self.kf.x[1, 0]
+            gains[i] = self.kf.K[0, 0]
+            uncertainties[i] = self.kf.P[0, 0]
+            
+            if np.max(np.abs(self.kf.K - K_ss)) < tolerance:
+                switch_step = i + 1
+                break
+        
+        # === STEADY-STATE PHASE: closed-form LTI recursion ===
+        if switch_step is not None and switch_step < n:
+            z = z_all[switch_step:]
+            F, H = self.kf.F, self.kf.H
+            A = (np.eye(2) - K_ss @ H) @ F
+            s0 = self.kf.x[:, 0]
+            
+            # States s_k = x̂_{k-1}:  s_{k+1} = A s_k + K z_k,  x̂_k = A s_k + K z_k
+            for row, out in enumerate((filtered, velocities)):
+                C = A[row:row + 1, :]
+                D = K_ss[row:row + 1, :]
+                num, den = ss2tf(A, K_ss, C, D)
+                forced = lfilter(num[0], den, z)
+                
+                # Zero-input response from the switch state,
+                # generated by the same denominator recursion
+                y0 = (C @ s0).item()
+                y1 = (C @ A @ s0).item()
+                impulse = np.zeros_like(z)
+                impulse[0] = y0
+                if len(z) > 1:
+                    impulse[1] = y1 + den[1] * y0
+                free = lfilter([1.0], den, impulse)
+                
+                out[switch_step:] = forced + free
+            
+            # Innovations against the one-step prediction H F x̂_{k-1}
+            prev_pos = filtered[switch_step - 1:-1]
+            prev_vel = velocities[switch_step - 1:-1]
+            innovations[switch_step:] = z - (prev_pos + prev_vel)
+            gains[switch_step:] = K_ss[0, 0]
+            uncertainties[switch_step:] = steady["P_filt"][0, 0]
+            
+            # Moments for smoothing: covariances are constant after the switch
+            self.history["x_filt"][switch_step:, 0] = filtered[switch_step:]
+            self.history["x_filt"][switch_step:, 1] = velocities[switch_step:]
+            self.history["x_pred"][switch_step:] = self.history["x_filt"][switch_step - 1:-1] @ F.T
+            self.history["P_filt"][switch_step:] = steady["P_filt"]
+            self.history["P_pred"][switch_step:] = steady["P_pred"]
+            
+            # Leave the filter at the final steady state for forecasting
+            self.kf.x = np.array([[filtered[-1]], [velocities[-1]]])
+            self.kf.P = steady["P_filt"].copy()
+            self.kf.K = K_ss.copy()
+        
+        return {
+            "filtered": filtered.tolist(),
+            "velocities": velocities.tolist(),
+            "kalman_gains": gains.tolist(),
+            "uncertainties": uncertainties.tolist(),
+            "innovations": innovations.tolist(),
+            "final_state": {
+                "position": float(self.kf.x[0, 0]),
+                "velocity": float(self.kf.x[1, 0])
+            },
+            "final_covariance": self.kf.P.tolist(),
+            "switch_step": switch_step,
+            "steady_state_gain": K_ss[:, 0].tolist()
+        }
+    
+    def get_state(self) -> Dict[str, np.ndarray]:
+        """Snapshot of x, P, Q, R for persisting the filter between calls"""
+        return {
+            "x": self.kf.x.copy(),
+            "P": self.kf.P.copy(),
+            "Q": self.kf.Q.copy(),
+            "R": self.kf.R.copy()
+        }
+    
+    def set_state(self, state: Dict[str, np.ndarray]):
+        """Restore a snapshot produced by get_state"""
+        self.kf.x = np.array(state["x"], dtype=float)
+        self.kf.P = np.array(state["P"], dtype=float)
+        self.kf.Q = np.array(state["Q"], dtype=float)
+        self.kf.R = np.array(state["R"], dtype=float)
+    
+    def _init_history(self, n: int):
+        """Allocate storage for predicted and filtered moments"""
+        dim_x = self.kf.dim_x
+        self.history = {
+            "x_pred": np.empty((n, dim_x)),
+            "P_pred": np.empty((n, dim_x, dim_x)),
+            "x_filt": np.empty((n, dim_x)),
+            "P_filt": np.empty((n, dim_x, dim_x))
+        }
+    
+    def rts_smooth(self) -> Dict[str, Any]:
+        """
+        Rauch-Tung-Striebel backward pass over the last filter run.
+        
+        Uses the stored predicted and filtered moments, so the forward
+        filter is not re-run:
+            C_k = P_k|k @ F^T @ P_{k+1|k}^{-1}
+            x̂_k|n = x̂_k|k + C_k @ (x̂_{k+1|n} - x̂_{k+1|k})
+            P_k|n = P_k|k + C_k @ (P_{k+1|n} - P_{k+1|k}) @ C_k^T
+            
+        Returns:
+            Smoothed positions, velocities and position variances
+        """
+        if self.history is None:
+            raise ValueError("Filter must be run before smoothing")
+        
+        xs, Ps = _rts_backward(
+            self.history["x_filt"], self.history["P_filt"],
+            self.history["x_pred"], self.history["P_pred"],
+            self.kf.F
+        )
+        return {
+            "smoothed": xs[:, 0].tolist(),
+            "velocities": xs[:, 1].tolist(),
+            "uncertainties": Ps[:, 0, 0].tolist()
+        }
+    
     def forecast(self, steps: int) -> List[float]:
         """
         Forecast future values by iterating predict step.
@@ -184,9 +393,276 @@ class WeatherKalmanFilter:
         return forecasts
 
 
+def _rts_backward(x_filt: np.ndarray,
+                  P_filt: np.ndarray,
+                  x_pred: np.ndarray,
+                  P_pred: np.ndarray,
+                  F: np.ndarray):
+    """
+    RTS backward recursion over stored moments.
+    
+    Row k of x_pred/P_pred is the prediction for step k made from step k-1,
+    so the smoother gain at k uses the prediction stored at k+1.
+    """
+    xs = x_filt.copy()
+    Ps = P_filt.copy()
+    for k in range(len(xs) - 2, -1, -1):
+        C = P_filt[k] @ F.T @ np.linalg.inv(P_pred[k + 1])
+        xs[k] = x_filt[k] + C @ (xs[k + 1] - x_pred[k + 1])
+        Ps[k] = P_filt[k] + C @ (Ps[k + 1] - P_pred[k + 1]) @ C.T
+    return xs, Ps
+
+
+class FixedLagKalmanSmoother:
+    """
+    Streaming fixed-lag smoother for weather sensor feeds.
+    
+    Emits x̂_{k-L|k}: the estimate for L steps ago using all data up to
+    now. Only the last L+1 predicted/filtered moments are kept, and each
+    new observation runs an RTS backward pass over that window, so both
+    memory and per-step cost are O(L) regardless of stream length.
+    
+    The windowed RTS pass is exact: smoothing step k-L with data up to k
+    only needs the filter moments from k-L to k.
+    """
+    
+    def __init__(self, 
+                 lag: int = 5,
+                 process_noise: float = 0.1,
+                 measurement_noise: float = 1.0):
+        """
+        Initialize fixed-lag smoother.
+        
+        Args:
+            lag: Smoothing lag L in steps
+            process_noise: Q matrix scaling factor
+            measurement_noise: R value
+        """
+        if lag < 1:
+            raise ValueError("Lag must be at least 1")
+        
+        self.lag = lag
+        self.filter = WeatherKalmanFilter()
+        self.filter.configure(process_noise, measurement_noise)
+        self.window = deque(maxlen=lag + 1)
+        self.n_seen = 0
+        
+    def update(self, z: float) -> Optional[Dict[str, float]]:
+        """
+        Absorb one observation.
+        
+        Args:
+            z: New measurement
+            
+        Returns:
+            Smoothed estimate for step (n_seen - 1 - lag), or None while
+            the first lag observations are still filling the window
+        """
+        kf = self.filter.kf
+        if self.n_seen == 0:
+            kf.x = np.array([[z], [0.]])
+        
+        kf.predict()
+        x_pred, P_pred = kf.x[:, 0].copy(), kf.P.copy()
+        kf.update(np.array([[z]]))
+        self.window.append((kf.x[:, 0].copy(), kf.P.copy(), x_pred, P_pred))
+        self.n_seen += 1
+        
+        if len(self.window) <= self.lag:
+            return None
+        
+        xs, Ps = self._smooth_window()
+        return {
+            "step": self.n_seen - 1 - self.lag,
+            "smoothed": float(xs[0, 0]),
+            "velocity": float(xs[0, 1]),
+            "uncertainty": float(Ps[0, 0, 0])
+        }
+    
+    def flush(self) -> List[Dict[str, float]]:
+        """
+        Smooth the tail of the stream still held in the window.
+        
+        Returns:
+            Estimates for the last min(lag, n_seen) steps, oldest first
+        """
+        if not self.window:
+            return []
+        
+        xs, Ps = self._smooth_window()
+        
+        # Oldest window entry was already emitted once the window was full
+        start = 1 if len(self.window) > self.lag else 0
+        first_step = self.n_seen - len(self.window)
+        return [
+            {
+                "step": first_step + i,
+                "smoothed": float(xs[i, 0]),
+                "velocity": float(xs[i, 1]),
+                "uncertainty": float(Ps[i, 0, 0])
+            }
+            for i in range(start, len(self.window))
+        ]
+    
+    def _smooth_window(self):
+        """Run RTS over the buffered window"""
+        x_filt, P_filt, x_pred, P_pred = (np.array(a) for a in zip(*self.window))
+        return _rts_backward(x_filt, P_filt, x_pred, P_pred, self.filter.kf.F)
+
+
+class BatchWeatherKalmanFilter:
+    """
+    Vectorized Kalman Filter for many weather series at once.
+    
+    Runs the same constant-velocity model as WeatherKalmanFilter, but
+    keeps one state per series and advances all of them together:
+    
+        x: (n_series, 2)       stacked [position, velocity] states
+        P: (n_series, 2, 2)    stacked state covariances
+    
+    Every predict/update step is a handful of NumPy operations broadcast
+    over the series axis, so the Python loop runs over time steps only.
+    
+    Missing Observations:
+    ====================
+    NaN entries are treated as missing: the affected series only run
+    the predict step, so stations with gaps or different record
+    lengths can share one (n_series, n_steps) array.
+    """
+    
+    def __init__(self, n_series: int):
+        """
+        Initialize batch filter.
+        
+        Args:
+            n_series: Number of independent series filtered together
+        """
+        self.n_series = n_series
+        
+        # Same model as WeatherKalmanFilter
+        self.F = np.array([
+            [1., 1.],
+            [0., 1.]
+        ])
+        self.H = np.array([1., 0.])
+        
+        self.x = np.zeros((n_series, 2))
+        self.P = np.tile(np.eye(2) * 1000., (n_series, 1, 1))
+        self.Q = np.zeros((2, 2))
+        self.R = 1.0
+        
+    def configure(self, process_noise: float, measurement_noise: float):
+        """
+        Configure noise parameters (shared by all series).
+        
+        Args:
+            process_noise: Scaling factor for process noise covariance Q
+            measurement_noise: Measurement noise variance R
+        """
+        self.Q = np.array([
+            [0.25, 0.5],
+            [0.5, 1.0]
+        ]) * process_noise
+        self.R = float(measurement_noise)
+        
+    def predict(self):
+        """Predict step for all series: x = F x, P = F P F^T + Q"""
+        self.x = self.x @ self.F.T
+        self.P = self.F @ self.P @ self.F.T + self.Q
+        
+    def update(self, z: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Update step for all series with one observation each.
+        
+        Args:
+            z: Observations (n_series,), NaN for missing
+            
+        Returns:
+            Innovations and position gains for this step
+        """
+        observed = ~np.isnan(z)
+        
+        # S = H P H^T + R and K = P H^T / S reduce to column 0 of P
+        innovation = np.where(observed, z - self.x[:, 0], 0.0)
+        S = self.P[:, 0, 0] + self.R
+        K = self.P[:, :, 0] / S[:, None]
+        K[~observed] = 0.0
+        
+        self.x = self.x + K * innovation[:, None]
+        
+        # P = (I - K H) P
+        self.P = self.P - K[:, :, None] * self.P[:, None, 0, :]
+        
+        return {
+            "innovation": np.where(observed, innovation, np.nan),
+            "gain": K[:, 0]
+        }
+        
+    def filter_data(self, observations: np.ndarray) -> Dict[str, Any]:
+        """
+        Apply the filter to every row of an observation matrix.
+        
+        Args:
+            observations: Array of shape (n_series, n_steps)
+            
+        Returns:
+            Dictionary of (n_series, n_steps) arrays plus final states
+        """
+        n_series, n_steps = observations.shape
+        
+        filtered = np.empty((n_series, n_steps))
+        velocities = np.empty((n_series, n_steps))
+        gains = np.empty((n_series, n_steps))
+        uncertainties = np.empty((n_series, n_steps))
+        innovations = np.empty((n_series, n_steps))
+        
+        # Initialize each state with its first valid observation
+        first_valid = np.argmax(~np.isnan(observations), axis=1)
+        self.x = np.zeros((n_series, 2))
+        self.x[:, 0] = observations[np.arange(n_series), first_valid]
+        
+        for k in range(n_steps):
+            self.predict()
+            step = self.update(observations[:, k])
+            
+            filtered[:, k] = self.x[:, 0]
+            velocities[:, k] = self.x[:, 1]
+            gains[:, k] = step["gain"]
+            uncertainties[:, k] = self.P[:, 0, 0]
+            innovations[:, k] = step["innovation"]
+            
+        return {
+            "filtered": filtered,
+            "velocities": velocities,
+            "kalman_gains": gains,
+            "uncertainties": uncertainties,
+            "innovations": innovations,
+            "final_states": self.x.copy(),
+            "final_covariances": self.P.copy()
+        }
+    
+    def forecast(self, steps: int) -> np.ndarray:
+        """
+        Forecast all series without altering the filter state.
+        
+        Args:
+            steps: Number of future steps to forecast
+            
+        Returns:
+            Array of shape (n_series, steps)
+        """
+        # Constant velocity: x_{k+h} = position + h * velocity
+        horizon = np.arange(1, steps + 1)
+        return self.x[:, :1] + self.x[:, 1:] * horizon
+
+
 def run_filter(data: List[float], 
                process_noise: float = 0.1, 
-               measurement_noise: float = 1.0) -> Dict[str, Any]:
+               measurement_noise: float = 1.0,
+               steady_state: bool = False,
+               gain_tolerance: float = 1e-8,
+               smoother: Optional[str] = None,
+               lag: int = 5) -> Dict[str, Any]:
     """
     Run Kalman filter on weather data.
     
@@ -196,6 +672,11 @@ def run_filter(data: List[float],
         data: Raw temperature/precipitation observations
         process_noise: Q matrix scaling factor (smaller = smoother)
         measurement_noise: R value (larger = trust model more)
+        steady_state: Switch to the constant steady-state gain once converged
+        gain_tolerance: Gain convergence threshold for the steady-state switch
+        smoother: Optional smoothing pass: 'rts' (full backward pass)
+                  or 'fixed_lag' (streaming, bounded lag)
+        lag: Lag in steps for fixed-lag smoothing
         
     Returns:
         Complete filter results with statistics and diagnostics
@@ -207,13 +688,18 @@ def run_filter(data: List[float],
     """
     if len(data) < 3:
         raise ValueError("At least 3 data points required")
+    if smoother not in (None, "rts", "fixed_lag"):
+        raise ValueError(f"Unknown smoother '{smoother}'. Use 'rts' or 'fixed_lag'")
     
     # Initialize and configure filter
     kf = WeatherKalmanFilter()
     kf.configure(process_noise, measurement_noise)
     
     # Run filtering
-    result = kf.filter_data(data)
+    if steady_state:
+        result = kf.filter_data_steady_state(data, gain_tolerance)
+    else:
+        result = kf.filter_data(data)
     
     # Generate 7-day forecast
     forecast = kf.forecast(7)
@@ -229,7 +715,7 @@ def run_filter(data: List[float],
     # Calculate average innovation (should be near zero for well-tuned filter)
     avg_innovation = np.mean(np.abs(result["innovations"]))
     
-    return {
+    response = {
         "algorithm": "Kalman Filter",
         "library": "filterpy",
         "version": "1.4.5",
@@ -269,6 +755,260 @@ def run_filter(data: List[float],
             "signal_to_noise_improvement": round(original_variance / filtered_variance if filtered_variance > 0 else 1, 2)
         }
     }
+    
+    if steady_state:
+        response["steady_state"] = {
+            "switch_step": result["switch_step"],
+            "converged": result["switch_step"] is not None,
+            "steady_state_gain": result["steady_state_gain"],
+            "gain_tolerance": gain_tolerance,
+            "fast_path_steps": len(data) - result["switch_step"] if result["switch_step"] else 0
+        }
+    
+    if smoother == "rts":
+        smoothed = kf.rts_smooth()
+        response["smoothing"] = {
+            "method": "Rauch-Tung-Striebel",
+            "reference": "Rauch, Tung & Striebel (1965). AIAA Journal, 3(8)",
+            "smoothed_all": smoothed["smoothed"],
+            "velocities": smoothed["velocities"][-5:],
+            "uncertainties": smoothed["uncertainties"],
+            "rmse_vs_data": round(float(np.sqrt(np.mean((np.array(data) - np.array(smoothed["smoothed"]))**2))), 4)
+        }
+    elif smoother == "fixed_lag":
+        fls = FixedLagKalmanSmoother(lag, process_noise, measurement_noise)
+        emitted = [est for est in (fls.update(z) for z in data) if est is not None]
+        emitted.extend(fls.flush())
+        response["smoothing"] = {
+            "method": "Fixed-lag RTS",
+            "lag": lag,
+            "smoothed_all": [est["smoothed"] for est in emitted],
+            "uncertainties": [est["uncertainty"] for est in emitted]
+        }
+    
+    return response
+
+
+def run_batch_filter(data: List[List[Optional[float]]],
+                     process_noise: float = 0.1,
+                     measurement_noise: float = 1.0,
+                     series_ids: Optional[List[str]] = None,
+                     forecast_steps: int = 7) -> Dict[str, Any]:
+    """
+    Run the Kalman filter on many weather series in one call.
+    
+    Args:
+        data: Matrix of shape (n_series, n_steps); None/NaN marks missing
+        process_noise: Q matrix scaling factor (smaller = smoother)
+        measurement_noise: R value (larger = trust model more)
+        series_ids: Optional names (stations, governorates) per row
+        forecast_steps: Number of future steps to forecast per series
+        
+    Returns:
+        Filtered series, forecasts and per-series metrics
+        
+    Example:
+        >>> stations = [[20.1, 20.5, 21.2, 20.8], [15.0, None, 15.6, 16.1]]
+        >>> result = run_batch_filter(stations, series_ids=["jenin", "hebron"])
+        >>> print(result['output']['series']['jenin']['forecast'])
+    """
+    observations = np.array(data, dtype=float)
+    if observations.ndim != 2:
+        raise ValueError("Batch data must be a 2-D array (n_series, n_steps)")
+    
+    n_series, n_steps = observations.shape
+    if n_steps < 3:
+        raise ValueError("At least 3 data points required")
+    
+    valid_counts = np.sum(~np.isnan(observations), axis=1)
+    if np.any(valid_counts == 0):
+        raise ValueError("Every series needs at least one observation")
+    
+    if series_ids is None:
+        series_ids = [f"series_{i}" for i in range(n_series)]
+    if len(series_ids) != n_series:
+        raise ValueError("series_ids length must match number of series")
+    
+    # Initialize and configure filter
+    kf = BatchWeatherKalmanFilter(n_series)
+    kf.configure(process_noise, measurement_noise)
+    
+    # Run filtering and forecast
+    result = kf.filter_data(observations)
+    forecast = kf.forecast(forecast_steps)
+    
+    # Quality metrics per series (NaN-aware)
+    residuals = observations - result["filtered"]
+    rmse = np.sqrt(np.nanmean(residuals ** 2, axis=1))
+    original_variance = np.nanvar(observations, axis=1)
+    filtered_variance = np.var(result["filtered"], axis=1)
+    avg_innovation = np.nanmean(np.abs(result["innovations"]), axis=1)
+    
+    series = {}
+    for i, name in enumerate(series_ids):
+        noise_reduction = (1 - filtered_variance[i] / original_variance[i]) * 100 if original_variance[i] > 0 else 0
+        series[name] = {
+            "filtered_all": result["filtered"][i].tolist(),
+            "forecast": forecast[i].tolist(),
+            "final_state": {
+                "position": float(result["final_states"][i, 0]),
+                "velocity": float(result["final_states"][i, 1])
+            },
+            "final_kalman_gain": float(result["kalman_gains"][i, -1]),
+            "final_uncertainty": float(result["uncertainties"][i, -1]),
+            "metrics": {
+                "observations": int(valid_counts[i]),
+                "noise_reduction_percent": round(max(0, float(noise_reduction)), 2),
+                "rmse": round(float(rmse[i]), 4),
+                "avg_innovation": float(avg_innovation[i])
+            }
+        }
+    
+    return {
+        "algorithm": "Batch Kalman Filter",
+        "library": "numpy",
+        "version": np.__version__,
+        "reference": "Kalman, R.E. (1960). A New Approach to Linear Filtering and Prediction Problems",
+        "mathematical_formulation": {
+            "state_transition": "x_k = F @ x_{k-1} + w_k",
+            "measurement": "z_k = H @ x_k + v_k",
+            "kalman_gain": "K = P @ H^T @ (H @ P @ H^T + R)^{-1}",
+            "vectorization": "All series advanced together, broadcasting over the series axis"
+        },
+        "input": {
+            "n_series": n_series,
+            "n_steps": n_steps,
+            "missing_values": int(n_series * n_steps - valid_counts.sum()),
+            "process_noise": process_noise,
+            "measurement_noise": measurement_noise
+        },
+        "output": {
+            "series": series
+        }
+    }
+
+
+# Persisted filter states for incremental sessions
+_sessions = LRUStateStore("kalman_sessions", capacity=1024)
+
+
+def create_session(process_noise: float = 0.1,
+                   measurement_noise: float = 1.0,
+                   data: Optional[List[float]] = None) -> Dict[str, Any]:
+    """
+    Create a persisted Kalman filter session.
+    
+    Args:
+        process_noise: Q matrix scaling factor
+        measurement_noise: R value
+        data: Optional history to absorb before the first update
+        
+    Returns:
+        Session id and current filter state
+    """
+    kf = WeatherKalmanFilter()
+    kf.configure(process_noise, measurement_noise)
+    
+    session = {
+        "state": kf.get_state(),
+        "n_observations": 0,
+        "process_noise": process_noise,
+        "measurement_noise": measurement_noise,
+        "created_at": datetime.utcnow().isoformat()
+    }
+    session_id = _sessions.new_key()
+    _sessions.put(session_id, session)
+    
+    if data:
+        return update_session(session_id, data)
+    return _session_summary(session_id, session, [])
+
+
+def update_session(session_id: str, observations: List[float]) -> Dict[str, Any]:
+    """
+    Absorb new observations into a session, O(1) per observation.
+    
+    Args:
+        session_id: Id returned by create_session
+        observations: Only the readings received since the last update
+        
+    Returns:
+        Filtered values for the new observations and the updated state
+    """
+    if not observations:
+        raise ValueError("At least one observation required")
+    
+    def absorb(session: Dict[str, Any]):
+        kf = WeatherKalmanFilter()
+        kf.set_state(session["state"])
+        
+        # First reading of a fresh session initializes the position
+        if session["n_observations"] == 0:
+            kf.kf.x = np.array([[observations[0]], [0.]])
+        
+        estimates = []
+        for z in observations:
+            kf.kf.predict()
+            innovation = z - (kf.kf.H @ kf.kf.x).item()
+            kf.kf.update(np.array([[z]]))
+            estimates.append({
+                "filtered": float(kf.kf.x[0, 0]),
+                "velocity": float(kf.kf.x[1, 0]),
+                "kalman_gain": float(kf.kf.K[0, 0]),
+                "innovation": float(innovation)
+            })
+        
+        # New dict, so readers of the old entry never see a partial update
+        updated = {
+            **session,
+            "state": kf.get_state(),
+            "n_observations": session["n_observations"] + len(observations),
+            "updated_at": datetime.utcnow().isoformat()
+        }
+        return updated, _session_summary(session_id, updated, estimates, kf.forecast(7))
+    
+    # Serialized per session: concurrent batches are applied one after another
+    return _sessions.update(session_id, absorb)
+
+
+def get_session(session_id: str) -> Dict[str, Any]:
+    """Return the current state of a session"""
+    session = _sessions.get(session_id)
+    kf = WeatherKalmanFilter()
+    kf.set_state(session["state"])
+    forecast = kf.forecast(7) if session["n_observations"] > 0 else []
+    return _session_summary(session_id, session, [], forecast)
+
+
+def delete_session(session_id: str) -> Dict[str, Any]:
+    """Drop a session from memory and disk"""
+    _sessions.delete(session_id)
+    return {"session_id": session_id, "deleted": True}
+
+
+def _session_summary(session_id: str,
+                     session: Dict[str, Any],
+                     estimates: List[Dict[str, float]],
+                     forecast: Optional[List[float]] = None) -> Dict[str, Any]:
+    """Build the API response for a session"""
+    state = session["state"]
+    return {
+        "algorithm": "Kalman Filter (session)",
+        "library": "filterpy",
+        "session_id": session_id,
+        "n_observations": session["n_observations"],
+        "process_noise": session["process_noise"],
+        "measurement_noise": session["measurement_noise"],
+        "created_at": session["created_at"],
+        "updated_at": session.get("updated_at"),
+        "estimates": estimates,
+        "forecast_7_steps": forecast or [],
+        "state": {
+            "position": float(state["x"][0, 0]),
+            "velocity": float(state["x"][1, 0]),
+            "covariance": state["P"].tolist()
+        }
+    }
 
 
 def get_source_code() -> str:
@@ -10,11 +10,15 @@ Real Scientific & Quantum ML Algorithms
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Tuple, Union
 import numpy as np
+import asyncio
+import json
 import os
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
 from datetime import datetime
 
 # Import algorithm modules
@@ -40,12 +44,21 @@ from algorithms.quantum import (
     qnn_regression,
     grover_search
 )
-from services import ibm_quantum_service, weather_processor
+from services import ibm_quantum_service, weather_processor, executor, state_store
+from services.model_registry import registry
 
 # ==============================================
 # FastAPI App Configuration
 # ==============================================
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Persist in-memory sessions and cached fits, then stop the worker pools
+    state_store.flush_all()
+    executor.shutdown()
+    arima_model.shutdown_pools()
+
 app = FastAPI(
     title="QANWP-AI Python Backend",
     description="""
@@ -60,7 +73,8 @@ app = FastAPI(
     """,
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # CORS Configuration
@@ -81,12 +95,50 @@ class KalmanRequest(BaseModel):
     data: List[float] = Field(..., description="Time series data")
     process_noise: float = Field(0.1, description="Process noise (Q)")
     measurement_noise: float = Field(1.0, description="Measurement noise (R)")
+    steady_state: bool = Field(False, description="Use steady-state gain fast path once converged")
+    gain_tolerance: float = Field(1e-8, description="Gain convergence threshold for the fast path")
+    smoother: Optional[str] = Field(None, description="Smoothing pass (rts/fixed_lag)")
+    lag: int = Field(5, description="Lag in steps for fixed-lag smoothing")
+
+class KalmanBatchRequest(BaseModel):
+    """Batch Kalman Filter Request"""
+    data: List[List[Optional[float]]] = Field(..., description="Series matrix (n_series, n_steps), null for missing")
+    series_ids: Optional[List[str]] = Field(None, description="Optional name per series")
+    process_noise: float = Field(0.1, description="Process noise (Q)")
+    measurement_noise: float = Field(1.0, description="Measurement noise (R)")
+    forecast_steps: int = Field(7, description="Steps to forecast per series")
+
+class KalmanSessionRequest(BaseModel):
+    """Kalman Session Creation Request"""
+    process_noise: float = Field(0.1, description="Process noise (Q)")
+    measurement_noise: float = Field(1.0, description="Measurement noise (R)")
+    data: Optional[List[float]] = Field(None, description="Optional initial history")
+
+class KalmanUpdateRequest(BaseModel):
+    """Kalman Session Update Request"""
+    observations: List[float] = Field(..., description="New observations since the last update")
 
 class ARIMARequest(BaseModel):
     """ARIMA Forecast Request"""
     data: List[float] = Field(..., description="Historical data")
-    order: Tuple[int, int, int] = Field((2, 1, 1), description="ARIMA(p,d,q) order")
+    order: Union[Tuple[int, int, int], str] = Field((2, 1, 1), description="ARIMA(p,d,q) order or 'auto'")
     forecast_steps: int = Field(7, description="Steps to forecast")
+    series_id: Optional[str] = Field(None, description="Stable series name for fit caching (e.g. governorate_variable)")
+    refit_every: int = Field(10, description="Cached appends between parameter re-estimations (0 = never)")
+    max_p: int = Field(3, ge=0, le=arima_model.MAX_AUTO_ORDER, description="Max AR order for order='auto'")
+    max_q: int = Field(3, ge=0, le=arima_model.MAX_AUTO_ORDER, description="Max MA order for order='auto'")
+    criterion: str = Field("aic", description="Ranking criterion for order='auto' (aic/bic)")
+    top_k: int = Field(3, ge=1, le=(arima_model.MAX_AUTO_ORDER + 1) ** 2, description="Ranked models returned for order='auto'")
+    n_jobs: Optional[int] = Field(None, ge=1, le=os.cpu_count() or 1, description="Worker processes for order='auto'")
+    seasonal_period: Optional[int] = Field(None, description="Season length in steps (24 hourly, 365 daily)")
+    seasonal_order: Tuple[int, int, int] = Field((1, 0, 1), description="Seasonal (P,D,Q) for short seasons")
+    fourier_terms: Optional[int] = Field(None, description="Fourier pairs for long seasons")
+    diagnostics: Union[str, List[str]] = Field("full", description="Diagnostics level (none/basic/full) or list of blocks")
+
+class ARIMABatchRequest(BaseModel):
+    """Multi-series ARIMA Request"""
+    series: Dict[str, ARIMARequest] = Field(..., description="Named series, each with its own ARIMA settings")
+    max_concurrency: Optional[int] = Field(None, ge=1, description="Max series fitted at once (default: pool size)")
 
 class BayesianRequest(BaseModel):
     """Bayesian Model Averaging Request"""
@@ -115,31 +167,104 @@ class RandomForestRequest(BaseModel):
     X_train: List[List[float]] = Field(..., description="Training features")
     y_train: List[float] = Field(..., description="Training targets")
     X_predict: Optional[List[List[float]]] = Field(None, description="Prediction features")
+    validation: str = Field("holdout", description="Validation (none/holdout/kfold/blocked/expanding/rolling)")
+    n_folds: int = Field(5, description="Number of folds for kfold validation")
+    gap: int = Field(0, ge=0, description="Rows left out between training and test data (blocked/expanding/rolling)")
+    window: Optional[int] = Field(None, ge=1, description="Training window for rolling validation")
+    interval: str = Field("quantile", description="Prediction interval (quantile/normal)")
 
 class LSTMRequest(BaseModel):
     """LSTM Request"""
-    X_train: List[List[float]] = Field(..., description="Training sequences")
-    y_train: List[float] = Field(..., description="Training targets")
-    X_predict: Optional[List[List[float]]] = Field(None, description="Prediction sequences")
+    X_train: Union[List[List[List[float]]], List[List[float]]] = Field(..., description="Training sequences, (n, steps, features) or (n, steps)")
+    y_train: Union[List[float], List[List[float]]] = Field(..., description="Training targets, (n,) or (n, horizon)")
+    X_predict: Optional[Union[List[List[List[float]]], List[List[float]]]] = Field(None, description="Prediction sequences")
+    epochs: int = Field(50, description="Training epochs")
+    head: str = Field("direct", description="Multi-horizon head (direct/seq2seq)")
+    base_model_id: Optional[str] = Field(None, description="Stored model to fine-tune (warm start)")
+    base_version: Optional[int] = Field(None, description="Version of the base model (default: latest)")
+    save_model: bool = Field(False, description="Store the trained model")
+    model_id: Optional[str] = Field(None, description="Id to store the model under (default: base_model_id, else a new id)")
+
+class LSTMSeriesRequest(BaseModel):
+    """LSTM Series Training Request (windows built server-side)"""
+    series: Optional[List[float]] = Field(None, description="Flat series in time order")
+    series_name: Optional[str] = Field(None, description="Stored series (<MODEL_PATH>/series/<name>.npy)")
+    sequence_length: int = Field(24, description="Window length")
+    target_column: int = Field(0, description="Feature to predict (stored multi-feature series)")
+    horizon: int = Field(1, description="Steps predicted per window")
+    head: str = Field("direct", description="Multi-horizon head (direct/seq2seq)")
     epochs: int = Field(50, description="Training epochs")
+    batch_size: int = Field(32, description="Training batch size")
+    save_model: bool = Field(False, description="Store the trained model")
+    model_id: Optional[str] = Field(None, description="Id to store the model under (default: new id)")
+
+class LSTMPredictRequest(BaseModel):
+    """Stored LSTM Prediction Request"""
+    X_predict: Union[List[List[List[float]]], List[List[float]]] = Field(
+        ..., description="Prediction sequences, (n, steps, features) or (n, steps) for single-feature models"
+    )
+    version: Optional[int] = Field(None, description="Model version (default: latest)")
 
 class XGBoostRequest(BaseModel):
     """XGBoost Request"""
     X_train: List[List[float]] = Field(..., description="Training features")
     y_train: List[float] = Field(..., description="Training targets")
     X_predict: Optional[List[List[float]]] = Field(None, description="Prediction features")
+    validation: str = Field("holdout", description="Validation (none/holdout/kfold/blocked/expanding/rolling)")
+    n_folds: int = Field(5, description="Number of folds for kfold validation")
+    gap: int = Field(0, ge=0, description="Rows left out between training and test data (blocked/expanding/rolling)")
+    window: Optional[int] = Field(None, ge=1, description="Training window for rolling validation")
+    backend: str = Field("native", description="Training backend (native/sklearn)")
+    nthread: int = Field(-1, description="Threads per fit (-1 = all cores)")
 
 class GradientBoostingRequest(BaseModel):
     """Gradient Boosting Request"""
     X_train: List[List[float]] = Field(..., description="Training features")
     y_train: List[float] = Field(..., description="Training targets")
     X_predict: Optional[List[List[float]]] = Field(None, description="Prediction features")
+    validation: str = Field("holdout", description="Validation (none/holdout/kfold/blocked/expanding/rolling)")
+    n_folds: int = Field(5, description="Number of folds for kfold validation")
+    gap: int = Field(0, ge=0, description="Rows left out between training and test data (blocked/expanding/rolling)")
+    window: Optional[int] = Field(None, ge=1, description="Training window for rolling validation")
+    backend: str = Field("exact", description="Boosting backend (exact/hist)")
+    n_iter_no_change: Optional[int] = Field(None, description="Early-stopping patience in stages")
+    curve_every: int = Field(0, ge=0, description="Stages between staged-curve checkpoints (0 = off)")
 
 class EnsembleRequest(BaseModel):
     """Ensemble Voting Request"""
     X_train: List[List[float]] = Field(..., description="Training features")
     y_train: List[float] = Field(..., description="Training targets")
     X_predict: Optional[List[List[float]]] = Field(None, description="Prediction features")
+    validation: str = Field("holdout", description="Validation (none/holdout/kfold/blocked/expanding/rolling; stacking: kfold/blocked)")
+    n_folds: int = Field(5, description="Number of folds for kfold validation")
+    gap: int = Field(0, ge=0, description="Rows left out between training and test data (blocked/expanding/rolling)")
+    window: Optional[int] = Field(None, ge=1, description="Training window for rolling validation")
+    combiner: str = Field("voting", description="Combiner (voting/stacking)")
+    meta_learner: str = Field("nnls", description="Stacking meta-learner (nnls/ridge)")
+    weights: Optional[List[float]] = Field(None, description="Member weights (voting; stacking fits them)")
+
+class ModelTrainRequest(BaseModel):
+    """Registered Model Training Request"""
+    X_train: List[List[float]] = Field(..., description="Training features")
+    y_train: List[float] = Field(..., description="Training targets")
+    validation: str = Field("holdout", description="Validation (none/holdout/kfold/blocked/expanding/rolling)")
+    n_folds: int = Field(5, description="Number of folds for kfold validation")
+    gap: int = Field(0, ge=0, description="Rows left out between training and test data (blocked/expanding/rolling)")
+    window: Optional[int] = Field(None, ge=1, description="Training window for rolling validation")
+    model_id: Optional[str] = Field(None, description="Existing model id to add a new version to")
+
+class ModelUpdateRequest(BaseModel):
+    """Registered Model Continued-Training Request"""
+    X_new: List[List[float]] = Field(..., description="New features")
+    y_new: List[float] = Field(..., description="New targets")
+    n_rounds: int = Field(10, description="Boosting rounds to add (append mode)")
+    mode: str = Field("append", description="Update mode (append/refresh)")
+    version: Optional[int] = Field(None, description="Version to continue from (default: latest)")
+
+class ModelPredictRequest(BaseModel):
+    """Registered Model Prediction Request"""
+    X_predict: List[List[float]] = Field(..., description="Prediction features")
+    version: Optional[int] = Field(None, description="Model version (default: latest)")
 
 class VQERequest(BaseModel):
     """VQE Optimization Request"""
@@ -193,9 +318,18 @@ async def health_check():
             "quantum": [
                 "vqe", "qaoa", "qsvm", "qnn", "grover"
             ]
+        },
+        "executor": {
+            name: {"running": m["running"], "queued": m["queued"]}
+            for name, m in executor.metrics().items()
         }
     }
 
+@app.get("/api/executor/metrics")
+async def executor_metrics():
+    """Per-category pool configuration, queue depth and latency counters"""
+    return executor.metrics()
+
 # ==============================================
 # Scientific Algorithms Endpoints
 # ==============================================
@@ -207,15 +341,93 @@ async def run_kalman(request: KalmanRequest):
     Reference: Kalman, R.E. (1960). A New Approach to Linear Filtering
     """
     try:
-        result = kalman_filter.run_filter(
+        result = await executor.run(
+            "filter",
+            kalman_filter.run_filter,
             request.data,
             request.process_noise,
-            request.measurement_noise
+            request.measurement_noise,
+            request.steady_state,
+            request.gain_tolerance,
+            request.smoother,
+            request.lag
         )
         return result
+    except executor.ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/scientific/kalman/batch")
+async def run_kalman_batch(request: KalmanBatchRequest):
+    """
+    Vectorized Kalman Filter over many station series in one request.
+    Reference: Kalman, R.E. (1960). A New Approach to Linear Filtering
+    """
+    try:
+        result = await executor.run(
+            "filter",
+            kalman_filter.run_batch_filter,
+            request.data,
+            request.process_noise,
+            request.measurement_noise,
+            request.series_ids,
+            request.forecast_steps
+        )
+        return result
+    except executor.ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/scientific/kalman/session")
+async def create_kalman_session(request: KalmanSessionRequest):
+    """
+    Create a persisted Kalman filter session for incremental updates.
+    """
+    try:
+        return await executor.run(
+            "light",
+            kalman_filter.create_session,
+            request.process_noise,
+            request.measurement_noise,
+            request.data
+        )
+    except executor.ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/scientific/kalman/{session_id}/update")
+async def update_kalman_session(session_id: str, request: KalmanUpdateRequest):
+    """
+    Absorb only the new observations into a stored Kalman session.
+    """
+    try:
+        return await executor.run("light", kalman_filter.update_session, session_id, request.observations)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found")
+    except executor.ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/scientific/kalman/{session_id}")
+async def get_kalman_session(session_id: str):
+    """Get the current state of a Kalman session"""
+    try:
+        return kalman_filter.get_session(session_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found")
+
+@app.delete("/api/scientific/kalman/{session_id}")
+async def delete_kalman_session(session_id: str):
+    """Delete a Kalman session"""
+    try:
+        return kalman_filter.delete_session(session_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found")
+
 @app.post("/api/scientific/arima")
 async def run_arima(request: ARIMARequest):
     """
@@ -223,15 +435,65 @@ async def run_arima(request: ARIMARequest):
     Reference: Box, G.E.P., Jenkins, G.M. (1970). Time Series Analysis
     """
     try:
-        result = arima_model.run_forecast(
+        result = await executor.run(
+            "statistics",
+            arima_model.run_forecast,
             request.data,
             request.order,
-            request.forecast_steps
+            request.forecast_steps,
+            request.series_id,
+            request.refit_every,
+            max_p=request.max_p,
+            max_q=request.max_q,
+            criterion=request.criterion,
+            top_k=request.top_k,
+            n_jobs=request.n_jobs,
+            seasonal_period=request.seasonal_period,
+            seasonal_order=request.seasonal_order,
+            fourier_terms=request.fourier_terms,
+            diagnostics=request.diagnostics
         )
         return result
+    except executor.ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/scientific/arima/batch")
+async def run_arima_batch(request: ARIMABatchRequest):
+    """
+    ARIMA forecasts for many named series, fitted across a process pool.
+    Streams one NDJSON line per series as soon as its fit completes.
+    """
+    if not request.series:
+        raise HTTPException(status_code=400, detail="At least one series required")
+    
+    loop = asyncio.get_running_loop()
+    limit = asyncio.Semaphore(request.max_concurrency or arima_model.worker_count())
+    
+    async def fit_one(name: str, spec: ARIMARequest) -> str:
+        params = spec.model_dump()
+        # Series name doubles as cache identity unless given explicitly
+        params["series_id"] = params["series_id"] or name
+        # Same series -> same worker, whose in-process fit cache holds it
+        pool = arima_model.pool_for_series(params["series_id"])
+        try:
+            async with limit:
+                return await loop.run_in_executor(pool, arima_model.forecast_series, name, params)
+        except Exception as e:
+            # e.g. BrokenProcessPool: report this series and keep streaming
+            if isinstance(e, BrokenProcessPool):
+                arima_model.replace_pool(pool)
+            item = {"series": name, "status": "error", "error": str(e) or type(e).__name__}
+            return json.dumps(item) + "\n"
+    
+    async def stream():
+        tasks = [asyncio.create_task(fit_one(name, spec)) for name, spec in request.series.items()]
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 @app.post("/api/scientific/bayesian")
 async def run_bayesian(request: BayesianRequest):
     """
@@ -239,12 +501,16 @@ async def run_bayesian(request: BayesianRequest):
     Reference: Hoeting et al. (1999). Bayesian Model Averaging
     """
     try:
-        result = bayesian_ensemble.run_bma(
+        result = await executor.run(
+            "statistics",
+            bayesian_ensemble.run_bma,
             request.models_predictions,
             request.observations,
             request.prior_weights
         )
         return result
+    except executor.ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -255,12 +521,16 @@ async def run_bias_correction(request: BiasRequest):
     Reference: Themeßl et al. (2011). Empirical-statistical downscaling
     """
     try:
-        result = bias_correction.run_correction(
+        result = await executor.run(
+            "statistics",
+            bias_correction.run_correction,
             request.predictions,
             request.observations,
             request.method
         )
         return result
+    except executor.ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -270,12 +540,16 @@ async def run_anomaly_detection(request: AnomalyRequest):
     Anomaly Detection using Z-score or IQR methods.
     """
     try:
-        result = anomaly_detection.detect(
+        result = await executor.run(
+            "statistics",
+            anomaly_detection.detect,
             request.data,
             request.method,
             request.threshold
         )
         return result
+    except executor.ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -286,8 +560,10 @@ async def run_trend_analysis(request: TrendRequest):
     Reference: Mann (1945), Kendall (1975)
     """
     try:
-        result = trend_analysis.analyze(request.data)
+        result = await executor.run("statistics", trend_analysis.analyze, request.data)
         return result
+    except executor.ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -302,12 +578,21 @@ async def run_random_forest(request: RandomForestRequest):
     Reference: Breiman, L. (2001). Random Forests. Machine Learning
     """
     try:
-        result = random_forest.train_and_predict(
+        result = await executor.run(
+            "ml",
+            random_forest.train_and_predict,
             np.array(request.X_train),
             np.array(request.y_train),
-            np.array(request.X_predict) if request.X_predict else None
+            np.array(request.X_predict) if request.X_predict else None,
+            request.validation,
+            request.n_folds,
+            request.interval,
+            request.gap,
+            request.window
         )
         return result
+    except executor.ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -317,14 +602,87 @@ async def run_lstm(request: LSTMRequest):
     LSTM Neural Network Prediction.
     Reference: Hochreiter & Schmidhuber (1997). Long Short-Term Memory
     """
+    if request.base_model_id:
+        _require_stored_model(lstm_predictor.REGISTRY_NAME, request.base_model_id, request.base_version)
+    if request.save_model and request.model_id:
+        # Fail before training rather than when storing the result
+        _model_versions(lstm_predictor.REGISTRY_NAME, request.model_id)
     try:
-        result = lstm_predictor.train_and_predict({
-            "X_train": request.X_train,
-            "y_train": request.y_train,
-            "X_predict": request.X_predict,
-            "epochs": request.epochs
-        })
+        result = await executor.run(
+            "deep_learning",
+            lstm_predictor.train_and_predict,
+            {
+                "X_train": request.X_train,
+                "y_train": request.y_train,
+                "X_predict": request.X_predict,
+                "epochs": request.epochs,
+                "head": request.head,
+                "base_model_id": request.base_model_id,
+                "base_version": request.base_version,
+                "save_model": request.save_model,
+                "model_id": request.model_id
+            }
+        )
         return result
+    except ValueError as e:
+        # Malformed model id, or sequences that do not fit the base model
+        raise HTTPException(status_code=400, detail=str(e))
+    except executor.ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/ml/lstm/series")
+async def run_lstm_series(request: LSTMSeriesRequest):
+    """
+    LSTM training on a flat series; windows are built lazily with tf.data
+    instead of being sent as nested sequences.
+    """
+    if request.series is None and request.series_name is None:
+        raise HTTPException(status_code=400, detail="Provide series or series_name")
+    if request.series_name:
+        try:
+            path = lstm_predictor.series_path(request.series_name)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if not os.path.exists(path):
+            raise HTTPException(status_code=404, detail=f"Series '{request.series_name}' not found")
+    if request.save_model and request.model_id:
+        _model_versions(lstm_predictor.REGISTRY_NAME, request.model_id)
+    try:
+        return await executor.run(
+            "deep_learning",
+            lstm_predictor.train_from_series,
+            request.model_dump()
+        )
+    except ValueError as e:
+        # Malformed model id, or a series too short for the windows
+        raise HTTPException(status_code=400, detail=str(e))
+    except executor.ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/ml/lstm/{model_id}/predict")
+async def predict_lstm(model_id: str, request: LSTMPredictRequest):
+    """
+    Predict with a stored LSTM (no training).
+    Runs on the light pool so serving does not queue behind training jobs.
+    """
+    try:
+        return await executor.run(
+            "light",
+            lstm_predictor.predict_stored,
+            model_id,
+            np.array(request.X_predict),
+            request.version
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Model '{model_id}' not found")
+    except executor.ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -335,12 +693,22 @@ async def run_xgboost(request: XGBoostRequest):
     Reference: Chen & Guestrin (2016). XGBoost
     """
     try:
-        result = xgboost_predictor.train_and_predict(
+        result = await executor.run(
+            "ml",
+            xgboost_predictor.train_and_predict,
             np.array(request.X_train),
             np.array(request.y_train),
-            np.array(request.X_predict) if request.X_predict else None
+            np.array(request.X_predict) if request.X_predict else None,
+            request.validation,
+            request.n_folds,
+            request.backend,
+            request.nthread,
+            request.gap,
+            request.window
         )
         return result
+    except executor.ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -351,12 +719,23 @@ async def run_gradient_boosting(request: GradientBoostingRequest):
     Reference: Friedman (2001). Greedy Function Approximation
     """
     try:
-        result = gradient_boosting.train_and_predict(
+        result = await executor.run(
+            "ml",
+            gradient_boosting.train_and_predict,
             np.array(request.X_train),
             np.array(request.y_train),
-            np.array(request.X_predict) if request.X_predict else None
+            np.array(request.X_predict) if request.X_predict else None,
+            request.validation,
+            request.n_folds,
+            request.backend,
+            request.n_iter_no_change,
+            request.curve_every,
+            request.gap,
+            request.window
         )
         return result
+    except executor.ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -367,15 +746,217 @@ async def run_ensemble(request: EnsembleRequest):
     Combines multiple ML models for improved predictions.
     """
     try:
-        result = ensemble_voting.train_and_predict(
+        result = await executor.run(
+            "ml",
+            ensemble_voting.train_and_predict,
             np.array(request.X_train),
             np.array(request.y_train),
-            np.array(request.X_predict) if request.X_predict else None
+            np.array(request.X_predict) if request.X_predict else None,
+            request.validation,
+            request.n_folds,
+            request.combiner,
+            request.meta_learner,
+            request.gap,
+            request.window,
+            request.weights
         )
         return result
+    except ValueError as e:
+        # Unsupported combiner / meta-learner / validation / weights combination
+        raise HTTPException(status_code=400, detail=str(e))
+    except executor.ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# ==============================================
+# Model Registry Endpoints (train once, predict many)
+# ==============================================
+
+REGISTRY_ALGORITHMS = {
+    "random-forest": random_forest,
+    "xgboost": xgboost_predictor,
+    "gradient-boosting": gradient_boosting,
+    "ensemble": ensemble_voting
+}
+
+def _registry_module(algo: str):
+    if algo not in REGISTRY_ALGORITHMS:
+        raise HTTPException(status_code=404, detail=f"Algorithm '{algo}' has no model registry")
+    return REGISTRY_ALGORITHMS[algo]
+
+def _model_versions(algo: str, model_id: str) -> List[int]:
+    """Stored versions of a model; 400 for a malformed id"""
+    try:
+        return registry.versions(algo, model_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _require_stored_model(algo: str, model_id: str, version: Optional[int] = None):
+    """400 for a malformed id, 404 for a missing model or version"""
+    versions = _model_versions(algo, model_id)
+    if not versions or (version is not None and version not in versions):
+        raise HTTPException(status_code=404, detail=f"Model '{model_id}' not found")
+
+def _train_and_register(algo: str,
+                        X_train: np.ndarray,
+                        y_train: np.ndarray,
+                        model_id: Optional[str],
+                        validation: str = "holdout",
+                        n_folds: int = 5,
+                        gap: int = 0,
+                        window: Optional[int] = None) -> Dict[str, Any]:
+    """Train a model and persist it in the registry"""
+    model, result = REGISTRY_ALGORITHMS[algo].train_model(
+        X_train, y_train, validation, n_folds, gap=gap, window=window
+    )
+    record = registry.register(algo, model, {
+        "n_samples": int(X_train.shape[0]),
+        "n_features": int(X_train.shape[1]),
+        "operation": "train",
+        "lineage": [],
+        "training_metrics": result["training_metrics"]
+    }, model_id)
+    result["model_id"] = record["model_id"]
+    result["model_version"] = record["version"]
+    return result
+
+def _update_registered(algo: str,
+                       model_id: str,
+                       X_new: np.ndarray,
+                       y_new: np.ndarray,
+                       n_rounds: int,
+                       mode: str,
+                       version: Optional[int]) -> Dict[str, Any]:
+    """Continue training a stored model and store the result as a new version"""
+    model, parent_version = registry.load(algo, model_id, version)
+    parent = registry.metadata(algo, model_id, parent_version)
+    updated, result = REGISTRY_ALGORITHMS[algo].update_model(model, X_new, y_new, n_rounds, mode)
+    record = registry.register(algo, updated, {
+        "n_samples": int(parent.get("n_samples", 0)) + int(X_new.shape[0]),
+        "n_features": int(X_new.shape[1]),
+        "operation": f"update-{mode}",
+        "parent_version": parent_version,
+        "lineage": parent.get("lineage", []) + [parent_version],
+        "training_metrics": result["update_metrics"]
+    }, model_id)
+    result["model_id"] = model_id
+    result["parent_version"] = parent_version
+    result["model_version"] = record["version"]
+    result["lineage"] = record["lineage"]
+    return result
+
+def _predict_registered(algo: str,
+                        model_id: str,
+                        X_predict: np.ndarray,
+                        version: Optional[int]) -> Dict[str, Any]:
+    """Predict with a stored model (hot LRU or memory-mapped load)"""
+    model, version = registry.load(algo, model_id, version)
+    return {
+        "algorithm": algo,
+        "model_id": model_id,
+        "model_version": version,
+        "predictions": REGISTRY_ALGORITHMS[algo].predict_with_model(model, X_predict)
+    }
+
+@app.post("/api/ml/{algo}/train")
+async def train_registered_model(algo: str, request: ModelTrainRequest):
+    """
+    Train a model once and store it; returns the model id and version.
+    """
+    _registry_module(algo)
+    try:
+        return await executor.run(
+            "ml",
+            _train_and_register,
+            algo,
+            np.array(request.X_train),
+            np.array(request.y_train),
+            request.model_id,
+            request.validation,
+            request.n_folds,
+            request.gap,
+            request.window
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except executor.ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/ml/{algo}/{model_id}/predict")
+async def predict_registered_model(algo: str, model_id: str, request: ModelPredictRequest):
+    """
+    Predict with a stored model without retraining.
+    """
+    _registry_module(algo)
+    try:
+        return await executor.run(
+            "light",
+            _predict_registered,
+            algo,
+            model_id,
+            np.array(request.X_predict),
+            request.version
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Model '{model_id}' not found")
+    except executor.ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/ml/{algo}/models")
+async def list_registered_models(algo: str):
+    """List stored models and their versions"""
+    if algo != lstm_predictor.REGISTRY_NAME:
+        _registry_module(algo)
+    return {"algorithm": algo, "models": registry.list_models(algo)}
+
+@app.post("/api/ml/{algo}/{model_id}/update")
+async def update_registered_model(algo: str, model_id: str, request: ModelUpdateRequest):
+    """
+    Continue training a stored model on new rows (e.g. the latest day);
+    the result is stored as a new version with its lineage.
+    """
+    if not hasattr(_registry_module(algo), "update_model"):
+        raise HTTPException(status_code=400, detail=f"Algorithm '{algo}' does not support continued training")
+    try:
+        return await executor.run(
+            "ml",
+            _update_registered,
+            algo,
+            model_id,
+            np.array(request.X_new),
+            np.array(request.y_new),
+            request.n_rounds,
+            request.mode,
+            request.version
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Model '{model_id}' not found")
+    except executor.ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/ml/{algo}/{model_id}")
+async def get_registered_model(algo: str, model_id: str, version: Optional[int] = None):
+    """Metadata of a stored model version"""
+    if algo != lstm_predictor.REGISTRY_NAME:
+        _registry_module(algo)
+    try:
+        return registry.metadata(algo, model_id, version)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Model '{model_id}' not found")
+
 # ==============================================
 # Quantum Computing Endpoints
 # ==============================================
@@ -387,12 +968,16 @@ async def run_vqe(request: VQERequest):
     Reference: Peruzzo et al. (2014). Nature Communications
     """
     try:
-        result = vqe_optimizer.optimize(
+        result = await executor.run(
+            "quantum",
+            vqe_optimizer.optimize,
             request.weather_params,
             request.num_qubits,
             request.layers
         )
         return result
+    except executor.ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -403,12 +988,16 @@ async def run_qaoa(request: QAOARequest):
     Reference: Farhi et al. (2014). Quantum Approximate Optimization Algorithm
     """
     try:
-        result = qaoa_solver.optimize(
+        result = await executor.run(
+            "quantum",
+            qaoa_solver.optimize,
             request.nodes,
             request.edges,
             request.depth
         )
         return result
+    except executor.ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -419,12 +1008,16 @@ async def run_qsvm(request: QSVMRequest):
     Reference: Havlíček et al. (2019). Nature
     """
     try:
-        result = qsvm_classifier.train_and_predict(
+        result = await executor.run(
+            "quantum",
+            qsvm_classifier.train_and_predict,
             np.array(request.X_train),
             np.array(request.y_train),
             np.array(request.X_test) if request.X_test else None
         )
         return result
+    except executor.ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -435,12 +1028,16 @@ async def run_qnn(request: QNNRequest):
     Reference: Schuld et al. (2020). Effect of data encoding
     """
     try:
-        result = qnn_regression.train_and_predict(
+        result = await executor.run(
+            "quantum",
+            qnn_regression.train_and_predict,
             np.array(request.X_train),
             np.array(request.y_train),
             np.array(request.X_predict) if request.X_predict else None
         )
         return result
+    except executor.ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -451,11 +1048,15 @@ async def run_grover(request: GroverRequest):
     Reference: Grover (1996). A fast quantum mechanical algorithm
     """
     try:
-        result = grover_search.search(
+        result = await executor.run(
+            "quantum",
+            grover_search.search,
             request.n_qubits,
             request.target_state
         )
         return result
+    except executor.ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1,3 +1,6 @@
 """Services Package"""
 from . import ibm_quantum_service
 from . import weather_processor
+from . import state_store
+from . import executor
+from . import model_registry
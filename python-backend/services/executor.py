@@ -0,0 +1,175 @@
+"""
+Algorithm Executor - keeps CPU-bound work off the asyncio event loop
+
+Each algorithm category gets its own pool and concurrency limit:
+- thread pools for NumPy/BLAS/sklearn/TF work that releases the GIL
+- process pools for pure-Python loops that hold it
+
+Configured per category with environment variables:
+    EXECUTOR_<CATEGORY>_KIND       thread | process
+    EXECUTOR_<CATEGORY>_WORKERS    max concurrent jobs
+    EXECUTOR_<CATEGORY>_MAX_QUEUE  max waiting jobs before rejecting (0 = unbounded)
+"""
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+# Categories whose jobs use in-process state (Kalman sessions in an
+# LRUStateStore) and therefore cannot run in a separate process
+THREAD_ONLY = ("light",)
+
+# category: (kind, workers, max_queue)
+DEFAULT_CATEGORIES = {
+    "light": ("thread", 8, 0),           # O(1) session updates, small numpy work
+    "filter": ("process", 2, 64),        # filterpy predict/update loops (pure Python)
+    "statistics": ("thread", 4, 64),     # statsmodels / scipy; keeps in-process fit caches
+    "ml": ("thread", 2, 16),             # sklearn / xgboost fits release the GIL
+    "deep_learning": ("thread", 1, 8),   # TensorFlow manages its own intra-op threads
+    "quantum": ("thread", 2, 16),
+}
+
+
+class ExecutorBusy(Exception):
+    """Raised when a category queue is full"""
+
+
+def process_context() -> multiprocessing.context.BaseContext:
+    """
+    Start method for worker processes.
+
+    The server has imported TensorFlow/BLAS (and started their threads)
+    before any pool exists; a plain fork of such a process can deadlock
+    the child. forkserver (spawn where unavailable) starts workers from a
+    clean interpreter instead, at the cost of each worker importing the
+    algorithm modules once.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class CategoryExecutor:
+    """Pool + concurrency limit + counters for one category"""
+
+    def __init__(self, name: str, kind: str, workers: int, max_queue: int):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Executor kind for '{name}' must be 'thread' or 'process'")
+        if kind == "process" and name in THREAD_ONLY:
+            raise ValueError(
+                f"Executor '{name}' must be a thread pool: its jobs share in-process state (sessions)"
+            )
+        self.name = name
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self._pool = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.max_queue_seen = 0
+        self.total_seconds = 0.0
+        self.total_wait_seconds = 0.0
+
+    @property
+    def pool(self) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                if self.kind == "process":
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=process_context())
+                else:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix=f"exec-{self.name}"
+                    )
+            return self._pool
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        if self.max_queue and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise ExecutorBusy(f"Executor '{self.name}' queue is full ({self.queued} waiting)")
+
+        self.queued += 1
+        self.max_queue_seen = max(self.max_queue_seen, self.queued)
+        enqueued = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        started = time.perf_counter()
+        self.total_wait_seconds += started - enqueued
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.pool, functools.partial(fn, *args, **kwargs))
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.running -= 1
+            self.total_seconds += time.perf_counter() - started
+            self._semaphore.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "queued": self.queued,
+            "max_queue_seen": self.max_queue_seen,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_seconds": round(self.total_seconds / finished, 4) if finished else None,
+            "avg_wait_seconds": round(self.total_wait_seconds / finished, 4) if finished else None
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+def _from_env(name: str, kind: str, workers: int, max_queue: int) -> CategoryExecutor:
+    prefix = f"EXECUTOR_{name.upper()}_"
+    return CategoryExecutor(
+        name,
+        os.getenv(prefix + "KIND", kind),
+        int(os.getenv(prefix + "WORKERS", workers)),
+        int(os.getenv(prefix + "MAX_QUEUE", max_queue))
+    )
+
+
+_executors = {name: _from_env(name, *config) for name, config in DEFAULT_CATEGORIES.items()}
+
+
+async def run(category: str, fn: Callable, *args, **kwargs) -> Any:
+    """Run fn(*args, **kwargs) on the pool of the given category"""
+    if category not in _executors:
+        raise KeyError(f"Unknown executor category '{category}'")
+    return await _executors[category].run(fn, *args, **kwargs)
+
+
+def metrics() -> Dict[str, Dict[str, Any]]:
+    return {name: executor.metrics() for name, executor in _executors.items()}
+
+
+def shutdown():
+    for executor in _executors.values():
+        executor.shutdown()
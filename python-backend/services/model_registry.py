@@ -0,0 +1,173 @@
+"""
+Model Registry - train once, predict many
+
+Fitted estimators are persisted with joblib under
+<MODEL_PATH>/registry/<algorithm>/<model_id>/v<version>.joblib together with a
+JSON metadata file. Loads are memory-mapped (numpy arrays inside the pickle are
+mapped read-only instead of copied) and the most recently used models stay in an
+in-memory LRU.
+
+Algorithms whose models joblib should not pickle (e.g. Keras) register a
+directory format: their versions are saved to / loaded from v<version>/.
+"""
+import json
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+
+from services.state_store import MODEL_PATH
+
+_ID_PATTERN = re.compile(r"^[A-Za-z0-9_\-]+$")
+
+
+def _json_default(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    return str(obj)
+
+
+class ModelRegistry:
+    """Versioned joblib model store with an in-memory LRU of hot models"""
+
+    def __init__(self, root: Optional[str] = None, capacity: int = 16):
+        self.root = root or os.path.join(MODEL_PATH, "registry")
+        self.capacity = capacity
+        self._hot = OrderedDict()
+        self._lock = threading.RLock()
+        self._formats = {}
+
+    def add_format(self,
+                   algorithm: str,
+                   save: Callable[[Any, str], None],
+                   load: Callable[[str], Any]):
+        """
+        Store an algorithm's models as directories instead of joblib files.
+
+        save(model, directory) writes one version, load(directory) reads it.
+        """
+        self._formats[algorithm] = (save, load)
+
+    def _model_dir(self, algorithm: str, model_id: str) -> str:
+        for part in (algorithm, model_id):
+            if not _ID_PATTERN.match(part):
+                raise ValueError(f"Invalid id '{part}' (letters, digits, '_' and '-' only)")
+        return os.path.join(self.root, algorithm, model_id)
+
+    def versions(self, algorithm: str, model_id: str) -> List[int]:
+        model_dir = self._model_dir(algorithm, model_id)
+        if not os.path.isdir(model_dir):
+            return []
+        # Metadata is written last, so only complete versions are listed
+        return sorted(
+            int(name[1:-len(".json")])
+            for name in os.listdir(model_dir)
+            if name.startswith("v") and name.endswith(".json")
+        )
+
+    def register(self,
+                 algorithm: str,
+                 model: Any,
+                 metadata: Optional[Dict[str, Any]] = None,
+                 model_id: Optional[str] = None) -> Dict[str, Any]:
+        """Persist a fitted model; reusing a model_id creates a new version"""
+        model_id = model_id or uuid.uuid4().hex
+        model_dir = self._model_dir(algorithm, model_id)
+        with self._lock:
+            existing = self.versions(algorithm, model_id)
+            version = existing[-1] + 1 if existing else 1
+            os.makedirs(model_dir, exist_ok=True)
+
+            if algorithm in self._formats:
+                self._formats[algorithm][0](model, os.path.join(model_dir, f"v{version}"))
+            else:
+                # Uncompressed so arrays can be memory-mapped on load
+                joblib.dump(model, os.path.join(model_dir, f"v{version}.joblib"))
+
+            record = dict(metadata or {})
+            record.update({
+                "algorithm": algorithm,
+                "model_id": model_id,
+                "version": version,
+                "created_at": datetime.utcnow().isoformat()
+            })
+            with open(os.path.join(model_dir, f"v{version}.json"), "w") as f:
+                json.dump(record, f, default=_json_default)
+
+            self._remember((algorithm, model_id, version), model)
+        return record
+
+    def load(self,
+             algorithm: str,
+             model_id: str,
+             version: Optional[int] = None,
+             cached: bool = True) -> Tuple[Any, int]:
+        """
+        Return (model, version); latest version when version is None.
+
+        cached=False bypasses the LRU and returns a private copy from disk
+        (e.g. to continue training without touching the served instance).
+        """
+        with self._lock:
+            if version is None:
+                existing = self.versions(algorithm, model_id)
+                if not existing:
+                    raise KeyError(model_id)
+                version = existing[-1]
+
+            key = (algorithm, model_id, version)
+            if cached and key in self._hot:
+                self._hot.move_to_end(key)
+                return self._hot[key], version
+
+            model_dir = self._model_dir(algorithm, model_id)
+            if not os.path.exists(os.path.join(model_dir, f"v{version}.json")):
+                raise KeyError(model_id)
+            if algorithm in self._formats:
+                model = self._formats[algorithm][1](os.path.join(model_dir, f"v{version}"))
+            else:
+                model = joblib.load(os.path.join(model_dir, f"v{version}.joblib"), mmap_mode="r")
+            if cached:
+                self._remember(key, model)
+            return model, version
+
+    def metadata(self, algorithm: str, model_id: str, version: Optional[int] = None) -> Dict[str, Any]:
+        existing = self.versions(algorithm, model_id)
+        if not existing:
+            raise KeyError(model_id)
+        version = version or existing[-1]
+        path = os.path.join(self._model_dir(algorithm, model_id), f"v{version}.json")
+        if not os.path.exists(path):
+            raise KeyError(model_id)
+        with open(path) as f:
+            return json.load(f)
+
+    def list_models(self, algorithm: str) -> List[Dict[str, Any]]:
+        if not _ID_PATTERN.match(algorithm):
+            raise ValueError(f"Invalid id '{algorithm}'")
+        algo_dir = os.path.join(self.root, algorithm)
+        if not os.path.isdir(algo_dir):
+            return []
+        models = []
+        for model_id in sorted(os.listdir(algo_dir)):
+            existing = self.versions(algorithm, model_id)
+            if existing:
+                models.append({"model_id": model_id, "versions": existing, "latest": existing[-1]})
+        return models
+
+    def _remember(self, key, model):
+        self._hot[key] = model
+        self._hot.move_to_end(key)
+        while len(self._hot) > self.capacity:
+            self._hot.popitem(last=False)
+
+
+registry = ModelRegistry()
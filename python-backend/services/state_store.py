@@ -0,0 +1,147 @@
+"""
+State Store - In-process LRU cache with disk spill
+
+Keeps hot objects (filter states, fitted models) in memory and spills the
+least recently used ones to MODEL_PATH with joblib, reloading them on demand.
+"""
+import os
+import re
+import threading
+import uuid
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+import joblib
+
+MODEL_PATH = os.getenv("MODEL_PATH", "./models/trained")
+
+_KEY_PATTERN = re.compile(r"^[A-Za-z0-9_\-]+$")
+
+# Every store, so all of them can be flushed on shutdown
+_stores = weakref.WeakSet()
+
+
+class LRUStateStore:
+    """
+    LRU key/value store backed by joblib files.
+
+    - get/put are O(1) on the in-memory OrderedDict
+    - entries beyond `capacity` are dumped to <MODEL_PATH>/<namespace>/<key>.joblib
+    - a spilled entry is loaded back (and promoted) on the next get
+    - update() is an atomic read-modify-write of one key; key_lock()
+      exposes the same per-key lock for values used in place
+    - spill=False makes it a plain in-memory LRU (evicted entries are
+      dropped), for objects that are cheap to rebuild or cannot be pickled
+    """
+
+    def __init__(self,
+                 namespace: str,
+                 capacity: int = 128,
+                 spill_dir: Optional[str] = None,
+                 spill: bool = True):
+        self.namespace = namespace
+        self.capacity = capacity
+        self.spill_dir = os.path.join(spill_dir or MODEL_PATH, namespace)
+        self.spill = spill
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._key_locks = {}
+        _stores.add(self)
+
+    @staticmethod
+    def new_key() -> str:
+        return uuid.uuid4().hex
+
+    def _path(self, key: str) -> str:
+        if not _KEY_PATTERN.match(key):
+            raise KeyError(key)
+        return os.path.join(self.spill_dir, f"{key}.joblib")
+
+    def put(self, key: str, value: Any):
+        path = self._path(key)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            # In-memory copy is now authoritative
+            if self.spill and os.path.exists(path):
+                os.remove(path)
+            while len(self._entries) > self.capacity:
+                old_key, old_value = self._entries.popitem(last=False)
+                self._spill(old_key, old_value)
+
+    def get(self, key: str) -> Any:
+        path = self._path(key)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            if not self.spill or not os.path.exists(path):
+                raise KeyError(key)
+            value = joblib.load(path)
+            self.put(key, value)
+            return value
+
+    def key_lock(self, key: str) -> threading.Lock:
+        """
+        The per-key lock update() holds.
+
+        For values that are used in place rather than replaced (e.g. a
+        matrix that must not be shared by concurrent jobs); the key does
+        not need to be present yet.
+        """
+        self._path(key)
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def update(self, key: str, fn: Callable[[Any], Tuple[Any, Any]]) -> Any:
+        """
+        Read-modify-write one entry under a per-key lock.
+
+        fn(value) -> (new_value, result); concurrent updates of the same
+        key are serialized, other keys are not blocked.
+        """
+        with self.key_lock(key):
+            new_value, result = fn(self.get(key))
+            self.put(key, new_value)
+            return result
+
+    def delete(self, key: str):
+        path = self._path(key)
+        with self._lock:
+            self._key_locks.pop(key, None)
+            found = self._entries.pop(key, None) is not None
+            if self.spill and os.path.exists(path):
+                os.remove(path)
+                found = True
+            if not found:
+                raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        try:
+            path = self._path(key)
+        except KeyError:
+            return False
+        with self._lock:
+            return key in self._entries or (self.spill and os.path.exists(path))
+
+    def flush(self):
+        """Spill every in-memory entry to disk (e.g. on shutdown)"""
+        if not self.spill:
+            return
+        with self._lock:
+            for key, value in self._entries.items():
+                self._spill(key, value)
+            self._entries.clear()
+
+    def _spill(self, key: str, value: Any):
+        if not self.spill:
+            return
+        os.makedirs(self.spill_dir, exist_ok=True)
+        joblib.dump(value, self._path(key))
+
+
+def flush_all():
+    """Spill every store's in-memory entries (called on app shutdown)"""
+    for store in list(_stores):
+        store.flush()
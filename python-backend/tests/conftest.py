@@ -0,0 +1,9 @@
+"""
+Shared test setup: stores write to a temporary MODEL_PATH, which must be
+set before the services modules read it at import time.
+"""
+
+import os
+import tempfile
+
+os.environ.setdefault("MODEL_PATH", tempfile.mkdtemp(prefix="qanwp-tests-"))
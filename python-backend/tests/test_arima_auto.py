@@ -0,0 +1,69 @@
+"""
+Auto-ARIMA order search: differencing, pruning and ranking.
+"""
+
+import numpy as np
+import pytest
+from statsmodels.tsa.arima.model import ARIMA
+
+from algorithms.scientific import arima_model
+
+
+def _ar2(seed: int, n: int = 200) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    x = np.zeros(n)
+    for t in range(2, n):
+        x[t] = 0.6 * x[t - 1] - 0.3 * x[t - 2] + rng.normal()
+    return 15 + x
+
+
+def test_differencing_follows_the_adf_test():
+    rng = np.random.default_rng(0)
+    assert arima_model.choose_differencing(rng.normal(size=200))["d"] == 0
+    walk = arima_model.choose_differencing(np.cumsum(rng.normal(size=200)))
+    assert walk["d"] == 1
+    assert len(walk["adf_p_values"]) == 2
+
+
+def test_best_order_is_the_exhaustive_minimum():
+    data = _ar2(1)
+    result = arima_model.select_order(data, max_p=2, max_q=2, n_jobs=1, prune_iterations=0)
+    d = result["differencing"]["d"]
+    aic = {
+        (p, d, q): ARIMA(data, order=(p, d, q)).fit().aic
+        for p in range(3) for q in range(3)
+    }
+    assert result["best_order"] == min(aic, key=aic.get)
+    assert result["candidates_total"] == 9
+    assert [m["aic"] for m in result["top_models"]] == pytest.approx(sorted(aic.values())[:3])
+
+
+def test_pruning_keeps_the_winner_and_accounts_for_every_candidate():
+    data = _ar2(2)
+    full = arima_model.select_order(data, max_p=2, max_q=2, n_jobs=1, prune_iterations=0)
+    pruned = arima_model.select_order(data, max_p=2, max_q=2, n_jobs=1, prune_margin=2.0)
+    assert pruned["candidates_pruned"] > 0
+    assert pruned["best_order"] == full["best_order"]
+    assert len(pruned["top_models"]) == 3
+    assert len(pruned["candidate_timings"]) == 9
+    assert sum(bool(t.get("pruned")) for t in pruned["candidate_timings"]) == pruned["candidates_pruned"]
+
+
+def test_bic_ranking_and_bad_criterion():
+    data = _ar2(3)
+    result = arima_model.select_order(data, max_p=1, max_q=1, criterion="bic", n_jobs=1)
+    bics = [m["bic"] for m in result["top_models"]]
+    assert bics == sorted(bics)
+    with pytest.raises(ValueError):
+        arima_model.select_order(data, criterion="hqic")
+
+
+def test_run_forecast_with_auto_order():
+    result = arima_model.run_forecast(
+        _ar2(4).tolist(), "auto", 4, max_p=2, max_q=1, n_jobs=1, diagnostics="none"
+    )
+    best = result["order_selection"]["best_order"]
+    assert (result["parameters"]["p"], result["parameters"]["d"], result["parameters"]["q"]) == best
+    assert len(result["forecast"]["forecast"]) == 4
+    with pytest.raises(ValueError):
+        arima_model.run_forecast(_ar2(4).tolist(), "best")
@@ -0,0 +1,41 @@
+"""
+ARIMA batch endpoint: request validation and per-series NDJSON lines.
+"""
+
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+def _spec(seed: int) -> dict:
+    data = 20 + np.cumsum(np.random.default_rng(seed).normal(size=80))
+    return {"data": data.tolist(), "order": [1, 1, 1], "forecast_steps": 3, "diagnostics": "none"}
+
+
+@pytest.mark.parametrize("max_concurrency", [0, -1])
+def test_non_positive_concurrency_is_rejected(client, max_concurrency):
+    response = client.post("/api/scientific/arima/batch", json={
+        "series": {"a": _spec(0)}, "max_concurrency": max_concurrency
+    })
+    assert response.status_code == 422
+
+
+def test_batch_streams_one_line_per_series(client):
+    response = client.post("/api/scientific/arima/batch", json={
+        "series": {"a": _spec(0), "b": _spec(1), "short": {"data": [1.0, 2.0], "order": [1, 1, 1]}},
+        "max_concurrency": 2
+    })
+    assert response.status_code == 200
+    lines = {item["series"]: item for item in map(json.loads, response.text.splitlines())}
+    assert lines["a"]["status"] == lines["b"]["status"] == "ok"
+    assert lines["short"]["status"] == "error"
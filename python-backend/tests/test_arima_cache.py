@@ -0,0 +1,90 @@
+"""
+ARIMA fit cache: exact repeats reuse the fit, extended series are
+appended through the state-space path, anything else refits.
+"""
+
+import numpy as np
+import pytest
+from statsmodels.tsa.arima.model import ARIMA
+
+from algorithms.scientific import arima_model
+from algorithms.scientific.arima_model import WeatherARIMA
+
+ORDER = (1, 1, 1)
+
+
+def _series(seed: int, n: int = 140) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 20 + np.cumsum(rng.normal(scale=0.5, size=n))
+
+
+def _fit(data, series_id, refit_every=10):
+    return arima_model.fit_cached(data, WeatherARIMA(order=ORDER), series_id, refit_every)
+
+
+def test_repeat_is_a_hit():
+    data = _series(0)
+    first, _, info = _fit(data, "cache-hit")
+    assert info["status"] == "miss"
+    again, _, info = _fit(data, "cache-hit")
+    assert info["status"] == "hit"
+    assert again.fitted is first.fitted
+    assert again.forecast(5) == first.forecast(5)
+
+
+def test_extension_is_appended_with_the_cached_parameters():
+    data = _series(1)
+    base, _, _ = _fit(data[:120], "cache-append")
+    params = np.asarray(base.fitted.params)
+
+    arima, _, info = _fit(data, "cache-append")
+    assert info["status"] == "append"
+    assert info["appended_points"] == 20
+    np.testing.assert_allclose(arima.fitted.params, params)
+
+    # Same as filtering the full series with the old parameters
+    reference = ARIMA(data, order=ORDER).filter(params)
+    np.testing.assert_allclose(
+        arima.forecast(5)["forecast"], reference.get_forecast(5).predicted_mean, rtol=1e-8
+    )
+
+
+def test_parameters_are_reestimated_every_refit_every_appends():
+    data = _series(2)
+    _fit(data[:100], "cache-refit", refit_every=2)
+    statuses = [
+        _fit(data[:end], "cache-refit", refit_every=2)[2]["status"]
+        for end in (110, 120, 130)
+    ]
+    assert statuses == ["append", "refit", "append"]
+
+
+def test_changed_history_is_a_full_fit():
+    data = _series(3)
+    _fit(data[:120], "cache-changed")
+    revised = data.copy()
+    revised[50] += 1.0
+    assert _fit(revised, "cache-changed")[2]["status"] == "miss"
+
+
+def test_keys_separate_ids_orders_and_anonymous_data():
+    data = _series(4)
+    assert arima_model._cache_key(data, WeatherARIMA(order=ORDER), "jenin/1") != \
+        arima_model._cache_key(data, WeatherARIMA(order=ORDER), "jenin:1")
+    assert arima_model._cache_key(data, WeatherARIMA(order=ORDER), "jenin") != \
+        arima_model._cache_key(data, WeatherARIMA(order=(2, 1, 1)), "jenin")
+    # Without an id only the exact same data hits
+    _fit(data, None)
+    assert _fit(data, None)[2]["status"] == "hit"
+    assert _fit(data[:-1], None)[2]["status"] == "miss"
+
+
+def test_run_forecast_reports_the_cache():
+    data = _series(5).tolist()
+    first = arima_model.run_forecast(data[:130], ORDER, 3, series_id="cache-run", diagnostics="none")
+    second = arima_model.run_forecast(data, ORDER, 3, series_id="cache-run", diagnostics="none")
+    assert first["fit_cache"]["status"] == "miss"
+    assert second["fit_cache"]["status"] == "append"
+    assert second["in_sample_metrics"]["n_observations"] == len(data)
+    with pytest.raises(ValueError):
+        arima_model.run_forecast(data[:5], ORDER)
@@ -0,0 +1,54 @@
+"""
+ARIMA worker pools: real fits and forecasts run in the pinned worker
+processes, which are not forked from the (TensorFlow-loaded) server.
+"""
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from algorithms.scientific import arima_model
+
+
+@pytest.fixture(scope="module")
+def pools():
+    os.environ["ARIMA_WORKERS"] = "2"
+    yield arima_model.get_worker_pools()
+    arima_model.shutdown_pools()
+    os.environ.pop("ARIMA_WORKERS")
+
+
+def _series(seed: int, n: int = 120) -> list:
+    rng = np.random.default_rng(seed)
+    return (20 + np.cumsum(rng.normal(scale=0.5, size=n))).tolist()
+
+
+def test_workers_use_a_clean_start_method(pools):
+    assert len(pools) == 2
+    for pool in pools:
+        assert pool._mp_context.get_start_method() in ("forkserver", "spawn")
+
+
+def test_batch_forecast_runs_in_pinned_worker(pools):
+    params = {"data": _series(0), "order": (1, 1, 1), "forecast_steps": 5, "series_id": "gaza_temperature"}
+    pool = arima_model.pool_for_series("gaza_temperature")
+    assert pool is arima_model.pool_for_series("gaza_temperature")
+
+    item = json.loads(pool.submit(arima_model.forecast_series, "gaza", params).result(timeout=300))
+    assert item["status"] == "ok", item.get("error")
+    assert len(item["result"]["forecast"]["forecast"]) == 5
+
+    # Same worker, same data: the worker's fit cache serves the second call
+    again = json.loads(pool.submit(arima_model.forecast_series, "gaza", params).result(timeout=300))
+    assert again["result"]["fit_cache"]["status"] == "hit"
+    assert again["result"]["forecast"]["forecast"] == item["result"]["forecast"]["forecast"]
+
+
+def test_parallel_order_search_matches_serial(pools):
+    data = np.asarray(_series(1))
+    parallel = arima_model.select_order(data, max_p=2, max_q=1, n_jobs=2)
+    serial = arima_model.select_order(data, max_p=2, max_q=1, n_jobs=1)
+    assert parallel["best_order"] == serial["best_order"]
+    assert [m["aic"] for m in parallel["top_models"]] == pytest.approx([m["aic"] for m in serial["top_models"]])
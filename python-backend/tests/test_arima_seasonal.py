@@ -0,0 +1,83 @@
+"""
+Seasonal ARIMA: mode selection and Fourier regressors for long seasons.
+"""
+
+import numpy as np
+import pytest
+from statsmodels.tsa.arima.model import ARIMA
+
+from algorithms.scientific import arima_model
+from algorithms.scientific.arima_model import WeatherARIMA
+
+PERIOD = 50
+
+
+def _seasonal(seed: int, n: int = 300) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    t = np.arange(n)
+    return 20 + 5 * np.sin(2 * np.pi * t / PERIOD) + rng.normal(scale=0.3, size=n)
+
+
+def test_fourier_terms_match_direct_evaluation():
+    t = np.arange(360, 375)
+    basis = arima_model.fourier_terms(365, 3, 360, 15)
+    for k in range(1, 4):
+        np.testing.assert_allclose(basis[:, 2 * k - 2], np.sin(2 * np.pi * k * t / 365), atol=1e-12)
+        np.testing.assert_allclose(basis[:, 2 * k - 1], np.cos(2 * np.pi * k * t / 365), atol=1e-12)
+
+
+@pytest.mark.parametrize("kwargs,mode,fourier", [
+    ({}, "none", 0),
+    ({"seasonal_period": 24}, "native", 0),
+    ({"seasonal_period": 365}, "fourier", 4),
+    ({"seasonal_period": 24, "fourier_terms": 3}, "fourier", 3),
+    ({"seasonal_period": 4, "fourier_terms": 6}, "fourier", 2),
+])
+def test_seasonal_mode_selection(kwargs, mode, fourier):
+    arima = WeatherARIMA(order=(1, 0, 0), **kwargs)
+    assert arima.seasonal_mode == mode
+    assert arima.fourier_terms == fourier
+
+
+def test_period_below_two_is_rejected():
+    with pytest.raises(ValueError):
+        WeatherARIMA(seasonal_period=1)
+
+
+def test_fourier_forecast_continues_the_season():
+    data = _seasonal(0)
+    arima = WeatherARIMA(order=(1, 0, 0), seasonal_period=PERIOD, fourier_terms=2)
+    stats = arima.fit(data)
+    assert len(stats["fourier_coefficients"]) == 4
+
+    steps = 25
+    t = np.arange(len(data), len(data) + steps)
+    expected = 20 + 5 * np.sin(2 * np.pi * t / PERIOD)
+    forecast = np.asarray(arima.forecast(steps)["forecast"])
+    assert np.max(np.abs(forecast - expected)) < 1.0
+
+
+def test_appended_fourier_fit_keeps_the_phase():
+    data = _seasonal(1)
+    arima_model.fit_cached(data[:260], WeatherARIMA((1, 0, 0), PERIOD, fourier_terms=2), "fourier-append")
+    arima, _, info = arima_model.fit_cached(
+        data, WeatherARIMA((1, 0, 0), PERIOD, fourier_terms=2), "fourier-append"
+    )
+    assert info["status"] == "append"
+
+    exog = arima_model.fourier_terms(PERIOD, 2, 0, len(data))
+    reference = ARIMA(data, exog=exog, order=(1, 0, 0)).filter(arima.fitted.params)
+    future = arima_model.fourier_terms(PERIOD, 2, len(data), 10)
+    np.testing.assert_allclose(
+        arima.forecast(10)["forecast"], reference.get_forecast(10, exog=future).predicted_mean, rtol=1e-8
+    )
+
+
+def test_run_forecast_reports_seasonality():
+    result = arima_model.run_forecast(
+        _seasonal(2).tolist(), (1, 0, 0), 5, seasonal_period=PERIOD, fourier_terms=2, diagnostics=["equation"]
+    )
+    assert result["seasonality"] == {
+        "mode": "fourier", "period": PERIOD, "seasonal_order": None, "fourier_terms": 2
+    }
+    assert f"Fourier(s={PERIOD}, K=2)" in result["mathematical_formulation"]["full_equation"]
@@ -0,0 +1,98 @@
+"""
+Inference engine parity: CompiledTrees / NumpyLSTM must reproduce the
+predictions of the libraries they replace.
+"""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import (
+    AdaBoostRegressor,
+    GradientBoostingRegressor,
+    HistGradientBoostingRegressor,
+    RandomForestRegressor,
+    VotingRegressor,
+)
+from sklearn.linear_model import Ridge
+
+from algorithms.ml import lstm_engine, tree_engine
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 5))
+    X[::17, 2] = np.nan
+    y = 2 * np.nan_to_num(X[:, 0]) - X[:, 1] ** 2 + rng.normal(scale=0.1, size=300)
+    return X, y
+
+
+@pytest.mark.parametrize("model", [
+    RandomForestRegressor(n_estimators=20, max_depth=6, random_state=0),
+    GradientBoostingRegressor(n_estimators=30, random_state=0),
+    HistGradientBoostingRegressor(max_iter=30, random_state=0),
+    AdaBoostRegressor(n_estimators=20, random_state=0),
+], ids=lambda model: type(model).__name__)
+def test_compiled_trees_match_sklearn(data, model):
+    X, y = data
+    if not isinstance(model, HistGradientBoostingRegressor):
+        X = np.nan_to_num(X)
+    model.fit(X, y)
+    compiled = tree_engine.compile_model(model)
+    assert isinstance(compiled, tree_engine.CompiledTrees)
+    np.testing.assert_allclose(compiled.predict(X), model.predict(X), rtol=1e-6, atol=1e-6)
+
+
+def test_compiled_voting_matches_sklearn(data):
+    X, y = np.nan_to_num(data[0]), data[1]
+    model = VotingRegressor([
+        ("rf", RandomForestRegressor(n_estimators=10, random_state=0)),
+        ("ridge", Ridge()),
+    ], weights=[2, 1]).fit(X, y)
+    compiled = tree_engine.compile_model(model)
+    np.testing.assert_allclose(compiled.predict(X), model.predict(X), rtol=1e-6, atol=1e-6)
+
+
+def test_hist_with_unknown_tree_layout_falls_back(data, monkeypatch):
+    def changed_layout(predictor):
+        raise KeyError("num_threshold")
+
+    X, y = data
+    model = HistGradientBoostingRegressor(max_iter=10, random_state=0).fit(X, y)
+    monkeypatch.setattr(tree_engine, "_hist_tree", changed_layout)
+    compiled = tree_engine.compile_model(model)
+    assert isinstance(compiled, tree_engine.LibraryPredict)
+    np.testing.assert_allclose(compiled.predict(X), model.predict(X))
+
+
+def test_compiled_xgboost_matches_booster(data):
+    xgb = pytest.importorskip("xgboost")
+    X, y = data
+    model = xgb.XGBRegressor(n_estimators=30, max_depth=4, tree_method="hist").fit(X, y)
+    compiled = tree_engine.compile_model(model)
+    np.testing.assert_allclose(compiled.predict(X), model.predict(X), rtol=1e-5, atol=1e-5)
+
+
+@pytest.mark.parametrize("head,horizon", [("direct", 1), ("direct", 3), ("seq2seq", 3)])
+def test_numpy_lstm_matches_keras(tmp_path, head, horizon):
+    pytest.importorskip("tensorflow")
+    from algorithms.ml.lstm_predictor import WeatherLSTM
+
+    lstm = WeatherLSTM(sequence_length=8, n_features=3, hidden_units=[16, 8], horizon=horizon, head=head)
+    # Non-trivial normalization statistics so BatchNormalization folding is exercised
+    rng = np.random.default_rng(1)
+    for layer in lstm.model.layers:
+        if type(layer).__name__ == "BatchNormalization":
+            gamma, beta, mean, var = layer.get_weights()
+            layer.set_weights([
+                rng.uniform(0.5, 1.5, gamma.shape), rng.normal(size=beta.shape),
+                rng.normal(size=mean.shape), rng.uniform(0.5, 2.0, var.shape)
+            ])
+
+    path = str(tmp_path / "weights.npz")
+    lstm.export_weights(path)
+    engine = lstm_engine.NumpyLSTM.load(path)
+
+    X = rng.normal(size=(16, 8, 3)).astype(np.float32)
+    expected = lstm.model.predict(X, verbose=0)
+    expected = expected[:, 0] if horizon == 1 else expected.reshape(len(X), -1)
+    np.testing.assert_allclose(engine.predict(X), expected, rtol=1e-4, atol=1e-5)
@@ -0,0 +1,86 @@
+"""
+Ensemble member cache: weight and meta-learner changes reuse member fits.
+"""
+
+import numpy as np
+import pytest
+from sklearn.linear_model import Ridge
+
+from algorithms.ml import ensemble_voting
+from algorithms.ml.ensemble_voting import WeatherEnsembleVoting
+from algorithms.ml.validation import validation_splits
+
+MODELS = ["ridge", "random_forest"]
+
+
+def _data(seed: int):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(120, 4))
+    y = X[:, 0] - 0.5 * X[:, 1] ** 2 + rng.normal(scale=0.1, size=120)
+    return X, y
+
+
+def test_voting_weight_change_reuses_member_fits():
+    X, y = _data(0)
+    first = WeatherEnsembleVoting(models=MODELS, n_jobs=1).train(X, y, "kfold", 3)
+    assert first["member_cache"] == {"hits": 0, "misses": 2}
+
+    weighted = WeatherEnsembleVoting(models=MODELS, weights=[3.0, 1.0], n_jobs=1)
+    metrics = weighted.train(X, y, "kfold", 3)
+    assert metrics["member_cache"] == {"hits": 2, "misses": 0}
+
+    members = weighted.predict_all_models(X)
+    expected = np.average(np.vstack([members["ridge"], members["rf"]]), axis=0, weights=[3.0, 1.0])
+    np.testing.assert_allclose(weighted.predict(X), expected)
+    np.testing.assert_allclose(members["ensemble"], expected)
+    assert metrics["ensemble_metrics"] != first["ensemble_metrics"]
+
+
+def test_other_fold_layout_is_a_cache_miss():
+    X, y = _data(1)
+    WeatherEnsembleVoting(models=MODELS, n_jobs=1).train(X, y, "blocked", 3)
+    metrics = WeatherEnsembleVoting(models=MODELS, n_jobs=1).train(X, y, "blocked", 3, gap=2)
+    assert metrics["member_cache"] == {"hits": 0, "misses": 2}
+
+
+def test_stacking_meta_learner_swap_reuses_oof_predictions():
+    X, y = _data(2)
+    nnls = WeatherEnsembleVoting(models=MODELS, n_jobs=1, combiner="stacking")
+    first = nnls.train(X, y, "kfold", 3)
+    assert first["oof_cache"] == {"hits": 0, "misses": 2}
+
+    ridge = WeatherEnsembleVoting(models=MODELS, n_jobs=1, combiner="stacking", meta_learner="ridge")
+    swapped = ridge.train(X, y, "kfold", 3)
+    assert swapped["oof_cache"] == {"hits": 2, "misses": 0}
+    assert swapped["individual_metrics"] == first["individual_metrics"]
+    assert all(w >= 0 for w in first["meta_learner"]["weights"].values())
+
+
+def test_weights_are_validated():
+    with pytest.raises(ValueError):
+        WeatherEnsembleVoting(models=MODELS, weights=[1.0])
+    with pytest.raises(ValueError):
+        WeatherEnsembleVoting(models=MODELS, weights=[1.0, 1.0], combiner="stacking")
+
+
+def test_train_and_predict_passes_weights():
+    X, y = _data(3)
+    result = ensemble_voting.train_and_predict(X, y, X[:5], validation="none", weights=[1, 1, 1, 2])
+    assert result["training_metrics"]["weights"] == [1, 1, 1, 2]
+    assert len(result["predictions"]["ensemble"]) == 5
+
+
+def test_stacking_uses_out_of_fold_predictions():
+    X, y = _data(4)
+    ensemble = WeatherEnsembleVoting(models=["ridge"], n_jobs=1, combiner="stacking")
+    metrics = ensemble.train(X, y, "blocked", 4, gap=2)
+
+    oof = np.empty(len(y))
+    for train_idx, test_idx in validation_splits(len(y), "blocked", 4, 2)[0]:
+        oof[test_idx] = Ridge(alpha=1.0).fit(X[train_idx], y[train_idx]).predict(X[test_idx])
+    expected_mae = np.mean(np.abs(y - oof))
+    assert metrics["individual_metrics"]["ridge"]["mae"] == pytest.approx(expected_mae)
+    # Members used for prediction are refitted on all rows
+    np.testing.assert_allclose(
+        ensemble.predict_all_models(X)["ridge"], Ridge(alpha=1.0).fit(X, y).predict(X)
+    )
@@ -0,0 +1,66 @@
+"""
+Category executor: concurrency limits, queue rejection and pool kinds.
+"""
+
+import asyncio
+import os
+import threading
+
+import pytest
+
+from services import executor
+
+
+def _pid(_=None) -> int:
+    return os.getpid()
+
+
+def test_concurrency_limit_and_queue_rejection():
+    pool = executor.CategoryExecutor("test", "thread", workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.create_task(pool.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        second = asyncio.create_task(pool.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        assert pool.running == 1 and pool.queued == 1
+        with pytest.raises(executor.ExecutorBusy):
+            await pool.run(release.wait, 5)
+        release.set()
+        return await asyncio.gather(first, second)
+
+    try:
+        assert asyncio.run(scenario()) == [True, True]
+    finally:
+        pool.shutdown()
+    metrics = pool.metrics()
+    assert metrics["completed"] == 2
+    assert metrics["rejected"] == 1
+    assert metrics["max_queue_seen"] == 1
+
+
+def test_failures_are_counted_and_raised():
+    pool = executor.CategoryExecutor("test", "thread", workers=2, max_queue=0)
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(pool.run(fail))
+    pool.shutdown()
+    assert pool.metrics()["failed"] == 1
+
+
+def test_process_pool_does_not_fork_the_server():
+    pool = executor.CategoryExecutor("test", "process", workers=1, max_queue=0)
+    try:
+        assert asyncio.run(pool.run(_pid)) != os.getpid()
+        assert pool.pool._mp_context.get_start_method() in ("forkserver", "spawn")
+    finally:
+        pool.shutdown()
+
+
+def test_light_category_rejects_process_pools():
+    with pytest.raises(ValueError):
+        executor.CategoryExecutor("light", "process", workers=2, max_queue=0)
@@ -0,0 +1,37 @@
+"""
+Gradient Boosting: the staged curve is opt-in.
+"""
+
+import numpy as np
+import pytest
+
+from algorithms.ml.gradient_boosting import WeatherGradientBoosting
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 4))
+    y = X[:, 0] + np.sin(X[:, 1]) + rng.normal(scale=0.1, size=200)
+    return X, y
+
+
+def test_default_training_skips_staged_predict(data, monkeypatch):
+    def staged_predict(self, X):
+        raise AssertionError("staged_predict called without curve_every")
+
+    gb = WeatherGradientBoosting(n_estimators=20)
+    monkeypatch.setattr(type(gb.model), "staged_predict", staged_predict)
+    metrics = gb.train(*data)
+    assert metrics["staged_curve"] is None
+    assert metrics["test_metrics"]["r2"] > 0.5
+    assert len(metrics["learning_curve"]["train_loss"]) == 20
+
+
+def test_staged_curve_matches_final_test_metrics(data):
+    gb = WeatherGradientBoosting(n_estimators=20)
+    metrics = gb.train(*data, curve_every=5)
+    curve = metrics["staged_curve"]
+    assert curve["stages"] == [1, 6, 11, 16, 20]
+    rmse = metrics["test_metrics"]["rmse"]
+    assert curve["test_mse"][-1] == pytest.approx(rmse ** 2)
@@ -0,0 +1,173 @@
+"""
+Kalman filtering: the batch filter and the steady-state fast path must
+reproduce the step-by-step recursion, and the smoothers filterpy's RTS.
+"""
+
+import numpy as np
+import pytest
+
+from algorithms.scientific import kalman_filter
+from algorithms.scientific.kalman_filter import BatchWeatherKalmanFilter, WeatherKalmanFilter
+
+
+def _series(seed: int, n: int = 60) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 20 + np.cumsum(rng.normal(scale=0.3, size=n)) + rng.normal(scale=1.0, size=n)
+
+
+def _single(data, process_noise=0.1, measurement_noise=1.0):
+    kf = WeatherKalmanFilter()
+    kf.configure(process_noise, measurement_noise)
+    return kf, kf.filter_data(list(data))
+
+
+def test_batch_matches_single_series_filter():
+    data = np.vstack([_series(seed) for seed in range(4)])
+    batch = BatchWeatherKalmanFilter(len(data))
+    batch.configure(0.1, 1.0)
+    result = batch.filter_data(data)
+
+    for i, row in enumerate(data):
+        kf, single = _single(row)
+        np.testing.assert_allclose(result["filtered"][i], single["filtered"], rtol=1e-10)
+        np.testing.assert_allclose(result["kalman_gains"][i], single["kalman_gains"], rtol=1e-10)
+        np.testing.assert_allclose(result["final_covariances"][i], single["final_covariance"], rtol=1e-10)
+        np.testing.assert_allclose(batch.forecast(7)[i], kf.forecast(7), rtol=1e-10)
+
+
+def test_missing_observations_only_predict():
+    data = _series(4, 20)
+    gappy = data.copy()
+    gappy[[5, 6, 12]] = np.nan
+    batch = BatchWeatherKalmanFilter(2)
+    batch.configure(0.1, 1.0)
+    result = batch.filter_data(np.vstack([data, gappy]))
+
+    gains = result["kalman_gains"][1]
+    assert np.all(gains[[5, 6, 12]] == 0)
+    assert np.all(np.isnan(result["innovations"][1, [5, 6, 12]]))
+    # A skipped update leaves the constant-velocity prediction
+    position, velocity = result["filtered"][1, 4], result["velocities"][1, 4]
+    assert result["filtered"][1, 5] == pytest.approx(position + velocity)
+    # Uncertainty grows across the gap and shrinks after the next reading
+    uncertainty = result["uncertainties"][1]
+    assert uncertainty[4] < uncertainty[5] < uncertainty[6] > uncertainty[7]
+    np.testing.assert_allclose(result["filtered"][1, :5], result["filtered"][0, :5])
+
+
+def test_run_batch_filter_names_series_and_counts_missing():
+    result = kalman_filter.run_batch_filter(
+        [[20.1, 20.5, 21.2, 20.8], [15.0, None, 15.6, 16.1]],
+        series_ids=["jenin", "hebron"], forecast_steps=3
+    )
+    assert result["input"]["missing_values"] == 1
+    series = result["output"]["series"]
+    assert series["hebron"]["metrics"]["observations"] == 3
+    assert len(series["jenin"]["forecast"]) == 3
+
+
+@pytest.mark.parametrize("data,kwargs", [
+    ([[1.0, 2.0]], {}),
+    ([[1.0, 2.0, 3.0], [None, None, None]], {}),
+    ([[1.0, 2.0, 3.0]], {"series_ids": ["a", "b"]}),
+])
+def test_run_batch_filter_rejects_bad_input(data, kwargs):
+    with pytest.raises(ValueError):
+        kalman_filter.run_batch_filter(data, **kwargs)
+
+
+def test_steady_state_gain_is_the_limit_of_the_recursion():
+    kf, result = _single(_series(5, 300))
+    steady = kf.steady_state_gain()
+    assert result["kalman_gains"][-1] == pytest.approx(steady["gain"][0, 0], rel=1e-9)
+    np.testing.assert_allclose(result["final_covariance"], steady["P_filt"], rtol=1e-6)
+
+
+def test_steady_state_fast_path_matches_full_recursion():
+    data = list(_series(6, 400))
+    _, full = _single(data)
+    kf = WeatherKalmanFilter()
+    kf.configure(0.1, 1.0)
+    fast = kf.filter_data_steady_state(data, tolerance=1e-10)
+
+    assert fast["switch_step"] is not None and fast["switch_step"] < len(data)
+    np.testing.assert_allclose(fast["filtered"], full["filtered"], rtol=1e-7)
+    np.testing.assert_allclose(fast["velocities"], full["velocities"], atol=1e-7)
+    np.testing.assert_allclose(fast["innovations"], full["innovations"], atol=1e-6)
+    assert fast["final_state"]["position"] == pytest.approx(full["final_state"]["position"])
+
+
+def test_run_filter_reports_the_switch():
+    data = list(_series(7, 200))
+    result = kalman_filter.run_filter(data, steady_state=True)
+    steady = result["steady_state"]
+    assert steady["converged"]
+    assert steady["fast_path_steps"] == len(data) - steady["switch_step"]
+    np.testing.assert_allclose(
+        result["output"]["filtered_all"], kalman_filter.run_filter(data)["output"]["filtered_all"], rtol=1e-6
+    )
+
+
+def _reference_rts(data, process_noise=0.1, measurement_noise=1.0):
+    """filterpy batch filter + RTS smoother on the same model"""
+    from filterpy.kalman import KalmanFilter
+
+    ref = KalmanFilter(dim_x=2, dim_z=1)
+    ref.F = np.array([[1., 1.], [0., 1.]])
+    ref.H = np.array([[1., 0.]])
+    ref.P *= 1000.
+    ref.Q = np.array([[0.25, 0.5], [0.5, 1.0]]) * process_noise
+    ref.R = np.array([[measurement_noise]])
+    ref.x = np.array([[data[0]], [0.]])
+    mu, cov, _, _ = ref.batch_filter(list(data))
+    xs, Ps, _, _ = ref.rts_smoother(mu, cov)
+    return xs[:, :, 0], Ps
+
+
+def test_rts_matches_reference_smoother():
+    data = _series(8, 80)
+    kf, _ = _single(data)
+    smoothed = kf.rts_smooth()
+    xs, Ps = _reference_rts(data)
+    np.testing.assert_allclose(smoothed["smoothed"], xs[:, 0], rtol=1e-9)
+    np.testing.assert_allclose(smoothed["velocities"], xs[:, 1], atol=1e-9)
+    np.testing.assert_allclose(smoothed["uncertainties"], Ps[:, 0, 0], rtol=1e-8)
+
+
+def test_rts_after_steady_state_run_matches_full_run():
+    data = list(_series(9, 300))
+    full, _ = _single(data)
+    fast = WeatherKalmanFilter()
+    fast.configure(0.1, 1.0)
+    fast.filter_data_steady_state(data, tolerance=1e-10)
+    np.testing.assert_allclose(fast.rts_smooth()["smoothed"], full.rts_smooth()["smoothed"], rtol=1e-7)
+
+
+def test_fixed_lag_is_exact_rts_on_the_data_so_far():
+    data = _series(10, 40)
+    lag = 4
+    smoother = kalman_filter.FixedLagKalmanSmoother(lag, 0.1, 1.0)
+    for k, z in enumerate(data):
+        estimate = smoother.update(z)
+        if k < lag:
+            assert estimate is None
+            continue
+        xs, _ = _reference_rts(data[:k + 1])
+        assert estimate["step"] == k - lag
+        assert estimate["smoothed"] == pytest.approx(xs[k - lag, 0], rel=1e-9)
+
+    tail = smoother.flush()
+    xs, _ = _reference_rts(data)
+    assert [est["step"] for est in tail] == list(range(len(data) - lag, len(data)))
+    np.testing.assert_allclose([est["smoothed"] for est in tail], xs[-lag:, 0], rtol=1e-9)
+
+
+def test_run_filter_smoothers():
+    data = list(_series(11, 30))
+    rts = kalman_filter.run_filter(data, smoother="rts")["smoothing"]
+    fixed = kalman_filter.run_filter(data, smoother="fixed_lag", lag=3)["smoothing"]
+    assert len(rts["smoothed_all"]) == len(fixed["smoothed_all"]) == len(data)
+    # The last lag estimates are flushed with all data, as in the full pass
+    np.testing.assert_allclose(fixed["smoothed_all"][-3:], rts["smoothed_all"][-3:], rtol=1e-9)
+    with pytest.raises(ValueError):
+        kalman_filter.run_filter(data, smoother="two_filter")
@@ -0,0 +1,114 @@
+"""
+Stored LSTM models: series training, versioned save/load, fine-tune
+lineage and serving.
+"""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+pytest.importorskip("tensorflow")
+
+import main
+from algorithms.ml import lstm_predictor
+from algorithms.ml.lstm_predictor import WeatherLSTM
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(40, 6, 2)).astype(np.float32)
+    y = X[:, -1, 0] + 0.5 * X[:, :, 1].mean(axis=1)
+    return X, y
+
+
+@pytest.fixture(scope="module")
+def stored(client, data):
+    X, y = data
+    response = client.post("/api/ml/lstm", json={
+        "X_train": X.tolist(), "y_train": y.tolist(), "X_predict": X[:5].tolist(),
+        "epochs": 1, "save_model": True, "model_id": "lstm-round-trip"
+    })
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_series_training_records_window_count(client):
+    series = np.sin(np.arange(60) / 4).tolist()
+    response = client.post("/api/ml/lstm/series", json={
+        "series": series, "sequence_length": 8, "epochs": 1,
+        "save_model": True, "model_id": "series-windows"
+    })
+    assert response.status_code == 200
+    windows = response.json()["training_metrics"]["pipeline"]["windows"]
+    assert windows == len(series) - 8
+
+    metadata = client.get("/api/ml/lstm/series-windows").json()
+    assert metadata["n_samples"] == windows
+    assert metadata["version"] == 1
+
+
+def test_default_hidden_units_are_not_shared():
+    first = WeatherLSTM(sequence_length=4, n_features=1)
+    first.hidden_units.append(8)
+    assert WeatherLSTM(sequence_length=4, n_features=1).hidden_units == [64, 32]
+
+
+def test_stored_model_serves_the_trained_predictions(client, data, stored):
+    X, _ = data
+    assert (stored["model_id"], stored["model_version"]) == ("lstm-round-trip", 1)
+    served = client.post("/api/ml/lstm/lstm-round-trip/predict", json={"X_predict": X[:5].tolist()})
+    assert served.status_code == 200
+    assert served.json()["model_version"] == 1
+    np.testing.assert_allclose(served.json()["predictions"], stored["predictions"], rtol=1e-5, atol=1e-6)
+
+
+def test_load_from_disk_restores_weights(stored, data):
+    X, _ = data
+    served, _ = lstm_predictor.load_model("lstm-round-trip", 1)
+    private, version = lstm_predictor.load_model("lstm-round-trip", 1, cached=False)
+    assert version == 1 and private is not served
+    for expected, loaded in zip(served.model.get_weights(), private.model.get_weights()):
+        np.testing.assert_array_equal(loaded, expected)
+    np.testing.assert_allclose(private.model.predict(X[:5], verbose=0)[:, 0], stored["predictions"], rtol=1e-5, atol=1e-6)
+
+
+def test_resave_and_fine_tune_add_versions_with_lineage(client, data, stored):
+    X, y = data
+    retrained = client.post("/api/ml/lstm", json={
+        "X_train": X[:20].tolist(), "y_train": y[:20].tolist(), "epochs": 1,
+        "save_model": True, "model_id": "lstm-round-trip"
+    }).json()
+    assert retrained["model_version"] == 2
+    pinned = client.post("/api/ml/lstm/lstm-round-trip/predict", json={"X_predict": X[:5].tolist(), "version": 1})
+    np.testing.assert_allclose(pinned.json()["predictions"], stored["predictions"], rtol=1e-5, atol=1e-6)
+
+    tuned = client.post("/api/ml/lstm", json={
+        "X_train": X[20:].tolist(), "y_train": y[20:].tolist(), "epochs": 1,
+        "base_model_id": "lstm-round-trip", "save_model": True
+    }).json()
+    assert (tuned["base_version"], tuned["model_version"]) == (2, 3)
+    metadata = client.get("/api/ml/lstm/lstm-round-trip").json()
+    assert metadata["operation"] == "fine-tune"
+    assert (metadata["parent_model_id"], metadata["parent_version"]) == ("lstm-round-trip", 2)
+    assert metadata["lineage"] == [2]
+    models = client.get("/api/ml/lstm/models").json()["models"]
+    assert {"model_id": "lstm-round-trip", "versions": [1, 2, 3], "latest": 3} in models
+
+
+@pytest.mark.parametrize("path,body,status", [
+    ("/api/ml/lstm/absent/predict", {"X_predict": np.zeros((1, 6, 2)).tolist()}, 404),
+    ("/api/ml/lstm/bad.id/predict", {"X_predict": np.zeros((1, 6, 2)).tolist()}, 400),
+    ("/api/ml/lstm/lstm-round-trip/predict", {"X_predict": np.zeros((1, 5, 2)).tolist()}, 400),
+    ("/api/ml/lstm/lstm-round-trip/predict", {"X_predict": np.zeros((1, 6, 2)).tolist(), "version": 99}, 404),
+    ("/api/ml/lstm", {"X_train": np.zeros((4, 6, 2)).tolist(), "y_train": [0] * 4, "base_model_id": "absent"}, 404),
+])
+def test_error_statuses(client, stored, path, body, status):
+    response = client.post(path, json=body)
+    assert response.status_code == status, response.text
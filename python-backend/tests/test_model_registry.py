@@ -0,0 +1,104 @@
+"""
+Model registry: versioned storage and the train-once, predict-many
+endpoints.
+"""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.linear_model import Ridge
+
+import main
+from services.model_registry import ModelRegistry
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(80, 4))
+    y = X[:, 0] - 2 * X[:, 1] + rng.normal(scale=0.1, size=80)
+    return X.tolist(), y.tolist()
+
+
+def test_versions_and_lru(tmp_path):
+    registry = ModelRegistry(root=str(tmp_path), capacity=1)
+    X, y = np.eye(3), np.arange(3.0)
+    first = registry.register("ridge", Ridge().fit(X, y), {"note": "first"}, "station")
+    second = registry.register("ridge", Ridge(alpha=5).fit(X, y), {"note": "second"}, "station")
+    assert (first["version"], second["version"]) == (1, 2)
+    assert registry.versions("ridge", "station") == [1, 2]
+    assert registry.metadata("ridge", "station")["note"] == "second"
+    assert registry.metadata("ridge", "station", 1)["note"] == "first"
+
+    latest, version = registry.load("ridge", "station")
+    assert version == 2 and latest.alpha == 5
+    # Version 1 is no longer hot: loaded from disk, memory-mapped
+    old, _ = registry.load("ridge", "station", 1)
+    np.testing.assert_allclose(old.predict(X), Ridge().fit(X, y).predict(X))
+    assert registry.load("ridge", "station", 1)[0] is old
+    assert registry.load("ridge", "station", 1, cached=False)[0] is not old
+    assert registry.list_models("ridge") == [{"model_id": "station", "versions": [1, 2], "latest": 2}]
+
+
+def test_missing_and_malformed_ids(tmp_path):
+    registry = ModelRegistry(root=str(tmp_path))
+    with pytest.raises(KeyError):
+        registry.load("ridge", "absent")
+    with pytest.raises(KeyError):
+        registry.metadata("ridge", "absent")
+    with pytest.raises(ValueError):
+        registry.versions("ridge", "../escape")
+
+
+def test_train_predict_round_trip(client, data):
+    X, y = data
+    trained = client.post("/api/ml/random-forest/train", json={
+        "X_train": X, "y_train": y, "validation": "none", "model_id": "rf-round-trip"
+    })
+    assert trained.status_code == 200
+    assert trained.json()["model_version"] == 1
+
+    first = client.post("/api/ml/random-forest/rf-round-trip/predict", json={"X_predict": X[:5]}).json()
+    again = client.post("/api/ml/random-forest/rf-round-trip/predict", json={"X_predict": X[:5]}).json()
+    assert first["model_version"] == 1
+    assert again["predictions"] == first["predictions"]
+
+    retrained = client.post("/api/ml/random-forest/train", json={
+        "X_train": X[:40], "y_train": y[:40], "validation": "none", "model_id": "rf-round-trip"
+    }).json()
+    assert retrained["model_version"] == 2
+    pinned = client.post("/api/ml/random-forest/rf-round-trip/predict", json={"X_predict": X[:5], "version": 1})
+    assert pinned.json()["predictions"] == first["predictions"]
+
+    metadata = client.get("/api/ml/random-forest/rf-round-trip").json()
+    assert (metadata["version"], metadata["n_samples"], metadata["operation"]) == (2, 40, "train")
+    assert client.get("/api/ml/random-forest/rf-round-trip", params={"version": 1}).json()["n_samples"] == 80
+    models = client.get("/api/ml/random-forest/models").json()["models"]
+    assert {"model_id": "rf-round-trip", "versions": [1, 2], "latest": 2} in models
+
+
+@pytest.mark.parametrize("method,path,body,status", [
+    ("post", "/api/ml/random-forest/absent/predict", {"X_predict": [[0, 0, 0, 0]]}, 404),
+    ("post", "/api/ml/random-forest/bad.id/predict", {"X_predict": [[0, 0, 0, 0]]}, 400),
+    ("get", "/api/ml/random-forest/absent", None, 404),
+    ("get", "/api/ml/random-forest/bad.id", None, 400),
+    ("get", "/api/ml/kalman/models", None, 404),
+    ("post", "/api/ml/random-forest/absent/update", {"X_new": [[0, 0, 0, 0]], "y_new": [0]}, 400),
+])
+def test_error_statuses(client, method, path, body, status):
+    response = client.request(method.upper(), path, json=body)
+    assert response.status_code == status, response.text
+
+
+def test_train_with_malformed_id_is_rejected(client, data):
+    X, y = data
+    response = client.post("/api/ml/random-forest/train", json={
+        "X_train": X, "y_train": y, "validation": "none", "model_id": "bad id"
+    })
+    assert response.status_code == 400
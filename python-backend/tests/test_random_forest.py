@@ -0,0 +1,92 @@
+"""
+Random forest uncertainty: Quantile Regression Forest intervals against a
+brute-force reference, and their coverage.
+"""
+
+import numpy as np
+import pytest
+
+from algorithms.ml.random_forest import WeatherRandomForest
+
+
+def _heteroscedastic(seed: int, n: int):
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(0, 1, size=(n, 2))
+    # Noise grows with the first feature
+    y = 2 * X[:, 1] + rng.normal(scale=0.1 + 2 * X[:, 0], size=n)
+    return X, y
+
+
+@pytest.fixture(scope="module")
+def forest():
+    X, y = _heteroscedastic(0, 400)
+    rf = WeatherRandomForest(n_estimators=30, max_depth=6)
+    rf.train(X, y, validation="none")
+    return rf, X, y
+
+
+def _reference_quantiles(rf, X_train, y_train, X, q):
+    """Meinshausen weights from sklearn's apply(), step-function quantile"""
+    train_leaves, leaves = rf.model.apply(X_train), rf.model.apply(X)
+    order = np.argsort(y_train)
+    result = np.empty(len(X))
+    for r in range(len(X)):
+        same = train_leaves == leaves[r]
+        weights = (same / same.sum(axis=0)).mean(axis=1)
+        cdf = np.cumsum(weights[order])
+        result[r] = y_train[order][np.searchsorted(cdf, q - 1e-12)]
+    return result
+
+
+@pytest.mark.parametrize("q_index,q", [(0, 0.025), (1, 0.5), (2, 0.975)])
+def test_quantiles_match_brute_force_qrf(forest, q_index, q):
+    rf, X_train, y_train = forest
+    X, _ = _heteroscedastic(1, 25)
+    result = rf.predict_with_uncertainty(X)
+    got = [result["lower_ci"], result["median"], result["upper_ci"]][q_index]
+    expected = _reference_quantiles(rf, X_train, y_train, X, q)
+    # Binning and interpolation move the quantile by at most a bin either way
+    edges = rf._bin_edges
+    b = np.searchsorted(edges, expected)
+    tolerance = edges[np.minimum(b + 1, len(edges) - 1)] - edges[np.maximum(b - 2, 0)]
+    assert np.all(np.abs(got - expected) <= tolerance + 1e-9)
+
+
+def test_intervals_cover_and_adapt_to_the_noise(forest):
+    rf, _, _ = forest
+    X, y = _heteroscedastic(2, 400)
+    result = rf.predict_with_uncertainty(X)
+    assert np.all(result["lower_ci"] <= result["median"])
+    assert np.all(result["median"] <= result["upper_ci"])
+    covered = (y >= result["lower_ci"]) & (y <= result["upper_ci"])
+    assert covered.mean() > 0.85
+
+    width = result["upper_ci"] - result["lower_ci"]
+    quiet, noisy = X[:, 0] < 0.3, X[:, 0] > 0.7
+    assert width[noisy].mean() > 1.3 * width[quiet].mean()
+
+
+def test_normal_interval_and_chunking(forest):
+    rf, _, _ = forest
+    X, _ = _heteroscedastic(3, 30)
+    normal = rf.predict_with_uncertainty(X, interval="normal")
+    np.testing.assert_allclose(normal["upper_ci"] - normal["mean"], normal["mean"] - normal["lower_ci"])
+    np.testing.assert_allclose(normal["mean"], rf.predict(X), rtol=1e-5)
+
+    whole = rf.predict_with_uncertainty(X)
+    chunked = rf.predict_with_uncertainty(X, chunk_size=7)
+    for key in ("mean", "lower_ci", "median", "upper_ci"):
+        np.testing.assert_allclose(chunked[key], whole[key])
+    with pytest.raises(ValueError):
+        rf.predict_with_uncertainty(X, interval="bootstrap")
+
+
+def test_models_without_a_leaf_index_fall_back_to_normal(forest):
+    rf, _, _ = forest
+    X, _ = _heteroscedastic(4, 5)
+    leaf_bins = rf._leaf_bins
+    try:
+        rf._leaf_bins = None
+        assert rf.predict_with_uncertainty(X)["interval"] == "normal"
+    finally:
+        rf._leaf_bins = leaf_bins
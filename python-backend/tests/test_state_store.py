@@ -0,0 +1,115 @@
+"""
+LRUStateStore spill/reload/flush and persisted Kalman sessions.
+"""
+
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from algorithms.scientific import kalman_filter
+from services import state_store
+from services.state_store import LRUStateStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LRUStateStore("test_store", capacity=2, spill_dir=str(tmp_path))
+
+
+def _spilled(store):
+    if not os.path.isdir(store.spill_dir):
+        return []
+    return sorted(name[:-len(".joblib")] for name in os.listdir(store.spill_dir))
+
+
+def test_least_recently_used_entry_spills_and_reloads(store):
+    store.put("a", {"value": 1})
+    store.put("b", {"value": 2})
+    store.get("a")
+    store.put("c", {"value": 3})
+    assert _spilled(store) == ["b"]
+
+    # Reloading promotes b and spills the next least recently used entry
+    assert store.get("b") == {"value": 2}
+    assert _spilled(store) == ["a"]
+    assert all(key in store for key in "abc")
+
+
+def test_put_makes_memory_authoritative(store):
+    for key in "abc":
+        store.put(key, key)
+    store.put("a", "new")
+    assert store.get("a") == "new"
+    store.put("d", "d")
+    store.put("e", "e")
+    assert store.get("a") == "new"
+
+
+def test_flush_and_delete(store):
+    store.put("a", np.arange(3))
+    store.put("b", np.arange(4))
+    state_store.flush_all()
+    assert _spilled(store) == ["a", "b"]
+    np.testing.assert_array_equal(store.get("b"), np.arange(4))
+
+    store.delete("a")
+    assert "a" not in store
+    with pytest.raises(KeyError):
+        store.delete("a")
+    with pytest.raises(KeyError):
+        store.get("a")
+
+
+def test_in_memory_store_drops_evicted_entries(tmp_path):
+    store = LRUStateStore("test_memory", capacity=1, spill_dir=str(tmp_path), spill=False)
+    store.put("a", 1)
+    store.put("b", 2)
+    store.flush()
+    assert "a" not in store and store.get("b") == 2
+    assert not os.path.exists(store.spill_dir)
+
+
+def test_malformed_keys_are_missing(store):
+    assert "../escape" not in store
+    with pytest.raises(KeyError):
+        store.put("../escape", 1)
+
+
+def test_concurrent_updates_are_serialized(store):
+    store.put("counter", 0)
+
+    def increment():
+        for _ in range(200):
+            store.update("counter", lambda value: (value + 1, None))
+
+    threads = [threading.Thread(target=increment) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.get("counter") == 800
+
+
+def test_session_updates_match_one_filter_run():
+    rng = np.random.default_rng(0)
+    data = (20 + np.cumsum(rng.normal(scale=0.3, size=30))).tolist()
+    kf = kalman_filter.WeatherKalmanFilter()
+    kf.configure(0.1, 1.0)
+    expected = kf.filter_data(data)
+
+    session = kalman_filter.create_session(0.1, 1.0, data[:10])
+    session_id = session["session_id"]
+    estimates = session["estimates"]
+    for start, end in [(10, 17), (17, 25), (25, 30)]:
+        estimates += kalman_filter.update_session(session_id, data[start:end])["estimates"]
+
+    np.testing.assert_allclose([e["filtered"] for e in estimates], expected["filtered"], rtol=1e-10)
+    state = kalman_filter.get_session(session_id)
+    assert state["n_observations"] == 30
+    assert state["forecast_7_steps"] == pytest.approx(kf.forecast(7))
+
+    kalman_filter.delete_session(session_id)
+    with pytest.raises(KeyError):
+        kalman_filter.get_session(session_id)
@@ -0,0 +1,95 @@
+"""
+Validation splits: chronological methods must never train on the test
+block or the gap around it.
+"""
+
+import numpy as np
+import pytest
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.ensemble import GradientBoostingRegressor
+
+from algorithms.ml.validation import fit_and_validate, time_series_splits, validation_splits
+
+
+class RowRecorder(BaseEstimator, RegressorMixin):
+    """Predicts the mean target and remembers which rows it was fitted on"""
+
+    def fit(self, X, y):
+        self.rows_ = np.asarray(X[:, 0], dtype=int)
+        self.mean_ = float(np.mean(y))
+        return self
+
+    def predict(self, X):
+        return np.full(len(X), self.mean_)
+
+
+@pytest.mark.parametrize("gap", [0, 3])
+def test_blocked_splits_exclude_the_block_and_its_gap(gap):
+    n = 100
+    folds = time_series_splits(n, "blocked", 5, gap)
+    tested = np.concatenate([test for _, test in folds])
+    np.testing.assert_array_equal(tested, np.arange(n))
+    for train, test in folds:
+        assert np.all(np.diff(test) == 1)
+        # Everything outside the block and its gap is used for training
+        excluded = np.arange(max(test[0] - gap, 0), min(test[-1] + gap, n - 1) + 1)
+        np.testing.assert_array_equal(train, np.setdiff1d(np.arange(n), excluded))
+
+
+@pytest.mark.parametrize("method,window", [("expanding", None), ("rolling", 20)])
+def test_origins_only_train_on_the_past(method, window):
+    folds = time_series_splits(100, method, 4, gap=2, window=window)
+    assert len(folds) == 4
+    for train, test in folds:
+        assert test[0] - train[-1] - 1 == 2
+        if window:
+            assert len(train) <= window
+    if method == "expanding":
+        assert all(len(a[0]) < len(b[0]) for a, b in zip(folds, folds[1:]))
+        assert folds[0][0][0] == 0
+    else:
+        assert len(folds[-1][0]) == window
+
+
+def test_default_rolling_window_is_the_first_origin():
+    folds = time_series_splits(100, "rolling", 4)
+    assert {len(train) for train, _ in folds} == {100 // 5}
+
+
+def test_kept_fold_and_simple_methods():
+    assert validation_splits(50, "kfold", 5)[1] == 0
+    folds, keep = validation_splits(50, "blocked", 5)
+    assert keep == len(folds) - 1
+    (train, test), = validation_splits(50, "none")[0]
+    assert len(train) == 50 and len(test) == 0
+    (train, test), = validation_splits(50, "holdout")[0]
+    assert (len(train), len(test)) == (40, 10)
+    with pytest.raises(ValueError):
+        validation_splits(50, "shuffled")
+    with pytest.raises(ValueError):
+        validation_splits(50, "blocked", 1)
+
+
+@pytest.mark.parametrize("method", ["blocked", "expanding", "rolling"])
+def test_fitted_model_never_saw_its_test_rows(method):
+    n, gap = 90, 4
+    X = np.column_stack([np.arange(n), np.zeros(n)])
+    y = np.arange(n, dtype=float)
+    fit = fit_and_validate(RowRecorder(), X, y, method, 3, n_jobs=1, gap=gap, window=30)
+    test_rows = fit["X_test"][:, 0].astype(int)
+    seen = fit["model"].rows_
+    assert not np.intersect1d(seen, test_rows).size
+    assert np.min(np.abs(seen[:, None] - test_rows[None, :])) > gap
+    # The most recent block is the test set of the returned model
+    assert test_rows[-1] == n - 1
+
+
+def test_warm_started_origins_fit_the_tree_budget_once():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(120, 3))
+    y = X[:, 0] + rng.normal(scale=0.1, size=120)
+    fit = fit_and_validate(GradientBoostingRegressor(n_estimators=40, random_state=0), X, y, "expanding", 4)
+    summary = fit["cross_validation"]
+    assert summary["warm_start"] and summary["trees_fitted"] == 40
+    assert fit["model"].n_estimators_ == 40
+    assert len(summary["cv_scores"]) == 4
@@ -0,0 +1,130 @@
+"""
+XGBoost native backend: held-out metrics for every validation method,
+shared cached matrices, and continued training on new rows.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+pytest.importorskip("xgboost")
+
+import main
+from algorithms.ml import xgboost_predictor
+from algorithms.ml.xgboost_predictor import WeatherXGBoost
+
+
+def _data(seed: int, n: int = 300):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 5))
+    y = 2 * X[:, 0] - X[:, 1] ** 2 + rng.normal(scale=0.1, size=n)
+    return X, y
+
+
+@pytest.mark.parametrize("validation", ["none", "holdout", "kfold", "blocked"])
+def test_held_out_metrics_for_every_method(validation):
+    X, y = _data(0)
+    metrics = WeatherXGBoost(n_estimators=40).train(X, y, validation, n_folds=3)
+    if validation == "none":
+        assert metrics["test_metrics"] is None
+    else:
+        assert metrics["test_metrics"]["r2"] > 0.5
+
+
+@pytest.mark.parametrize("validation,keep", [("kfold", 0), ("blocked", -1)])
+def test_fold_metrics_come_from_the_kept_fold(validation, keep):
+    X, y = _data(1)
+    metrics = WeatherXGBoost(n_estimators=40).train(X, y, validation, n_folds=3)
+    # The kept fold's test MAE at the best iteration is its CV score
+    assert metrics["test_metrics"]["mae"] == pytest.approx(
+        metrics["cross_validation"]["cv_scores"][keep], rel=1e-4
+    )
+
+
+def test_concurrent_trainings_share_cached_matrices():
+    X, y = _data(2)
+    reference = WeatherXGBoost(n_estimators=30).train(X, y, "kfold", n_folds=3)
+
+    def train(_):
+        return WeatherXGBoost(n_estimators=30).train(X, y, "kfold", n_folds=3)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(train, range(4)))
+    for metrics in results:
+        assert metrics["dmatrix_cache_hit"]
+        assert metrics["cross_validation"]["cv_scores"] == pytest.approx(
+            reference["cross_validation"]["cv_scores"]
+        )
+        assert metrics["test_metrics"] == pytest.approx(reference["test_metrics"])
+
+
+def _trained(seed: int):
+    X, y = _data(seed)
+    model = WeatherXGBoost(n_estimators=30)
+    model.train(X, y, "none")
+    return model, X, y
+
+
+def test_append_adds_trees_and_keeps_the_existing_ones():
+    model, X, _ = _trained(3)
+    X_new, y_new = _data(4, 60)
+    y_new = y_new + 1.0
+    before = model.predict(X)
+
+    updated, result = xgboost_predictor.update_model(model, X_new, y_new, n_rounds=5, mode="append")
+    metrics = result["update_metrics"]
+    assert (metrics["rounds_before"], metrics["n_rounds"]) == (30, 35)
+    assert metrics["new_data_mae_after"] < metrics["new_data_mae_before"]
+
+    booster = updated.model.get_booster()
+    np.testing.assert_allclose(booster[:30].inplace_predict(X), before, rtol=1e-5, atol=1e-5)
+    # The stored model is left as it was
+    np.testing.assert_array_equal(model.predict(X), before)
+
+
+def test_refresh_keeps_tree_structure_and_refits_leaves():
+    model, X, _ = _trained(5)
+    X_new, y_new = _data(6, 200)
+    y_new = y_new + 1.0
+
+    updated, result = xgboost_predictor.update_model(model, X_new, y_new, mode="refresh")
+    metrics = result["update_metrics"]
+    assert metrics["n_rounds"] == metrics["rounds_before"] == 30
+    assert metrics["new_data_mae_after"] < metrics["new_data_mae_before"]
+
+    def splits(m):
+        trees = m.model.get_booster().trees_to_dataframe()
+        return trees[trees["Feature"] != "Leaf"][["Tree", "Node", "Feature", "Split"]].reset_index(drop=True)
+
+    assert splits(updated).equals(splits(model))
+
+
+def test_update_rejects_bad_input():
+    with pytest.raises(ValueError):
+        WeatherXGBoost().update(*_data(7, 10))
+    model, _, _ = _trained(7)
+    with pytest.raises(ValueError):
+        model.update(*_data(8, 10), mode="prune")
+
+
+def test_update_endpoint_stores_a_new_version():
+    X, y = _data(9, 120)
+    X_new, y_new = _data(10, 30)
+    with TestClient(main.app) as client:
+        client.post("/api/ml/xgboost/train", json={
+            "X_train": X.tolist(), "y_train": y.tolist(), "validation": "none", "model_id": "xgb-update"
+        })
+        response = client.post("/api/ml/xgboost/xgb-update/update", json={
+            "X_new": X_new.tolist(), "y_new": y_new.tolist(), "n_rounds": 3
+        })
+        assert response.status_code == 200
+        assert (response.json()["parent_version"], response.json()["model_version"]) == (1, 2)
+
+        metadata = client.get("/api/ml/xgboost/xgb-update").json()
+        assert metadata["operation"] == "update-append"
+        assert metadata["lineage"] == [1]
+        assert metadata["n_samples"] == 150
+        missing = client.post("/api/ml/xgboost/absent/update", json={"X_new": X_new.tolist(), "y_new": y_new.tolist()})
+        assert missing.status_code == 404